@@ -1,100 +1,128 @@
-from flask import Flask, send_from_directory
+from flask import Flask, abort
 from flask_cors import CORS
 from config import Config
 from extensions import db, jwt
 import os
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
 UPLOAD_FOLDER = "uploads"
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB max upload
 
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 
-CORS(app, resources={r"/api/*": {
-    "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
-    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    "allow_headers": ["Content-Type", "Authorization"],
-    "supports_credentials": True
-}})
+def create_app(config_object=Config):
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+    app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB max upload
+
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+
+    CORS(app, resources={r"/api/*": {
+        "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
+        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Authorization", "X-Chunk-Sha256"],
+        "supports_credentials": True
+    }})
+
+    #CORS(app, resources={r"/api/*": {
+    #    "origins": [
+    #        "http://localhost:5173",
+    #        "http://127.0.0.1:5173",
+    #        "http://192.168.18.8:5173",   # tambahkan ini
+    #        "http://192.168.18.12:5173",  # tambahkan ini (opsional)
+    #    ],
+    #    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    #    "allow_headers": ["Content-Type", "Authorization"],
+    #    "supports_credentials": True
+    #}})
+
+    import db_pool
+    db_pool.init_app(app)  # must run before db.init_app builds the engine
+    db.init_app(app)
+    jwt.init_app(app)
+
+    from asset_registry import assets
+    assets.init_app(app)
+
+    from image_cache import image_cache
+    image_cache.init_app(app)
 
-#CORS(app, resources={r"/api/*": {
-#    "origins": [
-#        "http://localhost:5173",
-#        "http://127.0.0.1:5173",
-#        "http://192.168.18.8:5173",   # tambahkan ini
-#        "http://192.168.18.12:5173",  # tambahkan ini (opsional)
-#    ],
-#    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-#    "allow_headers": ["Content-Type", "Authorization"],
-#    "supports_credentials": True
-#}})
+    from cache import cache
+    cache.init_app(app)
 
-db.init_app(app)
-jwt.init_app(app)
+    from metrics import sql_metrics
+    sql_metrics.init_app(app)
 
-import models
+    from pdf_profiler import pdf_metrics
+    pdf_metrics.init_app(app)
 
-@app.route("/")
-def home():
-    return {"message": "PT Flotech Controls Indonesia — Management System"}
+    import models
 
-# ── Existing blueprints ──────────────────────────────────────
-from routes.auth import auth_bp
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    @app.route("/")
+    def home():
+        return {"message": "PT Flotech Controls Indonesia — Management System"}
 
-from routes.report import report_bp
-app.register_blueprint(report_bp, url_prefix='/api/report')
+    # ── Existing blueprints ──────────────────────────────────────
+    from routes.auth import auth_bp
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
 
-from routes.engineer import engineer_bp
-app.register_blueprint(engineer_bp, url_prefix='/api/engineer')
+    from routes.report import report_bp
+    app.register_blueprint(report_bp, url_prefix='/api/report')
 
-from routes.quotation import quotation_bp
-app.register_blueprint(quotation_bp, url_prefix='/api/quotation')
+    from routes.engineer import engineer_bp
+    app.register_blueprint(engineer_bp, url_prefix='/api/engineer')
 
-from routes.customer import customer_bp
-app.register_blueprint(customer_bp, url_prefix='/api/customer')
+    from routes.quotation import quotation_bp
+    app.register_blueprint(quotation_bp, url_prefix='/api/quotation')
 
-from routes.stock import stock_bp
-app.register_blueprint(stock_bp, url_prefix='/api/stock')
+    from routes.customer import customer_bp
+    app.register_blueprint(customer_bp, url_prefix='/api/customer')
 
-from routes.catalog import catalog_bp
-app.register_blueprint(catalog_bp, url_prefix='/api/catalog')
+    from routes.stock import stock_bp
+    app.register_blueprint(stock_bp, url_prefix='/api/stock')
 
-# ── NEW blueprints ───────────────────────────────────────────
-from routes.onsite_report import onsite_bp
-app.register_blueprint(onsite_bp, url_prefix='/api/onsite')
+    from routes.catalog import catalog_bp
+    app.register_blueprint(catalog_bp, url_prefix='/api/catalog')
 
-from routes.surat_serah_terima import surat_bp
-app.register_blueprint(surat_bp, url_prefix='/api/surat')
+    # ── NEW blueprints ───────────────────────────────────────────
+    from routes.onsite_report import onsite_bp
+    app.register_blueprint(onsite_bp, url_prefix='/api/onsite')
 
-from routes.surat_resmi import surat_resmi_bp, SuratResmi
-app.register_blueprint(surat_resmi_bp, url_prefix="/api/surat-resmi")
+    from routes.surat_serah_terima import surat_bp
+    app.register_blueprint(surat_bp, url_prefix='/api/surat')
 
-from routes.leave import leave_bp
-app.register_blueprint(leave_bp, url_prefix='/api/leave')
+    from routes.surat_resmi import surat_resmi_bp, SuratResmi
+    app.register_blueprint(surat_resmi_bp, url_prefix="/api/surat-resmi")
 
-from routes.notification import notification_bp
-app.register_blueprint(notification_bp, url_prefix='/api/notification')
+    from routes.leave import leave_bp
+    app.register_blueprint(leave_bp, url_prefix='/api/leave')
 
-# ── Static uploads ───────────────────────────────────────────
-@app.route('/uploads/<path:filename>')
-def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    from routes.notification import notification_bp
+    app.register_blueprint(notification_bp, url_prefix='/api/notification')
 
-# ── DB init ─────────────────────────────────────────────────
-with app.app_context():
-    db.create_all()
+    from routes.upload import upload_bp
+    app.register_blueprint(upload_bp, url_prefix='/api/upload')
 
-    # Import new models so tables are created
-    from routes.onsite_report import OnsiteReport
-    from routes.surat_serah_terima import SuratSerahTerima
-    from routes.surat_resmi import SuratResmi
-    from routes.customer import Customer
-    db.create_all()  # create new tables if not exists
+    from routes.export import export_bp
+    app.register_blueprint(export_bp, url_prefix='/api/export')
+
+    from routes.dashboard import dashboard_bp, summary_cache
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    summary_cache.init_app(app)
+
+    from routes.internal import internal_bp, metrics_bp
+    app.register_blueprint(internal_bp, url_prefix='/api/internal')
+    app.register_blueprint(metrics_bp)
+
+    # ── Static uploads ───────────────────────────────────────────
+    @app.route('/uploads/<path:filename>')
+    def uploaded_file(filename):
+        from file_delivery import send_upload, is_content_addressed
+        from upload_store import resolve_upload
+        path = resolve_upload(filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        return send_upload(path, immutable=is_content_addressed(filename))
 
     # Create subfolders
     for folder in ["catalog"]:
@@ -102,9 +130,85 @@ with app.app_context():
         if not os.path.exists(path):
             os.makedirs(path)
 
+    # ── DB migrations ───────────────────────────────────────────
+    # Schema work never runs on boot. After pulling changes run:
+    #   cd backend && flask --app app db upgrade
+    import click
+    from flask.cli import AppGroup
+
+    db_cli = AppGroup("db", help="Versioned schema migrations.")
+
+    @db_cli.command("upgrade")
+    @click.option("--dry-run", is_flag=True, help="Print the SQL without running it.")
+    @click.option("--to", "target", type=int, default=None, help="Stop after this version.")
+    def db_upgrade(dry_run, target):
+        """Apply pending migrations."""
+        import migrations
+        migrations.upgrade(dry_run=dry_run, target=target)
+
+    @db_cli.command("status")
+    def db_status():
+        """List migrations and whether they are applied."""
+        import migrations
+        migrations.status()
+
+    app.cli.add_command(db_cli)
+
+    # ── Upload store maintenance ────────────────────────────────
+    uploads_cli = AppGroup("uploads", help="Content-addressed upload store.")
+
+    @uploads_cli.command("gc")
+    @click.option("--dry-run", is_flag=True, help="List what would be deleted.")
+    @click.option("--grace-hours", type=int, default=24, help="Keep unreferenced files this long.")
+    @click.option("--batch-size", type=int, default=500, help="Rows / files handled per commit.")
+    def uploads_gc(dry_run, grace_hours, batch_size):
+        """Delete stored files no report / catalog / surat references any more."""
+        from upload_store import collect_garbage
+        removed, freed = collect_garbage(grace_hours=grace_hours, dry_run=dry_run, batch_size=batch_size)
+        print(f"✅ {removed} file{'' if removed == 1 else 's'}, {freed / 1024 / 1024:.1f} MB"
+              f"{' (dry-run)' if dry_run else ' dihapus'}")
+
+    @uploads_cli.command("backfill-images")
+    @click.option("--batch-size", type=int, default=500, help="Rows handled per commit.")
+    def uploads_backfill_images(batch_size):
+        """Record size, byte size, type and hash of report photos uploaded before they were stored."""
+        from photo_ingest import backfill_image_info
+        updated, missing = backfill_image_info(batch_size=batch_size)
+        print(f"✅ {updated} foto diperbarui, {missing} file tidak ditemukan")
+
+    app.cli.add_command(uploads_cli)
+
+    pdf_cli = AppGroup("pdf", help="Rendered PDF cache.")
+
+    @pdf_cli.command("purge-cache")
+    def pdf_purge_cache():
+        """Delete every cached PDF so the next request renders again."""
+        from pdf_delivery import purge_cache
+        print(f"✅ {purge_cache()} PDF dihapus dari cache")
+
+    app.cli.add_command(pdf_cli)
+
+    cache_cli = AppGroup("cache", help="Reference data cache (engineers, users, customers).")
+
+    @cache_cli.command("clear")
+    def cache_clear():
+        """Drop every cached entry, e.g. after editing users or engineers directly in the database."""
+        from cache import cache
+        cache.clear()
+        print(f"✅ Cache dikosongkan ({cache.stats()['backend'] or 'nonaktif'})")
+
+    app.cli.add_command(cache_cli)
+
+    return app
+
+
+# Module-level app for `python app.py`, migrate.py and wsgi.py
+app = create_app()
+
 if __name__ == "__main__":
+    # Development server only — production runs through wsgi.py (gunicorn / waitress)
     app.run(host="0.0.0.0", port=5000, debug=True)
 
 #if __name__ == "__main__":
 #    app.run(debug=True)
-#    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+#    app.run(host="0.0.0.0", port=5000, debug=True)
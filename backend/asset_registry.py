@@ -0,0 +1,151 @@
+"""
+backend/asset_registry.py
+Letterhead assets shared by all PDF builders.
+
+The logo is resolved once at startup, its bytes and pixel size are kept in
+memory, and builders ask for a ready-made flowable instead of probing paths
+and opening the file with PIL on every render.  The file's mtime is checked
+at most every ASSET_CHECK_INTERVAL seconds so a replaced logo is picked up
+without restarting the server; a missing logo is remembered for the same
+interval, so the candidate paths are not probed on every render either.
+"""
+import os
+import struct
+import threading
+import time
+from io import BytesIO
+
+from pdf_profiler import asset_timer
+
+
+# Candidates relative to the backend folder — first existing one wins.
+LOGO_CANDIDATES = [
+    ("assets", "logo.png"),
+    ("static", "logo.png"),
+    ("static", "flotech_logo.png"),
+    ("..", "frontend", "public", "logo.png"),
+    ("..", "frontend", "src", "assets", "logo.png"),
+]
+
+
+def _image_size(data):
+    """Pixel size; PNG headers are read directly so startup does not import PIL."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    from PIL import Image as PILImage
+    with PILImage.open(BytesIO(data)) as pil:
+        return pil.size
+
+
+class _Asset:
+    __slots__ = ("path", "mtime", "data", "width", "height")
+
+    def __init__(self, path, mtime, data, width, height):
+        self.path = path
+        self.mtime = mtime
+        self.data = data
+        self.width = width
+        self.height = height
+
+    @property
+    def aspect(self):
+        return self.width / self.height if self.height else 1.0
+
+
+class AssetRegistry:
+    def __init__(self, root=None, check_interval=5.0):
+        self.root = root or os.path.dirname(os.path.abspath(__file__))
+        self.check_interval = check_interval
+        self._candidates = {"logo": LOGO_CANDIDATES}
+        self._assets = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.root = app.root_path
+        self.check_interval = float(app.config.get("ASSET_CHECK_INTERVAL", self.check_interval))
+        app.extensions["asset_registry"] = self
+        if not self.get("logo"):
+            app.logger.warning("Logo not found — PDFs will use the text letterhead")
+
+    def register(self, name, *candidates):
+        """Register an asset by name; candidates are path tuples relative to root."""
+        with self._lock:
+            self._candidates[name] = list(candidates)
+            self._assets.pop(name, None)
+            self._checked_at.pop(name, None)
+
+    def _resolve(self, name):
+        for parts in self._candidates.get(name, []):
+            path = os.path.normpath(os.path.join(self.root, *parts))
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _load(self, path):
+        mtime = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        w, h = _image_size(data)
+        return _Asset(path, mtime, data, w, h)
+
+    def _fresh(self, name, now):
+        # also true for a remembered miss (stored as None)
+        return name in self._assets and now - self._checked_at.get(name, 0) < self.check_interval
+
+    def get(self, name):
+        """Return the cached asset (None if missing), reloading it if the file changed on disk."""
+        now = time.monotonic()
+        if self._fresh(name, now):
+            return self._assets.get(name)
+
+        with self._lock:
+            if self._fresh(name, now):
+                return self._assets.get(name)
+            asset = self._assets.get(name)
+            self._checked_at[name] = now
+            try:
+                if asset is not None and os.path.getmtime(asset.path) == asset.mtime:
+                    return asset
+            except OSError:
+                pass
+            path = self._resolve(name)
+            try:
+                asset = self._load(path) if path else None
+            except Exception:
+                asset = None
+            self._assets[name] = asset
+            return asset
+
+    def flowable(self, name, width=None, height=None, max_width=None, h_align=None):
+        """
+        Fresh Image flowable for an asset, or None if it is missing.
+        Give width or height; the other side follows the aspect ratio.
+        max_width caps the width only (height is kept), as the builders expect.
+        """
+        with asset_timer():
+            return self._flowable(name, width, height, max_width, h_align)
+
+    def _flowable(self, name, width, height, max_width, h_align):
+        asset = self.get(name)
+        if asset is None:
+            return None
+        from reportlab.platypus import Image as RLImage
+        if width is None and height is None:
+            width, height = asset.width, asset.height
+        elif width is None:
+            width = height * asset.aspect
+        elif height is None:
+            height = width / asset.aspect
+        if max_width is not None:
+            width = min(width, max_width)
+        img = RLImage(BytesIO(asset.data), width=width, height=height)
+        if h_align:
+            img.hAlign = h_align
+        return img
+
+    def logo_flowable(self, width=None, height=None, max_width=None, h_align=None):
+        return self.flowable("logo", width=width, height=height, max_width=max_width, h_align=h_align)
+
+
+assets = AssetRegistry()
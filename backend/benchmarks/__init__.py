@@ -0,0 +1,5 @@
+"""
+backend/benchmarks
+Stand-alone performance scripts. Run from the backend folder, e.g.
+    cd backend && python -m benchmarks.bench_html_flowables
+"""
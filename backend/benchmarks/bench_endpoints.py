@@ -0,0 +1,308 @@
+"""
+Endpoint benchmark: every list / detail / PDF / export / file route against seeded data.
+
+Drives the app in-process through the Flask test client, so numbers are
+server-side cost only (no network, no gunicorn). For each endpoint:
+  p50 / p95 / max latency    over --iterations calls (--pdf-iterations for PDFs / exports)
+  queries                    SQL statements per call
+  peak_kb                    tracemalloc peak of one extra call
+  bytes, status              of the last response
+
+Results can be written to JSON and compared with an earlier run. The exit
+code is 1 if any endpoint's p50 got slower than --threshold (and by more
+than --min-ms) or its query count went up, which makes it usable as a regression gate.
+
+Usage: cd backend && python -m benchmarks.bench_endpoints [--scale small] [--iterations 5]
+           [--only pdf] [--out results.json] [--compare baseline.json] [--threshold 0.25]
+PDF endpoints render on every call unless --pdf-cache is given (see pdf_delivery).
+Without DATABASE_URL / DB_* a throw-away SQLite database and upload folder in a
+temp directory are used. Against a real database, pass --reuse to skip seeding
+when the bench_admin user already exists. Catalog files added by the
+catalog.upload benchmark are deleted at the end of the run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+
+from benchmarks.seed import add_count_args, counts_from_args
+
+BENCH_UPLOAD_TITLE = "bench upload"
+
+
+def _catalog_upload():
+    """Multipart form for /api/catalog/upload; a fresh stream per call."""
+    from benchmarks.seed import _catalog_bytes
+    return {"data": {"title": BENCH_UPLOAD_TITLE, "brand": "Yokogawa",
+                     "file": (BytesIO(_catalog_bytes(1200, 99)), "bench_upload.pdf")},
+            "content_type": "multipart/form-data"}
+
+
+# (name, kind, method, path, body) — {report} etc. are filled with seeded ids. body is a
+# JSON dict, or a callable returning test-client kwargs (multipart uploads)
+ENDPOINTS = [
+    ("report.list",              "list",   "GET",  "/api/report/list", None),
+    ("onsite.list",              "list",   "GET",  "/api/onsite/list", None),
+    ("quotation.list",           "list",   "GET",  "/api/quotation/list", None),
+    ("quotation.analytics",      "list",   "GET",  "/api/quotation/analytics", None),
+    ("stock.list",               "list",   "GET",  "/api/stock/list", None),
+    ("surat.list",               "list",   "GET",  "/api/surat/list", None),
+    ("surat_resmi.list",         "list",   "GET",  "/api/surat-resmi/list", None),
+    ("customer.list",            "list",   "GET",  "/api/customer/list", None),
+    ("catalog.list",             "list",   "GET",  "/api/catalog/list", None),
+    ("engineer.list",            "list",   "GET",  "/api/engineer/", None),
+    ("auth.users",               "list",   "GET",  "/api/auth/users", None),
+    ("leave.requests",           "list",   "GET",  "/api/leave/requests", None),
+    ("leave.requests_all",       "list",   "GET",  "/api/leave/requests/all", None),
+    ("leave.requests_pending",   "list",   "GET",  "/api/leave/requests/pending", None),
+    ("leave.summary",            "list",   "GET",  "/api/leave/summary", None),
+    ("leave.summary_all",        "list",   "GET",  "/api/leave/summary/all", None),
+    ("notification.list",        "list",   "GET",  "/api/notification/list", None),
+    ("notification.unread",      "list",   "GET",  "/api/notification/unread-count", None),
+    ("dashboard.summary",        "list",   "GET",  "/api/dashboard/summary", None),
+    ("report.detail",            "detail", "GET",  "/api/report/detail/{report}", None),
+    ("onsite.detail",            "detail", "GET",  "/api/onsite/detail/{onsite}", None),
+    ("quotation.detail",         "detail", "GET",  "/api/quotation/detail/{quotation}", None),
+    ("quotation.revisions",      "detail", "GET",  "/api/quotation/revisions/{quotation}", None),
+    ("surat.detail",             "detail", "GET",  "/api/surat/detail/{surat}", None),
+    ("surat_resmi.detail",       "detail", "GET",  "/api/surat-resmi/detail/{surat_resmi}", None),
+    ("engineer.detail",          "detail", "GET",  "/api/engineer/{engineer}", None),
+    ("catalog.download",         "file",   "GET",  "/api/catalog/download/{catalog}", None),
+    ("catalog.upload",           "file",   "POST", "/api/catalog/upload", _catalog_upload),
+    ("report.pdf",               "pdf",    "GET",  "/api/report/pdf/{report}", None),
+    ("onsite.pdf",               "pdf",    "GET",  "/api/onsite/pdf/{onsite}", None),
+    ("quotation.pdf",            "pdf",    "GET",  "/api/quotation/pdf/{quotation}", None),
+    ("surat.pdf",                "pdf",    "GET",  "/api/surat/pdf/{surat}", None),
+    ("surat_resmi.pdf",          "pdf",    "GET",  "/api/surat-resmi/pdf/{surat_resmi}", None),
+    ("quotation.export_excel",   "export", "POST", "/api/quotation/export/excel", {}),
+    ("quotation.export_pdf",     "export", "POST", "/api/quotation/export/pdf", {}),
+    ("stock.export_pdf",         "export", "GET",  "/api/stock/pdf/export", None),
+    ("leave.export_csv",         "export", "GET",  "/api/leave/export/csv", None),
+    ("export.merged",            "export", "POST", "/api/export/merged", {"client": "{client}"}),
+]
+
+
+def _prepare_env(workdir):
+    """Throw-away SQLite + uploads unless a database is configured. Must run before `import app`."""
+    if os.getenv("DATABASE_URL") or os.getenv("DB_HOST"):
+        return False
+    os.chdir(workdir)  # UPLOAD_FOLDER is relative to the cwd
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-length-32b")
+    return True
+
+
+def _sample_ids():
+    """A row from the middle of each table, so detail / PDF calls hit typical data."""
+    from extensions import db
+    from models import Report, Engineer
+    from routes.onsite_report import OnsiteReport
+    from routes.quotation import Quotation
+    from routes.surat_serah_terima import SuratSerahTerima
+    from routes.surat_resmi import SuratResmi
+    from routes.catalog import CatalogFile
+
+    ids = {}
+    for key, model in [("report", Report), ("onsite", OnsiteReport), ("quotation", Quotation),
+                       ("surat", SuratSerahTerima), ("surat_resmi", SuratResmi), ("engineer", Engineer),
+                       ("catalog", CatalogFile)]:
+        count = db.session.query(model).count()
+        row = db.session.query(model.id).order_by(model.id).offset(count // 2).first()
+        ids[key] = row[0] if row else 0
+    # Merged export of one client: its reports and onsite reports
+    ids["client"] = db.session.query(Report.client_name).filter(Report.id == ids["report"]).scalar() or ""
+    return ids
+
+
+def _fill(body, ids):
+    """JSON body with {placeholders} in string values replaced by the sampled ids."""
+    if not isinstance(body, dict):
+        return body
+    return {k: v.format(**ids) if isinstance(v, str) else v for k, v in body.items()}
+
+
+def _request_kwargs(body):
+    return body() if callable(body) else {"json": body}
+
+
+def _remove_bench_uploads():
+    """Catalog rows the upload benchmark added (also when run against a real database)."""
+    from extensions import db
+    from routes.catalog import CatalogFile
+    from upload_store import discard
+
+    for cf in CatalogFile.query.filter_by(title=BENCH_UPLOAD_TITLE).all():
+        discard(cf.file_path)
+        db.session.delete(cf)
+    db.session.commit()
+
+
+class _QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _pct(values, p):
+    values = sorted(values)
+    k = (len(values) - 1) * p
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def run_endpoint(client, headers, counter, method, path, body, iterations, memory):
+    timings, queries = [], []
+    resp = None
+    for _ in range(iterations):
+        before = counter.count
+        t0 = time.perf_counter()
+        resp = client.open(path, method=method, headers=headers, **_request_kwargs(body))
+        data = resp.get_data()  # consume streamed bodies inside the timing
+        timings.append((time.perf_counter() - t0) * 1000)
+        queries.append(counter.count - before)
+
+    peak_kb = None
+    if memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        client.open(path, method=method, headers=headers, **_request_kwargs(body)).get_data()
+        peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    return {
+        "status": resp.status_code,
+        "bytes": len(data),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_pct(timings, 0.95), 2),
+        "max_ms": round(max(timings), 2),
+        "queries": max(queries),
+        "peak_kb": peak_kb,
+    }
+
+
+def compare(results, baseline, threshold, min_ms):
+    """Print p50 / query deltas against a baseline; returns the regressed endpoint names."""
+    regressions = []
+    print(f"\nvs baseline ({baseline['meta'].get('timestamp', '?')}):")
+    for name, cur in results["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if not old:
+            continue
+        ratio = cur["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+        flags = []
+        if ratio > 1 + threshold and cur["p50_ms"] - old["p50_ms"] > min_ms:
+            flags.append("SLOWER")
+        if cur["queries"] > old["queries"]:
+            flags.append("MORE QUERIES")
+        if flags:
+            regressions.append(name)
+        print(f"  {name:<26} p50 {old['p50_ms']:9.1f} → {cur['p50_ms']:9.1f} ms ({ratio - 1:+6.0%})"
+              f"   queries {old['queries']:4d} → {cur['queries']:4d}   {' '.join(flags)}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark every list/detail/PDF/export endpoint")
+    add_count_args(ap)
+    ap.add_argument("--iterations", type=int, default=5)
+    ap.add_argument("--pdf-iterations", type=int, default=3, help="iterations for PDF / export endpoints")
+    ap.add_argument("--only", help="run endpoints whose name or kind contains this text")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--reuse", action="store_true", help="do not seed if bench data already exists")
+    ap.add_argument("--pdf-cache", action="store_true",
+                    help="serve repeat PDF calls from the rendered-PDF cache (default: render every call)")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--compare", help="baseline results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    ap.add_argument("--min-ms", type=float, default=2.0, help="ignore p50 slowdowns smaller than this (noise)")
+    args = ap.parse_args()
+
+    out = os.path.abspath(args.out) if args.out else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    workdir = tempfile.mkdtemp(prefix="flotech-bench-")
+    throwaway = _prepare_env(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from flask_jwt_extended import create_access_token
+    from app import app
+    from extensions import db
+    from models import User
+    import migrations
+    from benchmarks.seed import seed
+
+    app.config["PDF_CACHE"] = args.pdf_cache
+    counts = counts_from_args(args)
+    with app.app_context():
+        migrations.upgrade(echo=lambda *a: None)
+        admin = User.query.filter_by(username="bench_admin").first()
+        if admin is None or not args.reuse:
+            if admin is not None:
+                from benchmarks.seed import reset
+                reset(db)
+            print(f"Seeding ({args.scale}{', temp SQLite' if throwaway else ''}):")
+            t0 = time.perf_counter()
+            admin = seed(db, counts, app.config["UPLOAD_FOLDER"])
+            print(f"  done in {time.perf_counter() - t0:.1f} s")
+        token = create_access_token(identity=str(admin.id))
+        ids = _sample_ids()
+        counter = _QueryCounter(db.engine)
+        database = db.engine.url.render_as_string(hide_password=True)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = app.test_client()
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "scale": args.scale, "counts": counts,
+            "database": "sqlite (temp)" if throwaway else database,
+            "python": platform.python_version(), "iterations": args.iterations,
+            "pdf_iterations": args.pdf_iterations,
+        },
+        "endpoints": {},
+    }
+
+    print(f"\n{'endpoint':<26} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+          f"{'queries':>8} {'peak KB':>9} {'bytes':>10}")
+    for name, kind, method, path, body in ENDPOINTS:
+        if args.only and args.only not in name and args.only != kind:
+            continue
+        iterations = args.pdf_iterations if kind in ("pdf", "export") else args.iterations
+        body = _fill(body, ids)
+        client.open(path.format(**ids), method=method, headers=headers,
+                    **_request_kwargs(body)).get_data()  # warm-up
+        r = run_endpoint(client, headers, counter, method, path.format(**ids), body,
+                         iterations, memory=not args.no_memory)
+        results["endpoints"][name] = r
+        print(f"{name:<26} {r['status']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f} "
+              f"{r['queries']:>8} {r['peak_kb'] if r['peak_kb'] is not None else '-':>9} {r['bytes']:>10}")
+
+    with app.app_context():
+        _remove_bench_uploads()
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {out}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark for html_flowables on large rich-text bodies.
+
+Measures, per body size:
+  cold   parse (cache cleared) + flowables
+  warm   cached parse + flowables (what a re-render / preview costs)
+  build  full SimpleDocTemplate build of the warm flowables
+
+Usage: cd backend && python -m benchmarks.bench_html_flowables [--sizes 50,500,2000] [--repeat 5]
+"""
+import argparse
+import base64
+import statistics
+import time
+from io import BytesIO
+
+from PIL import Image as PILImage
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate
+
+from html_flowables import HtmlProfile, html_to_flowables, parse_cache
+from image_cache import image_cache
+
+
+def _sample_image():
+    buf = BytesIO()
+    PILImage.new("RGB", (600, 300), (30, 90, 160)).save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def make_body(sections, img_src):
+    """Editor-like HTML: styled paragraphs, lists, blank lines and an image every 25 sections."""
+    parts = []
+    for i in range(sections):
+        parts.append(
+            f'<p style="text-align: justify">Section {i}: <b>pemeriksaan</b> flow meter '
+            f'<span style="color: rgb(200, 30, 30); font-size: 14px">alarm &amp; trip</span> '
+            f'pada <i>line {i % 7}</i>, <u>kalibrasi</u> ulang diperlukan.<br>Catatan tambahan.</p>'
+        )
+        parts.append(f"<ul><li>Item {i}.1</li><li>Item {i}.2 <b>penting</b></li></ul>")
+        parts.append("<div><br></div>")
+        if i % 25 == 0:
+            parts.append(f'<img src="{img_src}" style="width: 320px">')
+    return "".join(parts)
+
+
+def profile():
+    return HtmlProfile(
+        ParagraphStyle("Body", fontName="Helvetica", fontSize=10, leading=14),
+        li=ParagraphStyle("Li", fontName="Helvetica", fontSize=10, leading=14, leftIndent=12),
+        img_width=10 * cm, img_max_w=17 * cm, img_max_h=18 * cm,
+    )
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="50,500,2000")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    img_src = _sample_image()
+    print(f"{'sections':>8} {'html KB':>8} {'blocks':>7} {'cold ms':>9} {'warm ms':>9} {'build ms':>9}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        html = make_body(n, img_src)
+
+        def cold():
+            parse_cache.clear()
+            image_cache.clear()
+            return html_to_flowables(html, profile())
+
+        def warm():
+            return html_to_flowables(html, profile())
+
+        def build():
+            doc = SimpleDocTemplate(BytesIO(), pagesize=A4, leftMargin=2 * cm, rightMargin=2 * cm)
+            doc.build(warm())
+
+        cold_ms = timed(cold, args.repeat)
+        warm()
+        warm_ms = timed(warm, args.repeat)
+        build_ms = timed(build, max(1, args.repeat // 2))
+        blocks = len(warm())
+        print(f"{n:>8} {len(html) / 1024:>8.0f} {blocks:>7} {cold_ms:>9.1f} {warm_ms:>9.1f} {build_ms:>9.1f}")
+
+    print("parse cache:", parse_cache.stats())
+    print("image cache:", image_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
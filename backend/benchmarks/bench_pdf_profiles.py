@@ -0,0 +1,128 @@
+"""
+Size / time tradeoff of the PDF output profiles (image_cache.OUTPUT_PROFILES).
+
+Renders a photo-heavy report, an onsite report and a surat resmi with
+uploaded images in the body once per profile (screen / email / print), by
+calling the builders directly, so the numbers are render cost only:
+  cold ms    image cache cleared: every photo decoded, resampled and re-encoded
+  warm ms    prepared photos from the image cache (a re-render of an edited document)
+  KB         size of the PDF
+
+Usage: cd backend && python -m benchmarks.bench_pdf_profiles [--photos 24] [--photo-size 4032x3024]
+           [--repeat 3]
+Always uses a throw-away SQLite database and upload folder in a temp directory.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+
+def timed(fn, repeat):
+    samples, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), out
+
+
+def _write_photos(upload_folder, count, size):
+    """Phone-size noisy JPEGs under bench/profiles/; returns paths relative to the upload folder."""
+    from PIL import Image as PILImage
+    folder = os.path.join(upload_folder, "bench", "profiles")
+    os.makedirs(folder, exist_ok=True)
+    w, h = size
+    paths = []
+    for i in range(count):
+        img = PILImage.effect_noise((w // 8, h // 8), 40 + i % 5 * 10).convert("RGB").resize((w, h))
+        tint = PILImage.new("RGB", (w, h), (40 * (i % 6), 120, 255 - 30 * (i % 8)))
+        buf = BytesIO()
+        PILImage.blend(img, tint, 0.5).save(buf, format="JPEG", quality=90)
+        rel = f"bench/profiles/photo_{i:03d}.jpg"
+        with open(os.path.join(upload_folder, rel), "wb") as f:
+            f.write(buf.getvalue())
+        paths.append(rel)
+    return paths
+
+
+def _documents(db, photos):
+    """One report, onsite report and surat resmi carrying `photos`; returns their ids."""
+    from models import User, Engineer, Report, ReportImage
+    from routes.onsite_report import OnsiteReport
+    from routes.surat_resmi import SuratResmi
+
+    user = User(name="Bench Profiles", username="bench_profiles", email="bench_profiles@example.com",
+                role="admin", password_hash="x")
+    engineer = Engineer(name="Bench Engineer", employee_id="BENCH-P")
+    db.session.add_all([user, engineer])
+    db.session.flush()
+    report = Report(report_number="BP-0001", report_type="service", client_name="PT Bench",
+                    project_name="Profiles", engineer_id=engineer.id, created_by=user.id,
+                    data_json={"work_description": "Pemeriksaan flow meter dan kalibrasi ulang."})
+    db.session.add(report)
+    db.session.flush()
+    db.session.add_all(ReportImage(report_id=report.id, file_path=p, caption=f"Foto {i + 1}")
+                       for i, p in enumerate(photos))
+
+    body = "".join(f'<p>Temuan {i + 1}: kondisi flange dan gasket.</p>'
+                   f'<img src="/uploads/{p}" style="width: 480px">' for i, p in enumerate(photos))
+    onsite = OnsiteReport(report_number="BPO-0001", client_company="PT Bench", site_location="Plant 1",
+                          engineer_id=engineer.id, job_description=body, created_by=user.id)
+    surat = SuratResmi(nomor="BPS-0001", perihal="Laporan temuan", kepada_nama="Bapak Bench",
+                       content_html=body, engineer_id=engineer.id, created_by=user.id)
+    db.session.add_all([onsite, surat])
+    db.session.commit()
+    return report.id, onsite.id, surat.id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render time and PDF size per output profile")
+    ap.add_argument("--photos", type=int, default=24, help="photos per document")
+    ap.add_argument("--photo-size", default="4032x3024", help="pixel size of the test photos")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    size = tuple(int(x) for x in args.photo_size.lower().split("x"))
+
+    workdir = tempfile.mkdtemp(prefix="flotech-bench-profiles-")
+    os.chdir(workdir)  # UPLOAD_FOLDER is relative to the cwd
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-length-32b")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app import app
+    from extensions import db
+    import migrations
+    from image_cache import image_cache, OUTPUT_PROFILES
+    from routes.report import build_report_pdf
+    from routes.onsite_report import build_onsite_pdf
+    from routes.surat_resmi import build_pdf as build_surat_resmi_pdf
+
+    with app.app_context():
+        migrations.upgrade(echo=lambda *a: None)
+        photos = _write_photos(app.config["UPLOAD_FOLDER"], args.photos, size)
+        report_id, onsite_id, surat_id = _documents(db, photos)
+        docs = [("report", lambda o: build_report_pdf(report_id, o)),
+                ("onsite", lambda o: build_onsite_pdf(onsite_id, o)),
+                ("surat_resmi", lambda o: build_surat_resmi_pdf(surat_id, o))]
+
+        print(f"{args.photos} photos of {size[0]}x{size[1]} per document\n")
+        print(f"{'document':<12} {'profile':<8} {'dpi':>4} {'q':>3} {'cold ms':>9} {'warm ms':>9} {'KB':>9}")
+        for name, build in docs:
+            for output in OUTPUT_PROFILES.values():
+                def cold():
+                    image_cache.clear()
+                    return build(output)
+
+                cold_ms, _ = timed(cold, args.repeat)
+                warm_ms, pdf = timed(lambda: build(output), args.repeat)
+                print(f"{name:<12} {output.name:<8} {output.dpi:>4} {output.jpeg_quality:>3} "
+                      f"{cold_ms:>9.1f} {warm_ms:>9.1f} {len(pdf.getvalue()) / 1024:>9.0f}")
+        print("\nimage cache:", image_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
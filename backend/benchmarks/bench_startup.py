@@ -0,0 +1,92 @@
+"""
+Startup-time benchmark: import time and time-to-first-request.
+
+Each run is a fresh interpreter, so nothing is cached between runs.
+Measures:
+  import      `import app` (config, extensions, models, all blueprints)
+  first GET   first request to "/" through the test client
+  first API   first request to /api/auth/me (JWT + DB lookup, 401 without token)
+and lists which heavy libraries are already loaded after startup — with
+lazy imports ReportLab / PIL / openpyxl should only appear on first PDF
+or Excel export.
+
+Usage: cd backend && python -m benchmarks.bench_startup [--runs 5] [--importtime]
+Without DATABASE_URL / DB_* set, an in-memory SQLite database is used.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+client = app_module.app.test_client()
+client.get("/")
+t2 = time.perf_counter()
+client.get("/api/auth/me")
+t3 = time.perf_counter()
+heavy = [m for m in ("reportlab.lib.utils", "reportlab.platypus", "PIL.Image", "openpyxl", "pypdf")
+         if m in sys.modules]
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_get_ms": (t2 - t1) * 1000,
+                  "first_api_ms": (t3 - t2) * 1000, "heavy_loaded": heavy}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL") and not env.get("DB_HOST"):
+        env["DATABASE_URL"] = "sqlite://"
+    env.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-length-32b")
+    return env
+
+
+def run_once(extra_args=()):
+    out = subprocess.run([sys.executable, *extra_args, "-c", CHILD], cwd=BACKEND, env=child_env(),
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1]), out.stderr
+
+
+def top_imports(stderr, n=15):
+    """Parse `-X importtime` output: the n slowest imports at most one level below the top."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|", 2)
+        if len(name) - len(name.lstrip()) > 3:
+            continue  # deeper imports are already counted in their parent's cumulative time
+        rows.append((int(cum_us), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--importtime", action="store_true", help="show the slowest top-level imports")
+    args = ap.parse_args()
+
+    results = [run_once()[0] for _ in range(args.runs)]
+    for key, label in (("import_ms", "import app"), ("first_get_ms", "first GET /"),
+                       ("first_api_ms", "first API call")):
+        vals = [r[key] for r in results]
+        print(f"{label:<16} median {statistics.median(vals):8.1f} ms   min {min(vals):8.1f} ms")
+    total = [r["import_ms"] + r["first_get_ms"] for r in results]
+    print(f"{'ready to serve':<16} median {statistics.median(total):8.1f} ms")
+    print("heavy libs loaded at startup:", ", ".join(results[-1]["heavy_loaded"]) or "none")
+
+    if args.importtime:
+        _, stderr = run_once(("-X", "importtime"))
+        print("\nslowest top-level imports (cumulative):")
+        for us, name in top_imports(stderr):
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+HTTP load test — compare the dev server with the production entry point.
+
+Start the servers on different ports, e.g.
+    python app.py                                              # :5000 dev server
+    GUNICORN_BIND=127.0.0.1:8000 gunicorn -c gunicorn.conf.py wsgi:app
+then
+    cd backend && python -m benchmarks.load_test \
+        --url http://127.0.0.1:5000 --url http://127.0.0.1:8000 \
+        --username admin --password secret \
+        --path /api/report/list --path /api/report/pdf/preview/1 \
+        --concurrency 16 --duration 30
+
+Only the standard library is used, so it runs from any machine that can
+reach the servers.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def login(base_url, username, password):
+    req = urllib.request.Request(
+        base_url.rstrip("/") + "/api/auth/login",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.load(resp)["access_token"]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    k = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[k]
+
+
+def run_target(base_url, token, paths, concurrency, duration, timeout):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    deadline = time.monotonic() + duration
+    latencies, errors, nbytes = [], [0], [0]
+    lock = threading.Lock()
+
+    def worker(i):
+        n = i
+        while time.monotonic() < deadline:
+            url = base_url.rstrip("/") + paths[n % len(paths)]
+            n += 1
+            t0 = time.perf_counter()
+            try:
+                req = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    body = resp.read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                body, ok = b"", False
+            ms = (time.perf_counter() - t0) * 1000
+            with lock:
+                if ok:
+                    latencies.append(ms)
+                    nbytes[0] += len(body)
+                else:
+                    errors[0] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    return {
+        "url": base_url,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else 0.0,
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mb_per_s": round(nbytes[0] / elapsed / 1e6, 2) if elapsed else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", action="append", required=True, help="server base URL (repeatable)")
+    ap.add_argument("--path", action="append", help="path to request, round-robin (repeatable)")
+    ap.add_argument("--token", help="JWT; otherwise --username/--password log in per target")
+    ap.add_argument("--username")
+    ap.add_argument("--password")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    paths = args.path or ["/api/report/list"]
+    results = []
+    for url in args.url:
+        token = args.token or (login(url, args.username, args.password) if args.username else None)
+        print(f"→ {url}  ({args.concurrency} clients, {args.duration:.0f}s)")
+        results.append(run_target(url, token, paths, args.concurrency, args.duration, args.timeout))
+
+    print(f"\n{'url':<28} {'req':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'MB/s':>6}")
+    for r in results:
+        print(f"{r['url']:<28} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['mb_per_s']:>6}")
+    if len(results) > 1 and results[0]["rps"]:
+        for r in results[1:]:
+            print(f"{r['url']}: {r['rps'] / results[0]['rps']:.2f}x throughput vs {results[0]['url']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"paths": paths, "concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Synthetic data generator for the benchmarks.
+
+Fills a database with deterministic (seeded) but realistic-looking rows:
+users, engineers with signatures, reports with photo files, onsite reports,
+quotations with line items and revisions, stock units, surat serah terima,
+surat resmi, customers, catalog files, leave requests and notifications.
+
+Volumes come from a preset (--scale) and can be overridden per table.
+Photos are JPEGs of phone-camera size written under UPLOAD_FOLDER/bench/, so
+PDF timings include real image decoding. Catalog files are stored through the
+upload store (blobs/), as the upload route would.
+
+Usage: cd backend && python -m benchmarks.seed --scale small [--reports 500] [--reset]
+Uses DATABASE_URL / DB_* like the app; run `python migrate.py` first on a new database.
+"""
+import argparse
+import base64
+import os
+import random
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+SCALES = {
+    "small":  dict(users=10,  engineers=5,  reports=50,   images_per_report=2, onsite=30,
+                   quotations=50,   items_per_quotation=8,  stock=100,  surat=20,  surat_resmi=20,
+                   customers=50,   leave_requests=60,   notifications=300,  catalog=30),
+    "medium": dict(users=40,  engineers=20, reports=500,  images_per_report=4, onsite=300,
+                   quotations=500,  items_per_quotation=15, stock=1000, surat=200, surat_resmi=200,
+                   customers=500,  leave_requests=800,  notifications=5000, catalog=300),
+    "large":  dict(users=150, engineers=60, reports=3000, images_per_report=6, onsite=2000,
+                   quotations=3000, items_per_quotation=25, stock=5000, surat=1000, surat_resmi=1000,
+                   customers=2000, leave_requests=5000, notifications=40000, catalog=1500),
+}
+
+REPORT_FIELDS = {
+    "commissioning":   ["test_procedures", "performance_parameters", "test_results",
+                        "issues_found", "recommendations", "commissioning_result"],
+    "investigation":   ["incident_description", "symptoms_observed", "root_cause",
+                        "contributing_factors", "immediate_actions", "conclusion"],
+    "troubleshooting": ["problem_description", "symptoms", "diagnostic_steps", "fault_found",
+                        "solution_applied", "result_after_fix"],
+    "service":         ["work_description", "activities_performed", "parts_used",
+                        "calibration_data", "condition_after", "recommendations"],
+}
+
+WORDS = ("flow meter transmitter kalibrasi valve sensor pressure level pompa instalasi "
+         "pengecekan wiring panel grounding loop signal 4-20mA display alarm trip "
+         "maintenance pipa flange gasket koneksi parameter zero span verifikasi").split()
+COMPANIES = ["PT Pertamina", "PT Chandra Asri", "PT Krakatau Steel", "PT Semen Indonesia",
+             "PT Pupuk Kaltim", "PT PLN", "PT Indocement", "PT Petrokimia Gresik"]
+BRANDS = ["Endress+Hauser", "Yokogawa", "Emerson", "Siemens", "ABB", "KROHNE", "Vega"]
+
+PHOTO_SIZE = (1600, 1200)
+PHOTO_VARIANTS = 6
+# Distinct catalog file contents (KB); catalog rows share them like re-uploaded datasheets
+CATALOG_SIZES_KB = (180, 450, 1200, 3500)
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _photo_bytes(variant):
+    """A noisy JPEG so the encoder cannot shrink it to nothing (close to a phone photo)."""
+    from PIL import Image as PILImage
+    rng = random.Random(variant)
+    w, h = PHOTO_SIZE
+    img = PILImage.effect_noise((w // 4, h // 4), 60).convert("RGB").resize((w, h))
+    tint = PILImage.new("RGB", (w, h), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    img = PILImage.blend(img, tint, 0.5)
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _signature_b64():
+    from PIL import Image as PILImage, ImageDraw
+    img = PILImage.new("RGBA", (400, 150), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(img)
+    draw.line([(20, 110), (90, 40), (160, 120), (230, 30), (300, 100), (380, 60)],
+              fill=(20, 20, 80, 255), width=5)
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def _write_photos(upload_folder, count, variants):
+    """Write `count` photo files under bench/ (cycling through the variants); returns relative paths."""
+    folder = os.path.join(upload_folder, "bench")
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        rel = f"bench/photo_{i:06d}.jpg"
+        path = os.path.join(upload_folder, rel)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(variants[i % len(variants)])
+        paths.append(rel)
+    return paths
+
+
+def _catalog_bytes(size_kb, variant):
+    """A datasheet-sized PDF-looking file; random bytes so it does not compress."""
+    rng = random.Random(1000 + variant)
+    return b"%PDF-1.4\n" + rng.randbytes(size_kb * 1024)
+
+
+def reset(db):
+    """Delete all rows (children first) — keeps the schema and schema_version."""
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+
+def seed(db, counts, upload_folder, rng_seed=42, echo=print):
+    from models import (User, Engineer, Report, ReportImage, LeaveRequest, LeaveEntitlement,
+                        Notification)
+    from routes.onsite_report import OnsiteReport
+    from routes.quotation import Quotation, QuotationRevision, calc_item
+    from routes.stock import StockUnit
+    from routes.surat_serah_terima import SuratSerahTerima
+    from routes.surat_resmi import SuratResmi
+    from routes.customer import Customer
+    from routes.catalog import CatalogFile
+    from upload_store import save_bytes, acquire
+
+    rng = random.Random(rng_seed)
+    today = date.today()
+    now = datetime.utcnow()
+
+    def past(days):
+        return now - timedelta(days=rng.randrange(days), minutes=rng.randrange(1440))
+
+    # ── users & engineers ──────────────────────────────────────────────────
+    users = [User(name="Bench Admin", username="bench_admin", email="bench_admin@example.com",
+                  role="admin", password_hash="x")]
+    for i in range(1, counts["users"]):
+        users.append(User(name=f"User {i}", username=f"bench_user{i}",
+                          email=f"bench_user{i}@example.com",
+                          role=rng.choice(["engineer", "engineer", "sales", "manager"]),
+                          password_hash="x"))
+    db.session.add_all(users)
+    db.session.flush()
+
+    signature = _signature_b64()
+    engineers = []
+    for i in range(counts["engineers"]):
+        engineers.append(Engineer(
+            user_id=users[i % len(users)].id, name=f"Engineer {i}", employee_id=f"BENCH-{i:04d}",
+            position="Field Engineer", department="Service", email=f"eng{i}@example.com",
+            phone="0812000000", years_experience=rng.randrange(1, 20), signature_data=signature))
+    db.session.add_all(engineers)
+    db.session.flush()
+    echo(f"  users {len(users)}, engineers {len(engineers)}")
+
+    # ── reports + photos ───────────────────────────────────────────────────
+    variants = [_photo_bytes(v) for v in range(PHOTO_VARIANTS)]
+    photos = _write_photos(upload_folder, counts["reports"] * counts["images_per_report"], variants)
+    reports = []
+    for i in range(counts["reports"]):
+        rtype = rng.choice(list(REPORT_FIELDS))
+        reports.append(Report(
+            report_number=f"BR-{i:06d}", report_type=rtype,
+            client_name=rng.choice(COMPANIES), project_name=f"Project {rng.randrange(200)}",
+            engineer_id=rng.choice(engineers).id, report_date=today - timedelta(days=rng.randrange(720)),
+            status=rng.choice(["draft", "submitted", "approved"]),
+            data_json={f: _text(rng, rng.randrange(15, 80)) for f in REPORT_FIELDS[rtype]},
+            created_by=rng.choice(users).id, created_at=past(720)))
+    db.session.add_all(reports)
+    db.session.flush()
+    n = counts["images_per_report"]
+    db.session.add_all(
+        ReportImage(report_id=r.id, file_path=photos[i * n + k], caption=_text(rng, 5))
+        for i, r in enumerate(reports) for k in range(n))
+    echo(f"  reports {len(reports)}, photos {len(photos)}")
+
+    # ── onsite reports ─────────────────────────────────────────────────────
+    for i in range(counts["onsite"]):
+        visit = today - timedelta(days=rng.randrange(720))
+        db.session.add(OnsiteReport(
+            report_number=f"BOS-{i:06d}", visit_date=visit, visit_date_from=visit,
+            visit_date_to=visit + timedelta(days=rng.randrange(3)),
+            client_name=f"PIC {i}", client_company=rng.choice(COMPANIES),
+            site_location=f"Plant {rng.randrange(30)}", engineer_id=rng.choice(engineers).id,
+            job_description=_text(rng, 40), work_performed=_text(rng, 60), findings=_text(rng, 40),
+            recommendations=_text(rng, 30),
+            equipment_items=[{"description": rng.choice(WORDS).title(), "model": f"M{rng.randrange(900)}",
+                              "serial_number": f"SN{rng.randrange(10**6):06d}"}
+                             for _ in range(rng.randrange(1, 5))],
+            customer_signature=signature, status=rng.choice(["draft", "submitted"]),
+            created_by=rng.choice(users).id, created_at=past(720)))
+    echo(f"  onsite {counts['onsite']}")
+
+    # ── quotations (+ a few revisions each) ────────────────────────────────
+    quotations = []
+    for i in range(counts["quotations"]):
+        items = [{"description": _text(rng, 12), "brand": rng.choice(BRANDS), "model": f"X{rng.randrange(999)}",
+                  "qty": rng.randrange(1, 10), "unit": "Unit",
+                  "unit_price": rng.randrange(1, 500) * 100000, "discount": rng.choice([0, 0, 5, 10])}
+                 for _ in range(counts["items_per_quotation"])]
+        number = f"BQ-{i:06d}"
+        vat_pct = 11.0
+        quotations.append(Quotation(
+            quotation_number=number, base_number=number, revision=rng.randrange(3),
+            customer_name=f"Customer {i}", customer_company=rng.choice(COMPANIES),
+            project_name=f"Project {rng.randrange(200)}", category=rng.choice(["instrument", "service"]),
+            status=rng.choice(["draft", "sent", "won", "lost"]), currency="IDR",
+            total_amount=sum(calc_item(it)[2] for it in items) * (1 + vat_pct / 100), items=items,
+            sales_person=rng.choice(users).name, vat_pct=vat_pct, vat_include=False,
+            valid_until=today + timedelta(days=30),
+            created_by=rng.choice(users).id, created_at=past(720)))
+    db.session.add_all(quotations)
+    db.session.flush()
+    for q in quotations:
+        for rev in range(q.revision):
+            db.session.add(QuotationRevision(quotation_id=q.id, revision=rev, bumped=True,
+                                             changes={"notes": _text(rng, 8)}, created_by=q.created_by))
+    echo(f"  quotations {len(quotations)}")
+
+    # ── stock, surat, customers, catalog ───────────────────────────────────
+    for i in range(counts["stock"]):
+        category = rng.choice(["stock", "demo"])
+        status = rng.choice(["available", "available", "on_loan", "maintenance"])
+        db.session.add(StockUnit(
+            name=f"{rng.choice(WORDS).title()} {i}", brand=rng.choice(BRANDS), model=f"S{rng.randrange(999)}",
+            serial_number=f"SN{i:07d}", category=category, status=status,
+            condition=rng.choice(["good", "fair"]), location=f"Gudang {rng.randrange(5)}",
+            loan_to=rng.choice(COMPANIES) if status == "on_loan" else None,
+            description=_text(rng, 15)))
+    for i in range(counts["surat"]):
+        db.session.add(SuratSerahTerima(
+            surat_number=f"BST-{i:06d}", surat_type=rng.choice(["serah", "terima"]),
+            surat_date=today - timedelta(days=rng.randrange(720)), perihal=_text(rng, 6),
+            pihak_pertama_nama="PT Flotech Controls Indonesia", pihak_pertama_signature=signature,
+            pihak_kedua_nama=rng.choice(COMPANIES), pihak_kedua_signature=signature,
+            barang_items=[{"no": k + 1, "nama_barang": rng.choice(WORDS).title(), "jumlah": rng.randrange(1, 9),
+                           "satuan": "Unit", "keterangan": _text(rng, 4)} for k in range(rng.randrange(1, 12))],
+            catatan=_text(rng, 20), created_by=rng.choice(users).id, created_at=past(720)))
+    for i in range(counts["surat_resmi"]):
+        body = "".join(f"<p>{_text(rng, 40)}</p>" for _ in range(rng.randrange(3, 12)))
+        db.session.add(SuratResmi(
+            nomor=f"BSR-{i:06d}", perihal=_text(rng, 6), surat_date=today - timedelta(days=rng.randrange(720)),
+            kepada_nama=f"Bapak {i}", kepada_perusahaan=rng.choice(COMPANIES), content_html=body,
+            engineer_id=rng.choice(engineers).id, created_by=rng.choice(users).id, created_at=past(720)))
+    for i in range(counts["customers"]):
+        db.session.add(Customer(company_name=f"{rng.choice(COMPANIES)} Unit {i}", address=_text(rng, 8),
+                                industry=rng.choice(["oil & gas", "power", "chemical", "water"]),
+                                created_by=users[0].id))
+    blobs = [(save_bytes(_catalog_bytes(kb, v), "pdf"), kb) for v, kb in enumerate(CATALOG_SIZES_KB)]
+    for i in range(counts["catalog"]):
+        path, kb = blobs[i % len(blobs)]
+        brand = rng.choice(BRANDS)
+        db.session.add(CatalogFile(
+            title=f"{brand} {rng.choice(WORDS).title()} datasheet {i}", brand=brand,
+            model_series=f"S{rng.randrange(999)}", document_type=rng.choice(["catalog", "datasheet", "manual"]),
+            description=_text(rng, 10), tags=" ".join(rng.sample(WORDS, 3)),
+            filename=f"bench_catalog_{i:05d}.pdf", file_path=path, file_size=kb * 1024 + 9,
+            created_at=past(720)))
+        acquire(path)
+    echo(f"  stock {counts['stock']}, surat {counts['surat']}, surat resmi {counts['surat_resmi']}, "
+         f"customers {counts['customers']}, catalog {counts['catalog']}")
+
+    # ── leave & notifications ──────────────────────────────────────────────
+    for u in users:
+        db.session.add(LeaveEntitlement(user_id=u.id, year=today.year, entitlement_days=12))
+    for i in range(counts["leave_requests"]):
+        start = today - timedelta(days=rng.randrange(360))
+        days = rng.randrange(1, 4)
+        db.session.add(LeaveRequest(
+            request_number=f"BLV-{i:06d}", user_id=rng.choice(users).id,
+            leave_type=rng.choice(["annual", "annual", "sick", "emergency"]), reason=_text(rng, 6),
+            start_date=start, end_date=start + timedelta(days=days - 1), total_days=days,
+            status=rng.choice(["pending", "approved", "approved", "rejected"])))
+    for i in range(counts["notifications"]):
+        db.session.add(Notification(
+            user_id=rng.choice(users).id, actor_id=rng.choice(users).id,
+            type=rng.choice(["quotation_created", "report_created", "leave_approved"]),
+            title=_text(rng, 4), message=_text(rng, 12), link="/reports",
+            is_read=rng.random() < 0.6, created_at=past(120)))
+    db.session.commit()
+    echo(f"  leave requests {counts['leave_requests']}, notifications {counts['notifications']}")
+    return users[0]
+
+
+def counts_from_args(args):
+    counts = dict(SCALES[args.scale])
+    for key in counts:
+        value = getattr(args, key, None)
+        if value is not None:
+            counts[key] = value
+    return counts
+
+
+def add_count_args(parser):
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    for key in SCALES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f"override {key}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic benchmark data")
+    add_count_args(parser)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete all existing rows first")
+    args = parser.parse_args()
+
+    from app import app
+    from extensions import db
+    counts = counts_from_args(args)
+    with app.app_context():
+        if args.reset:
+            reset(db)
+        print(f"Seeding ({args.scale}):")
+        seed(db, counts, app.config["UPLOAD_FOLDER"], rng_seed=args.seed)
+    print("✅ Seed selesai")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+backend/cache.py
+Read-through cache for reference data: engineers, users, customers.
+
+Almost every request reads these, and they rarely change. Report, onsite and
+surat serializers look up the engineer of each row; leave and notification
+lists show requester / approver / actor names. The same rows were fetched
+again on every request (once per row in the list endpoints).
+
+    lookup(Engineer, 3)         column snapshot of engineers.id=3 (or None)
+    cached(list_key(Customer), build)
+    invalidate(Engineer, 3)     drop engineers:3 and engineers:list
+
+A snapshot is a read-only SimpleNamespace with the row's columns (except
+SECRET_COLUMNS) and no relationships. It is for display only: permission
+checks (the current user's role) read the row through the session, since
+with the memory backend another worker's demotion is only seen after
+CACHE_TTL. Code that modifies a row, or follows user.engineer_profile, also
+loads it through the session. The routes that write engineers,
+customers and users (engineer.py, customer.py, auth.py) call invalidate()
+after their commit.
+
+Backends (CACHE_BACKEND):
+  memory   per-process TTL + LRU dict (default). Another gunicorn worker's
+           write is seen after at most CACHE_TTL seconds.
+  redis    shared by all workers, so invalidation is immediate everywhere
+           (CACHE_REDIS_URL; also works with Redis-compatible servers such as
+           Valkey or KeyDB). Needs the optional `redis` package. On a
+           connection error the lookup goes to the database.
+  none     caching off
+
+A value loaded while a write was being invalidated is not kept: like the
+dashboard SummaryCache, delete() bumps a generation counter and a load that
+started before the bump does not store its (possibly pre-commit) result. The
+counter is per process, so with redis a fill racing another worker's write
+can still be stored; it then lives at most CACHE_TTL seconds.
+
+Hits, misses and errors are exported on /metrics (cache="reference").
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from extensions import db
+
+try:
+    import redis
+except ImportError:  # optional
+    redis = None
+
+
+_MISSING = object()
+
+# Never copied into a snapshot (and so never into Redis)
+SECRET_COLUMNS = {"password_hash"}
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._items = OrderedDict()   # key -> (expires, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return _MISSING
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return _MISSING
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._items)
+
+
+class RedisBackend:
+    """Values are pickled; the server is expected to be private to the app."""
+
+    def __init__(self, url, prefix="flotech:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, max(1, int(ttl)), pickle.dumps(value))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def size(self):
+        return None  # not counted: SCAN over a shared server is too costly for /metrics
+
+
+class Cache:
+    def __init__(self, backend=None, ttl=60):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "memory").lower()
+        self.ttl = float(app.config.get("CACHE_TTL", self.ttl))
+        if kind == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"],
+                                        app.config.get("CACHE_KEY_PREFIX", "flotech:"))
+        elif kind == "none" or self.ttl <= 0:
+            self.backend = None
+        else:
+            self.backend = MemoryBackend(int(app.config.get("CACHE_MAX_ENTRIES", 1024)))
+        app.extensions["cache"] = self
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _bump(self):
+        with self._lock:
+            self._generation += 1
+
+    def _current(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def get_or_load(self, key, load, ttl=None):
+        """Cached value for `key`, else load() (stored unless it returned None)."""
+        if self.backend is None:
+            return load()
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            self._count("errors")  # cache server down: answer from the database
+            return load()
+        if value is not _MISSING:
+            self._count("hits")
+            return value
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        # not kept if a delete() ran while this was loading: it may predate that write
+        if value is not None and self._current(generation):
+            try:
+                self.backend.set(key, value, ttl or self.ttl)
+                if not self._current(generation):
+                    self.backend.delete(key)  # delete() landed between the check and the set
+            except Exception:
+                self._count("errors")
+        return value
+
+    def delete(self, *keys):
+        if self.backend is None:
+            return
+        self._bump()  # before the delete, so a fill that stores after it sees the change
+        try:
+            self.backend.delete(*keys)
+        except Exception:
+            self._count("errors")
+
+    def clear(self):
+        if self.backend is not None:
+            self._bump()
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "entries": self.backend.size() if self.backend else 0,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": getattr(self.backend, "evictions", None),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+cache = Cache()
+
+
+def row_key(model, pk):
+    return f"{model.__tablename__}:{pk}"
+
+
+def list_key(model):
+    return f"{model.__tablename__}:list"
+
+
+def _snapshot(obj):
+    if obj is None:
+        return None
+    return SimpleNamespace(**{attr.key: getattr(obj, attr.key)
+                              for attr in db.inspect(obj).mapper.column_attrs
+                              if attr.key not in SECRET_COLUMNS})
+
+
+def lookup(model, pk):
+    """Read-only column snapshot of one row (see module docstring), or None."""
+    if pk is None:
+        return None
+    return cache.get_or_load(row_key(model, pk), lambda: _snapshot(db.session.get(model, pk)))
+
+
+def cached(key, build):
+    """Cached result of build() (plain data, e.g. a serialized list) under `key`."""
+    return cache.get_or_load(key, build)
+
+
+def invalidate(model, *pks):
+    """Call after committing a write to `model`: drops the rows `pks` and its list."""
+    cache.delete(list_key(model), *(row_key(model, pk) for pk in pks))
@@ -4,9 +4,106 @@ from datetime import timedelta
 
 load_dotenv()
 
+
+def _flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def _engine_options(uri):
+    """Engine/pool options from DB_* env vars, sized per process (workers × threads)."""
+    if uri.startswith("sqlite") and (":memory:" in uri or uri.rstrip("/") == "sqlite:"):
+        return {}  # in-memory SQLite uses a single shared connection, not a queue pool
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_pre_ping": _flag("DB_POOL_PRE_PING", "1"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if statement_timeout and uri.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+    # DATABASE_URL (opsional) menimpa DB_* — dipakai benchmark dengan SQLite
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool per proses: pool_size + max_overflow dikali jumlah worker gunicorn
+    # harus tetap di bawah max_connections PostgreSQL
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     # Token berlaku 1 jam
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+
+    # Logo kop surat PDF: file dicek ulang (diganti / dihapus) paling sering tiap N detik
+    ASSET_CHECK_INTERVAL = float(os.getenv("ASSET_CHECK_INTERVAL", 5))
+
+    # Cache gambar tanda tangan / inline yang sudah di-decode (PDF)
+    IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", 256))
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+    # Hitung query SQL per request (Server-Timing header, log request lambat, /metrics)
+    SQL_METRICS = _flag("SQL_METRICS", "0")
+    SQL_SLOW_REQUEST_MS = float(os.getenv("SQL_SLOW_REQUEST_MS", 500))
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 100))
+    SQL_MAX_QUERIES = int(os.getenv("SQL_MAX_QUERIES", 50))
+
+    # Dump cProfile per render PDF (header X-Profile-Pdf: 1, hanya request internal)
+    PDF_PROFILE_DIR = os.getenv("PDF_PROFILE_DIR", "profiles")
+
+    # Foto laporan disiapkan paralel sebelum layout PDF: jumlah thread
+    PDF_IMAGE_WORKERS = int(os.getenv("PDF_IMAGE_WORKERS", 4))
+
+    # Profil output PDF (screen / email / print): resolusi & kualitas JPEG foto
+    # yang ditanam. Default untuk download dan untuk preview; bisa diganti per
+    # request dengan ?profile=
+    PDF_OUTPUT_PROFILE = os.getenv("PDF_OUTPUT_PROFILE", "print")
+    PDF_PREVIEW_PROFILE = os.getenv("PDF_PREVIEW_PROFILE", "screen")
+
+    # Foto laporan dinormalisasi saat upload (rotasi EXIF, sRGB, tanpa metadata);
+    # kualitas JPEG hasil simpan ulang
+    PHOTO_JPEG_QUALITY = int(os.getenv("PHOTO_JPEG_QUALITY", 88))
+
+    # PDF hasil render disimpan per versi dokumen (download & preview berbagi file);
+    # dilinearisasi ("fast web view") kalau pikepdf terpasang
+    PDF_CACHE = _flag("PDF_CACHE", "1")
+    PDF_CACHE_FOLDER = os.getenv("PDF_CACHE_FOLDER", "pdf_cache")
+    PDF_LINEARIZE = _flag("PDF_LINEARIZE", "1")
+
+    # Cache data referensi (engineer, user, customer): "memory" per proses,
+    # "redis" dibagi semua worker (CACHE_REDIS_URL, perlu paket redis), atau "none"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL = float(os.getenv("CACHE_TTL", 60))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "flotech:")
+
+    # Ringkasan dashboard (/api/dashboard/summary) disimpan di memori selama N detik;
+    # dibuang otomatis saat ada perubahan data yang diringkas
+    DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", 30))
+
+    # Export PDF gabungan (/api/export/merged): render paralel, batas jumlah dokumen
+    # dan total ukuran PDF yang digabung (byte)
+    PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", 4))
+    PDF_EXPORT_MAX_DOCS = int(os.getenv("PDF_EXPORT_MAX_DOCS", 200))
+    PDF_EXPORT_MAX_SIZE = int(os.getenv("PDF_EXPORT_MAX_SIZE", 500 * 1024 * 1024))
+
+    # Alamat publik backend, dipisah koma (mis. "https://app.flotech.co.id").
+    # Link /uploads/ ke alamat ini (atau ke host request) di HTML surat disimpan relatif
+    PUBLIC_URLS = os.getenv("PUBLIC_URLS", "")
+
+    # Upload bertahap (chunked/resumable): potongan ditulis langsung ke disk
+    UPLOAD_PARTIAL_FOLDER = os.getenv("UPLOAD_PARTIAL_FOLDER", "uploads_partial")
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 4 * 1024 * 1024))
+    UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", 1024 * 1024 * 1024))
+    UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", 24))
+
+    # Download file (katalog, /uploads/) diteruskan ke reverse proxy: "x-accel" (nginx)
+    # atau "x-sendfile" (Apache/lighttpd). Kosong = Flask yang mengirim file
+    FILE_OFFLOAD = os.getenv("FILE_OFFLOAD", "")
+    FILE_OFFLOAD_PREFIX = os.getenv("FILE_OFFLOAD_PREFIX", "/_files")
+
+    # /api/internal/* dan /metrics — dari localhost, atau dengan header X-Metrics-Token
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
@@ -0,0 +1,133 @@
+"""
+backend/db_pool.py
+Connection pool metrics.
+
+The engine is built with InstrumentedQueuePool, a QueuePool that times how
+long each checkout waits for a free connection and counts timeouts, new
+connections and overflow use. Counters live in `pool_stats` (per process),
+not on the pool, so they survive engine.dispose() in gunicorn's post_fork.
+Read them at /api/internal/pool to size DB_POOL_SIZE / DB_MAX_OVERFLOW
+against PostgreSQL max_connections.
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+# A checkout that takes longer than this had to wait for a connection.
+WAIT_THRESHOLD_MS = 1.0
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.waits = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.overflow_max = 0
+
+    def record_checkout(self, wait_ms, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            if wait_ms >= WAIT_THRESHOLD_MS:
+                self.waits += 1
+            if wait_ms > self.wait_ms_max:
+                self.wait_ms_max = wait_ms
+            if overflow > self.overflow_max:
+                self.overflow_max = overflow
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_ms_total, 2),
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 2),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "overflow_max": self.overflow_max,
+            }
+
+
+pool_stats = PoolStats()
+_local = threading.local()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time to pool_stats."""
+
+    def _do_get(self):
+        # QueuePool._do_get recurses into itself; time only the outermost call
+        if getattr(_local, "in_get", False):
+            return super()._do_get()
+        _local.in_get = True
+        t0 = time.perf_counter()
+        try:
+            rec = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_timeout()
+            raise
+        finally:
+            _local.in_get = False
+        pool_stats.record_checkout((time.perf_counter() - t0) * 1000, self.overflow())
+        return rec
+
+
+@event.listens_for(InstrumentedQueuePool, "connect")
+def _on_connect(dbapi_conn, record):
+    pool_stats.record_connect()
+
+
+@event.listens_for(InstrumentedQueuePool, "invalidate")
+def _on_invalidate(dbapi_conn, record, exception):
+    pool_stats.record_invalidation()
+
+
+def init_app(app):
+    """Call before db.init_app(app) so the engine is built with the instrumented pool."""
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if "pool_size" in options:
+        options.setdefault("poolclass", InstrumentedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def pool_status(engine):
+    """Current pool gauges plus the cumulative counters."""
+    pool = engine.pool
+    data = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    data.update(pool_stats.snapshot())
+    return data
@@ -0,0 +1,95 @@
+"""
+backend/file_delivery.py
+Serving files from UPLOAD_FOLDER: catalog downloads and /uploads/<path>.
+
+send_upload() answers Range / If-Range requests with 206 partial content,
+so an interrupted catalog ZIP resumes instead of restarting. It also
+handles If-None-Match / If-Modified-Since (304) and sets cache headers:
+
+  immutable=True   content-addressed files (upload_store names them by
+                   SHA-256, catalog files never change under their id):
+                   cached for a year without revalidation
+  otherwise        no-cache: the browser keeps a copy and revalidates
+
+FILE_OFFLOAD hands the byte streaming to the reverse proxy, so a gunicorn
+worker is not tied up for the length of a download:
+
+  FILE_OFFLOAD=x-accel      nginx; X-Accel-Redirect: <FILE_OFFLOAD_PREFIX>/<path>
+                            needs   location /_files/ { internal; alias /srv/flotech/backend/uploads/; }
+  FILE_OFFLOAD=x-sendfile   Apache mod_xsendfile / lighttpd; X-Sendfile: <absolute path>
+
+The proxy then does range, conditional and sendfile(2) itself. Without it
+(the default, and always under the Flask dev server) Werkzeug streams the
+file in blocks.
+"""
+import mimetypes
+import os
+import re
+
+from flask import current_app, send_file
+
+from upload_store import upload_root
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# blobs/ab/cd/<sha256>.<ext> as written by upload_store (older: <subdir>/<sha256>.<ext>)
+_CONTENT_ADDRESSED_RE = re.compile(r"(^|/)[0-9a-f]{64}\.\w+$")
+
+
+def is_content_addressed(rel_path):
+    return bool(_CONTENT_ADDRESSED_RE.search(rel_path.replace(os.sep, "/")))
+
+
+def _relative_to_uploads(path):
+    root = upload_root()
+    path = os.path.abspath(path)
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def _offload(path, download_name, as_attachment, mimetype):
+    mode = current_app.config.get("FILE_OFFLOAD", "").lower()
+    if mode not in ("x-accel", "x-sendfile"):
+        return None
+    response = current_app.response_class(mimetype=mimetype)
+    if mode == "x-accel":
+        rel_path = _relative_to_uploads(path)
+        if rel_path is None:
+            return None
+        prefix = current_app.config.get("FILE_OFFLOAD_PREFIX", "/_files").rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{rel_path}"
+    else:
+        response.headers["X-Sendfile"] = os.path.abspath(path)
+    if download_name:
+        disposition = "attachment" if as_attachment else "inline"
+        response.headers.set("Content-Disposition", disposition, filename=download_name)
+    # the proxy fills in Content-Length from the file
+    response.headers.pop("Content-Length", None)
+    return response
+
+
+def send_upload(path, download_name=None, as_attachment=False, immutable=False, private=False):
+    """
+    Response for a file on disk: offloaded to the proxy when FILE_OFFLOAD is
+    set, otherwise streamed with range and conditional support. private=True
+    for files behind a login (kept out of shared caches).
+    """
+    path = os.path.abspath(path)  # Flask resolves relative paths against the app root, not the cwd
+    mimetype = mimetypes.guess_type(download_name or path)[0] or "application/octet-stream"
+    response = _offload(path, download_name, as_attachment, mimetype)
+    if response is None:
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, conditional=True, etag=True)
+    response.headers["Accept-Ranges"] = "bytes"
+    cc = response.cache_control
+    cc.public, cc.private = (None, True) if private else (True, None)
+    if immutable:
+        cc.no_cache = None
+        cc.max_age = IMMUTABLE_MAX_AGE
+        cc.immutable = True
+    else:
+        cc.no_cache = True
+        cc.max_age = None
+    return response
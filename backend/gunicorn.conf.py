@@ -0,0 +1,80 @@
+"""
+backend/gunicorn.conf.py
+Gunicorn settings, all overridable from the environment (.env is loaded too).
+
+Usage: cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+PDF rendering is CPU-bound and holds the GIL, so throughput comes from
+worker processes; threads only help requests that wait on PostgreSQL or
+disk. Workers are recycled after GUNICORN_MAX_REQUESTS requests (with
+jitter so they do not all restart together) to bound memory growth from
+ReportLab/PIL.
+
+Each worker has its own DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW, see
+config.py), so workers × that total must stay below PostgreSQL
+max_connections; /api/internal/pool shows waits and overflow per worker.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _int(name, default):
+    return int(os.getenv(name, default))
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = _int("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 9))
+threads = _int("GUNICORN_THREADS", 4)
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import the app (and ReportLab/PIL/openpyxl) once in the master so workers
+# fork with those pages already loaded and shared copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+max_requests = _int("GUNICORN_MAX_REQUESTS", 500)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 50)
+
+# Large merged PDFs can take a while; the proxy timeout should be at least this.
+timeout = _int("GUNICORN_TIMEOUT", 120)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+PRELOAD_MODULES = [
+    "reportlab.platypus",
+    "reportlab.pdfgen.canvas",
+    "reportlab.lib.styles",
+    "PIL.Image",
+    "PIL.PngImagePlugin",
+    "PIL.JpegImagePlugin",
+    "openpyxl",
+]
+
+
+def on_starting(server):
+    if not preload_app:
+        return
+    import importlib
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            server.log.warning("preload skipped %s: %s", name, e)
+
+
+def post_fork(server, worker):
+    # Never share pooled connections across a fork — if anything in the
+    # master touched the database, each worker starts with a fresh pool.
+    if preload_app:
+        from app import app
+        from extensions import db
+        with app.app_context():
+            db.engine.dispose(close=False)
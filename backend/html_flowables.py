@@ -0,0 +1,372 @@
+"""
+backend/html_flowables.py
+Rich-text HTML (contenteditable) → ReportLab flowables, shared by the onsite
+report and surat resmi builders.
+
+Conversion runs in two steps:
+  1. parse_html()   — HTML → tuple of block tokens (pure data, cached by
+                      content hash, so a re-rendered document is not re-parsed)
+  2. to_flowables() — tokens → Paragraph / Image / Spacer using a HtmlProfile
+                      that carries each builder's own styles and spacing
+
+Block tokens:
+  ("p",   markup, align)    paragraph, markup in ReportLab mini-HTML
+  ("li",  markup, align)    list item, bullet / number already prefixed
+  ("img", src, width_pt)    image, width from inline style/attr or None
+  ("gap",)                  empty line (<p><br></p>)
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html import escape
+from html.parser import HTMLParser
+
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
+
+from image_cache import image_flowable, file_image_flowable, file_photo_flowable
+
+
+_ALIGN_RE     = re.compile(r'text-align\s*:\s*(left|center|right|justify)', re.IGNORECASE)
+_COLOR_RE     = re.compile(r'(?:^|;)\s*color\s*:\s*([^;]+)', re.IGNORECASE)
+_SIZE_RE      = re.compile(r'font-size\s*:\s*([\d.]+)\s*(px|pt)?', re.IGNORECASE)
+_WEIGHT_RE    = re.compile(r'font-weight\s*:\s*(bold|[6-9]00)', re.IGNORECASE)
+_ITALIC_RE    = re.compile(r'font-style\s*:\s*italic', re.IGNORECASE)
+_UNDERLINE_RE = re.compile(r'text-decoration[\w-]*\s*:\s*[^;]*underline', re.IGNORECASE)
+_WIDTH_RE     = re.compile(r'(?:^|;)\s*width\s*:\s*(\d+(?:\.\d+)?)\s*(px|cm|mm|pt)?', re.IGNORECASE)
+_RGB_RE       = re.compile(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)', re.IGNORECASE)
+_SAFE_COLOR_RE = re.compile(r'^(#[0-9a-f]{3,8}|[a-z]+)$', re.IGNORECASE)
+_TAG_RE       = re.compile(r'<[^>]+>')
+_HAS_TAG_RE   = re.compile(r'<[a-z!/]', re.IGNORECASE)
+
+_ALIGNS = {"left": TA_LEFT, "center": TA_CENTER, "right": TA_RIGHT, "justify": TA_JUSTIFY}
+# Points per unit. Written out rather than imported: reportlab.lib.units pulls in
+# reportlab.lib.utils and PIL, and this module is imported at startup.
+_CM = 72 / 2.54
+_UNITS_PT = {"px": 0.75, "pt": 1.0, "cm": _CM, "mm": _CM / 10}
+
+_BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+_SIMPLE_INLINE = {"b": "b", "strong": "b", "i": "i", "em": "i", "u": "u"}
+_SKIP_TAGS = {"style", "script", "head", "title"}
+
+
+def _color(value):
+    value = value.strip()
+    m = _RGB_RE.match(value)
+    if m:
+        return "#%02x%02x%02x" % tuple(min(int(v), 255) for v in m.groups())
+    return value if _SAFE_COLOR_RE.match(value) else None
+
+
+def _align(style):
+    m = _ALIGN_RE.search(style or "")
+    return _ALIGNS[m.group(1).lower()] if m else None
+
+
+def _length_pt(value, unit):
+    return float(value) * _UNITS_PT.get((unit or "px").lower(), 0.75)
+
+
+class _Parser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._buf = []
+        self._has_br = False
+        self._inline = []       # open inline tags: (tag, open_markup, close_markup)
+        self._lists = []        # [type, counter]
+        self._block_align = []
+        self._li = False
+        self._skip = 0
+
+    # ── helpers ────────────────────────────────────────────────
+    def _align_now(self):
+        return self._block_align[-1] if self._block_align else None
+
+    def _flush(self):
+        markup = "".join(self._buf).strip()
+        had_br = self._has_br
+        kind = "li" if self._li else "p"
+        self._buf = [o for _, o, _ in self._inline]
+        self._has_br = False
+        self._li = False
+
+        # Drop leading/trailing <br/> — they only add empty lines inside the paragraph
+        while markup.startswith("<br/>"):
+            markup = markup[5:].lstrip()
+        while markup.endswith("<br/>"):
+            markup = markup[:-5].rstrip()
+
+        if not _TAG_RE.sub("", markup).strip():
+            if had_br:
+                self.blocks.append(("gap",))
+            return
+        closers = "".join(c for _, _, c in reversed(self._inline))
+        self.blocks.append((kind, markup + closers, self._align_now()))
+
+    def _open_inline(self, tag, opens, closes):
+        self._inline.append((tag, opens, closes))
+        self._buf.append(opens)
+
+    def _close_inline(self, tag):
+        for idx in range(len(self._inline) - 1, -1, -1):
+            if self._inline[idx][0] == tag:
+                break
+        else:
+            return
+        # Close everything above it too, then reopen, so the markup stays well-formed
+        above = self._inline[idx + 1:]
+        for _, _, c in reversed(above):
+            self._buf.append(c)
+        self._buf.append(self._inline[idx][2])
+        for _, o, _ in above:
+            self._buf.append(o)
+        del self._inline[idx]
+
+    # ── HTMLParser callbacks ──────────────────────────────────
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+            return
+        attrs = dict(attrs)
+        style = attrs.get("style") or ""
+
+        if tag in _SIMPLE_INLINE:
+            t = _SIMPLE_INLINE[tag]
+            self._open_inline(tag, f"<{t}>", f"</{t}>")
+        elif tag == "br":
+            self._buf.append("<br/>")
+            self._has_br = True
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._block_align.append(_align(style) if _align(style) is not None else self._align_now())
+            if tag[0] == "h" and tag[1:].isdigit():
+                self._open_inline(tag, "<b>", "</b>")
+        elif tag in ("ul", "ol"):
+            self._flush()
+            self._lists.append([tag, 0])
+        elif tag == "li":
+            self._flush()
+            self._li = True
+            if self._lists:
+                self._lists[-1][1] += 1
+                kind, n = self._lists[-1]
+            else:
+                kind, n = "ul", 0
+            self._buf.append(f"{n}. " if kind == "ol" else "•  ")
+        elif tag in ("font", "span"):
+            opens, closes = [], []
+            color = _color(attrs.get("color") or "") if tag == "font" else None
+            m = _COLOR_RE.search(style)
+            if m:
+                color = _color(m.group(1)) or color
+            if color:
+                opens.append(f'<font color="{color}">'); closes.append("</font>")
+            m = _SIZE_RE.search(style)
+            if m:
+                opens.append(f'<font size="{_length_pt(*m.groups()):.0f}">'); closes.append("</font>")
+            for rx, t in ((_WEIGHT_RE, "b"), (_ITALIC_RE, "i"), (_UNDERLINE_RE, "u")):
+                if rx.search(style):
+                    opens.append(f"<{t}>"); closes.append(f"</{t}>")
+            self._open_inline(tag, "".join(opens), "".join(reversed(closes)))
+        elif tag == "img":
+            src = attrs.get("src") or ""
+            if not src:
+                return
+            width = None
+            m = _WIDTH_RE.search(style)
+            if m:
+                width = _length_pt(*m.groups())
+            elif (attrs.get("width") or "").isdigit():
+                width = _length_pt(attrs["width"], "px")
+            # Images break the paragraph so they land where they are in the text
+            self._flush()
+            self.blocks.append(("img", src, width))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ("br", "img"):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag in _SIMPLE_INLINE or tag in ("font", "span"):
+            self._close_inline(tag)
+        elif tag in _BLOCK_TAGS:
+            if tag[0] == "h" and tag[1:].isdigit():
+                self._close_inline(tag)
+            self._flush()
+            if self._block_align:
+                self._block_align.pop()
+        elif tag == "li":
+            self._flush()
+        elif tag in ("ul", "ol"):
+            self._flush()
+            if self._lists:
+                self._lists.pop()
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        self._flush()
+        self._inline = []
+
+
+def _parse(html):
+    if not _HAS_TAG_RE.search(html):
+        text = escape(html.strip(), quote=False)
+        return (("p", text, None),) if text else ()
+    parser = _Parser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    return tuple(parser.blocks)
+
+
+class ParseCache:
+    """LRU of parse results keyed on a SHA-1 of the HTML."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, html):
+        key = hashlib.sha1(html.encode("utf-8", "surrogatepass")).hexdigest()
+        with self._lock:
+            blocks = self._items.get(key)
+            if blocks is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return blocks
+            self.misses += 1
+        blocks = _parse(html)
+        with self._lock:
+            self._items[key] = blocks
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return blocks
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+parse_cache = ParseCache()
+
+
+def parse_html(html):
+    """Block tokens for an HTML string (cached)."""
+    if not html or not html.strip():
+        return ()
+    return parse_cache.get(html)
+
+
+class HtmlProfile:
+    """
+    Per-builder look for converted HTML.
+      body / li      base ParagraphStyles (text-align in the HTML overrides alignment)
+      para_space     Spacer after each paragraph, li_space after each list item
+      gap            height of an empty line
+      img_width      default image width; img_max_w / img_max_h bound it
+      img_spacing    Spacer above and below each image
+      resolve_upload callable mapping "/uploads/..." src to a file path (or None)
+      output         image_cache.OutputProfile: uploaded images are resampled to its
+                     resolution / JPEG quality (None: embedded as stored)
+    """
+
+    def __init__(self, body, li=None, para_space=0, li_space=0, gap=0.18 * _CM,
+                 img_width=None, img_max_w=None, img_max_h=None, img_spacing=0.2 * _CM,
+                 resolve_upload=None, output=None):
+        self.body = body
+        self.li = li or body
+        self.para_space = para_space
+        self.li_space = li_space
+        self.gap = gap
+        self.img_width = img_width
+        self.img_max_w = img_max_w
+        self.img_max_h = img_max_h
+        self.img_spacing = img_spacing
+        self.resolve_upload = resolve_upload
+        self.output = output
+        self._aligned = {}
+
+    def style(self, kind, align):
+        base = self.li if kind == "li" else self.body
+        if align is None or align == base.alignment:
+            return base
+        key = (kind, align)
+        if key not in self._aligned:
+            from reportlab.lib.styles import ParagraphStyle
+            self._aligned[key] = ParagraphStyle(f"{base.name}_{align}", parent=base, alignment=align)
+        return self._aligned[key]
+
+    def image(self, src, width):
+        width = width or self.img_width
+        if width is not None and self.img_max_w is not None:
+            width = min(width, self.img_max_w)
+        box = dict(width=width, max_w=self.img_max_w, max_h=self.img_max_h, h_align="LEFT")
+        if src.startswith("data:"):
+            return image_flowable(src, **box)
+        if src.startswith("/uploads/") and self.resolve_upload:
+            path = self.resolve_upload(src[len("/uploads/"):])
+            if not path:
+                return None
+            return file_photo_flowable(path, self.output, **box) if self.output else file_image_flowable(path, **box)
+        return None
+
+
+def _paragraph(markup, style):
+    from reportlab.platypus import Paragraph
+    try:
+        return Paragraph(markup, style)
+    except ValueError:
+        # Markup ReportLab cannot parse (odd nesting) — fall back to the plain text
+        return Paragraph(escape(_TAG_RE.sub("", markup), quote=False), style)
+
+
+def to_flowables(blocks, profile):
+    from reportlab.platypus import Spacer
+    flowables = []
+    for block in blocks:
+        kind = block[0]
+        if kind == "gap":
+            if profile.gap:
+                flowables.append(Spacer(1, profile.gap))
+        elif kind == "img":
+            img = profile.image(block[1], block[2])
+            if img is not None:
+                if profile.img_spacing:
+                    flowables.append(Spacer(1, profile.img_spacing))
+                flowables.append(img)
+                if profile.img_spacing:
+                    flowables.append(Spacer(1, profile.img_spacing))
+        else:
+            flowables.append(_paragraph(block[1], profile.style(kind, block[2])))
+            space = profile.li_space if kind == "li" else profile.para_space
+            if space:
+                flowables.append(Spacer(1, space))
+    return flowables
+
+
+def html_to_flowables(html, profile):
+    """Convert rich-text HTML to a fresh list of flowables for one document."""
+    return to_flowables(parse_html(html), profile)
@@ -0,0 +1,97 @@
+"""
+backend/http_cache.py
+Conditional GET for detail, list and PDF endpoints.
+
+A view computes a cheap version for what it would return, such as a row's
+updated_at or a table's row count plus max(updated_at), and hands
+conditional() a callable that builds the real response. If the browser's
+If-None-Match / If-Modified-Since still matches that version, the view
+answers 304 without serialising rows or rendering a PDF.
+
+Responses are marked `Cache-Control: private, no-cache`, so the browser
+keeps a copy but revalidates every time. An edit is visible on the next
+navigation.
+"""
+import glob
+import hashlib
+import os
+from datetime import timezone
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func
+
+from extensions import db
+
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts):
+    """Stable short hash of the version parts (ids, timestamps, counts, query string...)."""
+    raw = "|".join("" if p is None else p.isoformat() if hasattr(p, "isoformat") else str(p)
+                   for p in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+def table_version(model, column="updated_at"):
+    """(row count, newest timestamp) of a table — one aggregate query, index-only with ix_<table>_<column>."""
+    count, newest = db.session.query(func.count(model.id), func.max(getattr(model, column))).one()
+    return count, newest
+
+
+def newest(*stamps):
+    """Latest of several timestamps (None ignored) — Last-Modified of a response built from several rows."""
+    stamps = [s for s in stamps if s is not None]
+    return max(stamps) if stamps else None
+
+
+_code_version = None
+
+
+def pdf_version():
+    """
+    Version of the PDF layout itself: newest .py under the backend (changes on
+    deploy) plus the logo's mtime, so a redeploy or a new logo re-renders.
+    """
+    global _code_version
+    if _code_version is None:
+        root = current_app.root_path
+        files = glob.glob(os.path.join(root, "*.py")) + glob.glob(os.path.join(root, "routes", "*.py"))
+        _code_version = max((os.path.getmtime(f) for f in files), default=0)
+    from asset_registry import assets
+    logo = assets.get("logo")
+    return f"{_code_version}:{logo.mtime if logo else 0}"
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return _as_utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _as_utc(dt):
+    # Columns hold naive UTC (datetime.utcnow)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def conditional(build, *version, last_modified=None):
+    """
+    304 if the client's copy matches `version`, else build() with ETag /
+    Last-Modified attached. `version` should contain everything the body
+    depends on; the user id and query string are added here.
+    """
+    etag = make_etag(request.path, request.query_string.decode(), get_jwt_identity(), *version)
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,288 @@
+"""
+backend/image_cache.py
+Decoded-image cache shared by the PDF builders.
+
+Signatures and inline editor images arrive as base64 text (or as files in
+the upload store) and used to be decoded, opened with PIL, converted to
+RGBA and re-encoded as PNG on every render.  The normalized PNG bytes and
+pixel size are now kept in a thread-safe LRU keyed on a hash of the base64
+payload (or path + mtime for files), bounded by entry count and total bytes.
+
+Report photos go through prefetch_photos(): every photo is opened, scaled
+down to the size it is printed at and re-encoded as JPEG in a thread pool
+(PIL releases the GIL while decoding, resampling and encoding), so the
+layout loop only wraps ready bytes that ReportLab embeds without decoding
+again. Images in rich-text bodies use file_photo_flowable(). The target
+resolution and JPEG quality come from an OutputProfile (screen / email /
+print); each profile's derivative is a separate entry in the same LRU.
+
+Streams are written to the PDF as binary (useA85 = 0 in reportlab_settings.py,
+which ReportLab reads when it is first imported): the default ASCII85
+armour makes them 25% larger and, without the optional rl_accel extension,
+is encoded in pure Python (seconds per photo-heavy report).
+"""
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from pdf_profiler import asset_timer
+
+
+# data: PNG bytes (signatures, inline images) or JPEG bytes (prepared photos)
+DecodedImage = namedtuple("DecodedImage", ["data", "width", "height"])
+
+# Image resolution / JPEG quality a PDF is rendered with (?profile= on the PDF routes)
+OutputProfile = namedtuple("OutputProfile", ["name", "dpi", "jpeg_quality"])
+
+OUTPUT_PROFILES = {
+    "screen": OutputProfile("screen", 96, 60),   # on-screen preview
+    "email":  OutputProfile("email", 150, 75),   # small enough to attach
+    "print":  OutputProfile("print", 300, 90),   # archive / printing
+}
+
+# Kept lossless: usually screenshots, diagrams or scans with text (photo_ingest too)
+LOSSLESS_FORMATS = ("PNG", "GIF")
+
+# Remembered for undecodable payloads so a broken signature is not retried per render.
+_INVALID = DecodedImage(b"", 0, 0)
+
+
+def _strip_data_url(b64_data):
+    if "base64," in b64_data:
+        return b64_data.split("base64,", 1)[1]
+    return b64_data
+
+
+def _normalize(raw):
+    from PIL import Image as PILImage
+    pil = PILImage.open(BytesIO(raw)).convert("RGBA")
+    buf = BytesIO()
+    pil.save(buf, format="PNG")
+    return DecodedImage(buf.getvalue(), pil.size[0], pil.size[1])
+
+
+def _flatten(pil):
+    """RGB (or L) pixels; transparency is composited onto the white page."""
+    from PIL import Image as PILImage
+    if pil.mode in ("RGBA", "LA", "PA", "P"):
+        pil = pil.convert("RGBA")
+        flat = PILImage.new("RGB", pil.size, (255, 255, 255))
+        flat.paste(pil, mask=pil.split()[3])
+        return flat
+    return pil if pil.mode in ("RGB", "L") else pil.convert("RGB")
+
+
+def _prepare_photo(raw, max_w, max_h, dpi, quality=85):
+    """
+    Image fitted into max_w x max_h points and resampled to `dpi` there,
+    without an alpha channel (no soft masks, as PDF/A-1 requires). Photos
+    become JPEG at `quality`; PNG / GIF (screenshots, drawings) stay lossless
+    PNG. An image already small enough is not resampled, and a plain upright
+    JPEG is then passed through as-is.
+    """
+    from PIL import Image as PILImage, ImageOps
+    pil = PILImage.open(BytesIO(raw))
+    fmt = pil.format
+    orientation = pil.getexif().get(0x0112, 1)
+    rotated = orientation in (5, 6, 7, 8)  # EXIF orientation with a 90° turn
+    w, h = pil.size[::-1] if rotated else pil.size
+    scale = min(max_w / w, max_h / h) * dpi / 72.0
+    target = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if fmt == "JPEG" and pil.mode in ("RGB", "L") and scale >= 1 and orientation == 1:
+        return DecodedImage(raw, w, h)
+    if fmt == "JPEG":
+        pil.draft("RGB", target[::-1] if rotated else target)  # libjpeg decodes at 1/2, 1/4, 1/8 size directly
+    pil = _flatten(ImageOps.exif_transpose(pil))  # photos uploaded before photo_ingest normalized them
+    if scale < 1:
+        pil = pil.resize(target, PILImage.LANCZOS)
+    buf = BytesIO()
+    if fmt in LOSSLESS_FORMATS:
+        pil.save(buf, format="PNG")
+    else:
+        pil.save(buf, format="JPEG", quality=quality, optimize=True)
+    return DecodedImage(buf.getvalue(), pil.size[0], pil.size[1])
+
+
+class ImageCache:
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.max_entries = int(app.config.get("IMAGE_CACHE_MAX_ENTRIES", self.max_entries))
+        self.max_bytes = int(app.config.get("IMAGE_CACHE_MAX_BYTES", self.max_bytes))
+        app.extensions["image_cache"] = self
+
+    def _put(self, key, item):
+        size = len(item.data)
+        if size > self.max_bytes:
+            return
+        self._items[key] = item
+        self._bytes += size
+        while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+            _, old = self._items.popitem(last=False)
+            self._bytes -= len(old.data)
+            self.evictions += 1
+
+    def _lookup(self, key, load, prepare=_normalize):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item if item is not _INVALID else None
+            self.misses += 1
+
+        # Decode outside the lock — two threads racing on the same key just do the work twice.
+        try:
+            item = prepare(load())
+        except Exception:
+            item = _INVALID
+
+        with self._lock:
+            if item is _INVALID:
+                self.errors += 1
+            if key not in self._items:
+                self._put(key, item)
+        return item if item is not _INVALID else None
+
+    def get(self, b64_data):
+        """Return DecodedImage for a base64 / data-URL string, or None if it cannot be decoded."""
+        if not b64_data:
+            return None
+        payload = _strip_data_url(b64_data)
+        key = hashlib.sha1(payload.encode("ascii", "ignore")).hexdigest()
+        return self._lookup(key, lambda: base64.b64decode(payload))
+
+    def get_file(self, path):
+        """Return DecodedImage for an image file, keyed on path + mtime so edits are picked up."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self._lookup(f"file:{path}:{st.st_mtime_ns}:{st.st_size}", lambda: _read(path))
+
+    def get_photo(self, path, max_w, max_h, output):
+        """Return an image file prepared for the box at an OutputProfile's resolution, or None."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (f"photo:{path}:{st.st_mtime_ns}:{st.st_size}:{max_w:.1f}x{max_h:.1f}"
+               f"@{output.dpi}q{output.jpeg_quality}")
+        return self._lookup(key, lambda: _read(path),
+                            lambda raw: _prepare_photo(raw, max_w, max_h, output.dpi, output.jpeg_quality))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+image_cache = ImageCache()
+
+
+def _flowable(item, width, height, max_w, max_h, h_align):
+    if item is None:
+        return None
+    from reportlab.platypus import Image as RLImage
+    if width is None and height is None and max_w is not None and max_h is not None:
+        ratio = min(max_w / item.width, max_h / item.height, 1.0)
+        width, height = item.width * ratio, item.height * ratio
+    elif height is None and width is not None:
+        height = width * item.height / item.width
+        if max_h is not None and height > max_h:
+            width, height = width * max_h / height, max_h
+    img = RLImage(BytesIO(item.data), width=width, height=height)
+    if h_align:
+        img.hAlign = h_align
+    return img
+
+
+def image_flowable(b64_data, width=None, height=None, max_w=None, max_h=None, h_align=None):
+    """
+    Image flowable from a base64 image, or None if it cannot be decoded.
+    Either a fixed width/height box, a width alone (height follows the aspect
+    ratio, capped by max_h), or max_w/max_h to scale proportionally (never up).
+    """
+    with asset_timer():
+        return _flowable(image_cache.get(b64_data), width, height, max_w, max_h, h_align)
+
+
+def file_image_flowable(path, width=None, height=None, max_w=None, max_h=None, h_align=None):
+    """Same as image_flowable, for an image file on disk."""
+    with asset_timer():
+        return _flowable(image_cache.get_file(path), width, height, max_w, max_h, h_align)
+
+
+def file_photo_flowable(path, output, width=None, max_w=None, max_h=None, h_align=None):
+    """
+    file_image_flowable for an image that may be much larger than its box:
+    resampled to the OutputProfile's resolution first (see _prepare_photo).
+    """
+    box_w = min(w for w in (width, max_w) if w is not None) if (width or max_w) else None
+    if box_w is None or max_h is None:
+        return file_image_flowable(path, width=width, max_w=max_w, max_h=max_h, h_align=h_align)
+    with asset_timer():
+        return _flowable(image_cache.get_photo(path, box_w, max_h, output), width, None, max_w, max_h, h_align)
+
+
+def prefetch_photos(paths, max_w, max_h, output, workers=4):
+    """
+    Prepared photos for `paths`, in the same order: a DecodedImage, None for
+    a path that is None / missing, or False for a file that cannot be read
+    as an image. Decoding runs in `workers` threads; timed as one asset step.
+    """
+    def prepare(path):
+        if not path or not os.path.exists(path):
+            return None
+        return image_cache.get_photo(path, max_w, max_h, output) or False
+
+    with asset_timer():
+        if workers <= 1 or len(paths) <= 1:
+            return [prepare(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            return list(pool.map(prepare, paths))
+
+
+def photo_flowable(item, max_w, max_h, h_align=None, size=None):
+    """
+    Image flowable for a prefetched photo, scaled to fill max_w x max_h (up
+    or down). `size` is the pixel size recorded at upload, when known.
+    """
+    if not item:
+        return None
+    w, h = size if size and all(size) else (item.width, item.height)
+    ratio = min(max_w / w, max_h / h)
+    return _flowable(item, w * ratio, h * ratio, None, None, h_align)
@@ -0,0 +1,234 @@
+"""
+backend/metrics.py
+Opt-in per-request SQL instrumentation (SQL_METRICS=1).
+
+SQLAlchemy cursor events count and time every statement issued while a
+request is being handled. Each response then gets a Server-Timing header
+(visible in the browser devtools Network tab) and the numbers are added to
+per-endpoint totals. Requests that cross SQL_SLOW_REQUEST_MS or
+SQL_MAX_QUERIES are logged together with their slowest statements, which is
+usually enough to spot an N+1 loop.
+
+/metrics renders the totals plus pool, PDF and cache stats in Prometheus text
+format. It is guarded like /api/internal/*.
+"""
+import sys
+import threading
+import time
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+from db_pool import pool_status
+
+
+SLOWEST_PER_REQUEST = 3     # statements kept per request for the log line
+SLOWEST_PER_ENDPOINT = 5    # statements kept per endpoint for /metrics
+STATEMENT_PREVIEW = 200     # characters of SQL kept
+
+
+class _RequestStats:
+    __slots__ = ("started", "queries", "db_ms", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest = []  # [(ms, statement)] longest first
+
+    def add(self, statement, ms):
+        self.queries += 1
+        self.db_ms += ms
+        if len(self.slowest) < SLOWEST_PER_REQUEST or ms > self.slowest[-1][0]:
+            self.slowest.append((ms, statement[:STATEMENT_PREVIEW]))
+            self.slowest.sort(key=lambda s: s[0], reverse=True)
+            del self.slowest[SLOWEST_PER_REQUEST:]
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "queries", "db_ms", "total_ms", "max_queries", "slow_requests", "slowest")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.total_ms = 0.0
+        self.max_queries = 0
+        self.slow_requests = 0
+        self.slowest = []
+
+
+class SqlMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.slow_request_ms = 500.0
+        self.slow_query_ms = 100.0
+        self.max_queries = 50
+        self.enabled = False
+
+    def init_app(self, app):
+        """Hook into the engine and the request cycle. Call after db.init_app(app)."""
+        self.enabled = app.config.get("SQL_METRICS", False)
+        app.extensions["sql_metrics"] = self
+        if not self.enabled:
+            return
+        self.slow_request_ms = float(app.config.get("SQL_SLOW_REQUEST_MS", self.slow_request_ms))
+        self.slow_query_ms = float(app.config.get("SQL_SLOW_QUERY_MS", self.slow_query_ms))
+        self.max_queries = int(app.config.get("SQL_MAX_QUERIES", self.max_queries))
+
+        from extensions import db
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+        app.before_request(_before_request)
+        app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        stats = g.pop("_sql_stats", None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries", app;dur={total_ms:.1f}')
+
+        endpoint = request.endpoint or "unmatched"
+        slow = total_ms >= self.slow_request_ms or stats.queries >= self.max_queries
+        self._record(endpoint, stats, total_ms, slow)
+        if slow:
+            from flask import current_app
+            current_app.logger.warning(
+                "slow request %s %s: %.0f ms, %d queries, %.0f ms in DB; slowest: %s",
+                request.method, request.path, total_ms, stats.queries, stats.db_ms,
+                " | ".join(f"{ms:.1f} ms {sql}" for ms, sql in stats.slowest))
+        return response
+
+    def _record(self, endpoint, stats, total_ms, slow):
+        with self._lock:
+            ep = self._endpoints.get(endpoint)
+            if ep is None:
+                ep = self._endpoints[endpoint] = _EndpointStats()
+            ep.requests += 1
+            ep.queries += stats.queries
+            ep.db_ms += stats.db_ms
+            ep.total_ms += total_ms
+            ep.max_queries = max(ep.max_queries, stats.queries)
+            ep.slow_requests += slow
+            merged = ep.slowest + [s for s in stats.slowest if s[0] >= self.slow_query_ms]
+            merged.sort(key=lambda s: s[0], reverse=True)
+            ep.slowest = merged[:SLOWEST_PER_ENDPOINT]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "requests": ep.requests,
+                    "queries": ep.queries,
+                    "queries_avg": round(ep.queries / ep.requests, 2) if ep.requests else 0.0,
+                    "max_queries": ep.max_queries,
+                    "db_ms": round(ep.db_ms, 2),
+                    "total_ms": round(ep.total_ms, 2),
+                    "slow_requests": ep.slow_requests,
+                    "slowest": [{"ms": round(ms, 2), "sql": sql} for ms, sql in ep.slowest],
+                }
+                for name, ep in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+sql_metrics = SqlMetrics()
+
+
+def _before_request():
+    g._sql_stats = _RequestStats()
+
+
+# The start time lives on the statement's execution context, not on the pooled
+# connection: a statement that raises never reaches after_cursor_execute, and
+# its context is dropped with it instead of leaving a stale start behind.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    ms = (time.perf_counter() - start) * 1000
+    if has_request_context():
+        stats = g.get("_sql_stats")
+        if stats is not None:
+            stats.add(statement, ms)
+
+
+# ── Prometheus text format ───────────────────────────────────────────────────
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus(engine):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+    endpoints = sql_metrics.snapshot()
+    for name, kind, key, help_text in [
+        ("flotech_http_requests_total", "counter", "requests", "Requests handled per endpoint"),
+        ("flotech_http_request_ms_total", "counter", "total_ms", "Request time per endpoint (ms)"),
+        ("flotech_sql_queries_total", "counter", "queries", "SQL statements per endpoint"),
+        ("flotech_sql_ms_total", "counter", "db_ms", "Time spent in SQL per endpoint (ms)"),
+        ("flotech_sql_queries_max", "gauge", "max_queries", "Most SQL statements in one request"),
+        ("flotech_http_slow_requests_total", "counter", "slow_requests", "Requests over the slow thresholds"),
+    ]:
+        metric(name, kind, help_text,
+               [({"endpoint": ep}, data[key]) for ep, data in sorted(endpoints.items())])
+
+    pool = pool_status(engine)
+    for key in ("size", "checked_in", "checked_out", "overflow"):
+        if key in pool:
+            metric(f"flotech_db_pool_{key}", "gauge", f"Connection pool {key}", [({}, pool[key])])
+    for key in ("checkouts", "waits", "timeouts", "connects", "invalidations"):
+        metric(f"flotech_db_pool_{key}_total", "counter", f"Connection pool {key}", [({}, pool[key])])
+    metric("flotech_db_pool_wait_ms_total", "counter", "Time spent waiting for a connection (ms)",
+           [({}, pool["wait_ms_total"])])
+
+    from pdf_profiler import pdf_metrics
+    docs = sorted(pdf_metrics.snapshot().items())
+    for name, key, help_text in [
+        ("flotech_pdf_renders_total", "renders", "PDFs rendered per document type"),
+        ("flotech_pdf_errors_total", "errors", "PDF renders that raised"),
+        ("flotech_pdf_pages_total", "pages", "Pages rendered per document type"),
+        ("flotech_pdf_bytes_total", "bytes", "PDF bytes produced per document type"),
+        ("flotech_pdf_ms_total", "total_ms", "Render time per document type (ms)"),
+    ]:
+        metric(name, "counter", help_text, [({"doc": doc}, data[key]) for doc, data in docs])
+    metric("flotech_pdf_phase_ms_total", "counter", "Render time per phase (ms)",
+           [({"doc": doc, "phase": phase}, ms)
+            for doc, data in docs for phase, ms in data["phases_ms"].items()])
+
+    from image_cache import image_cache
+    from cache import cache
+    caches = {"image": image_cache.stats(), "reference": cache.stats()}
+    if "html_flowables" in sys.modules:  # only loaded once a PDF has been built
+        caches["html_parse"] = sys.modules["html_flowables"].parse_cache.stats()
+    if "routes.dashboard" in sys.modules:
+        caches["dashboard"] = sys.modules["routes.dashboard"].summary_cache.stats()
+    for key in ("entries", "hits", "misses"):
+        kind = "gauge" if key == "entries" else "counter"
+        suffix = "" if key == "entries" else "_total"
+        metric(f"flotech_cache_{key}{suffix}", kind, f"Cache {key}",
+               [({"cache": name}, s[key]) for name, s in caches.items() if s[key] is not None])
+
+    return "\n".join(lines) + "\n"
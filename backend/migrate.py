@@ -1,46 +1,31 @@
 """
-Jalankan script ini SEKALI untuk menambah kolom yang kurang di database.
-Usage: python migrate.py
+Apply pending schema migrations (see migrations/versions.py).
+Usage (from backend/):
+    python migrate.py              # upgrade to the latest version
+    python migrate.py --dry-run    # print the SQL only
+    python migrate.py --to 7       # stop after version 7
+    python migrate.py --status     # list applied / pending versions
+Same as `flask --app app db upgrade` / `flask --app app db status`.
 """
+import argparse
+
 from app import app
-from extensions import db
+import migrations
+
 
-with app.app_context():
-    with db.engine.connect() as conn:
-        # Tambah kolom engineer_id ke tabel reports jika belum ada
-        conn.execute(db.text("""
-            ALTER TABLE reports 
-            ADD COLUMN IF NOT EXISTS engineer_id INTEGER REFERENCES engineers(id);
-        """))
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="print the SQL without running it")
+    parser.add_argument("--to", type=int, dest="target", help="stop after this version")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    args = parser.parse_args()
 
-        # Tambah kolom created_by ke tabel reports jika belum ada (opsional, tidak wajib)
-        conn.execute(db.text("""
-            ALTER TABLE reports 
-            ADD COLUMN IF NOT EXISTS created_by INTEGER REFERENCES users(id);
-        """))
+    with app.app_context():
+        if args.status:
+            migrations.status()
+        else:
+            migrations.upgrade(dry_run=args.dry_run, target=args.target)
 
-        # Pastikan tabel engineers ada (jika belum)
-        conn.execute(db.text("""
-            CREATE TABLE IF NOT EXISTS engineers (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                name VARCHAR(150) NOT NULL,
-                employee_id VARCHAR(50) UNIQUE,
-                position VARCHAR(100),
-                department VARCHAR(100),
-                specialization VARCHAR(200),
-                email VARCHAR(120),
-                phone VARCHAR(30),
-                certification VARCHAR(300),
-                years_experience INTEGER DEFAULT 0,
-                signature_data TEXT,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW()
-            );
-        """))
 
-        conn.commit()
-        print("✅ Migration selesai!")
-        print("   - Kolom engineer_id ditambah ke tabel reports")
-        print("   - Kolom created_by ditambah ke tabel reports")
-        print("   - Tabel engineers dibuat (jika belum ada)")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+backend/migrations
+Versioned schema migrations — replaces the old one-off migrate_*.py scripts.
+
+Every migration has an integer version and is recorded in the schema_version
+table once applied, so each runs exactly once per database and in order.
+Migrations are written to be idempotent as well (columns / indexes are
+checked through the SQLAlchemy inspector first), so a database that already
+ran the old scripts upgrades cleanly.
+
+Usage (from backend/):
+    flask --app app db upgrade [--dry-run] [--to N]
+    flask --app app db status
+or  python migrate.py [--dry-run] [--status] [--to N]
+
+Adding a migration: append a function to migrations/versions.py decorated
+with @migration(<next version>, "<short description>"). Use
+transactional=False for CREATE INDEX CONCURRENTLY on large Postgres tables.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from extensions import db
+
+
+_MIGRATIONS = {}
+
+schema_version = sa.Table(
+    "schema_version", sa.MetaData(),
+    sa.Column("version", sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column("name", sa.String(200)),
+    sa.Column("applied_at", sa.DateTime, default=datetime.utcnow),
+    sa.Column("duration_ms", sa.Integer),
+)
+
+
+class Migration:
+    def __init__(self, version, name, fn, transactional=True):
+        self.version = version
+        self.name = name
+        self.fn = fn
+        self.transactional = transactional
+
+
+def migration(version, name, transactional=True):
+    """Register a migration function fn(ops)."""
+    def wrap(fn):
+        if version in _MIGRATIONS:
+            raise ValueError(f"Duplicate migration version {version}")
+        _MIGRATIONS[version] = Migration(version, name, fn, transactional)
+        return fn
+    return wrap
+
+
+def all_migrations():
+    from migrations import versions  # noqa: F401 — registers the migrations
+    return [_MIGRATIONS[v] for v in sorted(_MIGRATIONS)]
+
+
+class Ops:
+    """Dialect-aware helpers handed to each migration. In dry-run mode DDL/DML is printed, not run."""
+
+    def __init__(self, conn, dry_run=False, echo=print, autocommit=False):
+        self.conn = conn
+        self.dry_run = dry_run
+        self.echo = echo
+        self.autocommit = autocommit
+
+    @property
+    def dialect(self):
+        return self.conn.dialect.name
+
+    @property
+    def is_postgres(self):
+        return self.dialect == "postgresql"
+
+    # ── inspection (always runs, read-only) ──────────────────────
+    def _inspector(self):
+        return sa.inspect(self.conn)
+
+    def has_table(self, table):
+        return self._inspector().has_table(table)
+
+    def has_column(self, table, column):
+        if not self.has_table(table):
+            return False
+        return any(c["name"] == column for c in self._inspector().get_columns(table))
+
+    def has_index(self, table, name):
+        if not self.has_table(table):
+            return False
+        return any(i["name"] == name for i in self._inspector().get_indexes(table))
+
+    def has_unique(self, table, name):
+        if not self.has_table(table):
+            return False
+        return any(u["name"] == name for u in self._inspector().get_unique_constraints(table))
+
+    def scalar(self, sql, **params):
+        return self.conn.execute(sa.text(sql), params).scalar()
+
+    def rows(self, sql, **params):
+        return self.conn.execute(sa.text(sql), params).fetchall()
+
+    # ── changes ──────────────────────────────────────────────────
+    def execute(self, sql, **params):
+        sql = sql.strip()
+        if self.dry_run:
+            self.echo(f"      [dry-run] {sql}" + (f"  {params}" if params else ""))
+            return None
+        return self.conn.execute(sa.text(sql), params)
+
+    @contextmanager
+    def atomic(self):
+        """
+        Ops whose statements commit together. In a transactional=False
+        migration (autocommit) each execute() commits on its own; use this
+        for steps that must not be left half done, e.g. per row.
+        """
+        if not self.autocommit or self.dry_run:
+            yield self
+            return
+        with self.conn.engine.begin() as conn:
+            yield Ops(conn, self.dry_run, self.echo)
+
+    def create_all(self, tables=None):
+        """
+        Create model tables that do not exist yet (CREATE TABLE with current
+        model columns): the named `tables`, or every model table (migration 1 only).
+        """
+        missing = [t for t in db.metadata.sorted_tables
+                   if (tables is None or t.name in tables) and not self.has_table(t.name)]
+        for t in missing:
+            self.echo(f"      + table {t.name}")
+        if missing and not self.dry_run:
+            db.metadata.create_all(bind=self.conn, tables=missing)
+
+    def add_column(self, table, column, type_sql, default=None):
+        """ALTER TABLE ... ADD COLUMN unless it already exists. default is a SQL literal."""
+        if not self.has_table(table) or self.has_column(table, column):
+            return False
+        ddl = f"ALTER TABLE {table} ADD COLUMN {column} {type_sql}"
+        if default is not None:
+            ddl += f" DEFAULT {default}"
+        self.execute(ddl)
+        return True
+
+    def create_index(self, name, table, columns, unique=False, concurrently=False):
+        """
+        CREATE INDEX unless it exists. concurrently=True (Postgres only) avoids
+        locking writes on large tables and needs a transactional=False migration.
+        """
+        if not self.has_table(table) or self.has_index(table, name):
+            return False
+        concurrent = concurrently and self.is_postgres
+        if concurrent and not self.autocommit:
+            raise RuntimeError(f"{name}: CREATE INDEX CONCURRENTLY needs transactional=False")
+        self.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if concurrent else ''}"
+            f"{name} ON {table} ({', '.join(columns)})"
+        )
+        return True
+
+
+def _ensure_version_table(conn, dry_run, echo):
+    if sa.inspect(conn).has_table("schema_version"):
+        return True
+    if dry_run:
+        echo("   [dry-run] CREATE TABLE schema_version")
+        return False
+    schema_version.create(bind=conn)
+    return True
+
+
+def applied_versions(conn):
+    if not sa.inspect(conn).has_table("schema_version"):
+        return set()
+    return {row[0] for row in conn.execute(sa.select(schema_version.c.version))}
+
+
+def status(echo=print):
+    with db.engine.connect() as conn:
+        done = applied_versions(conn)
+    for m in all_migrations():
+        echo(f"  {'✅' if m.version in done else '⏳'} {m.version:04d}  {m.name}")
+    return done
+
+
+def upgrade(dry_run=False, target=None, echo=print):
+    """Apply pending migrations in order (up to and including `target`). Returns versions applied."""
+    engine = db.engine
+    with engine.begin() as conn:
+        _ensure_version_table(conn, dry_run, echo)
+        done = applied_versions(conn)
+
+    pending = [m for m in all_migrations()
+               if m.version not in done and (target is None or m.version <= target)]
+    if not pending:
+        echo("✅ Database sudah versi terbaru")
+        return []
+
+    applied = []
+    for m in pending:
+        echo(f"▶ {m.version:04d}  {m.name}")
+        t0 = time.perf_counter()
+        if m.transactional:
+            # DDL + version row commit together (Postgres DDL is transactional)
+            with engine.begin() as conn:
+                m.fn(Ops(conn, dry_run, echo))
+                if not dry_run:
+                    _record(conn, m, t0)
+        else:
+            with engine.connect() as raw:
+                conn = raw.execution_options(isolation_level="AUTOCOMMIT")
+                m.fn(Ops(conn, dry_run, echo, autocommit=True))
+                if not dry_run:
+                    _record(conn, m, t0)
+        applied.append(m.version)
+
+    echo(("🔎 Dry-run selesai — tidak ada perubahan: " if dry_run else "✅ Migrasi selesai: ")
+         + ", ".join(f"{v:04d}" for v in applied))
+    return applied
+
+
+def _record(conn, m, t0):
+    conn.execute(schema_version.insert().values(
+        version=m.version, name=m.name, applied_at=datetime.utcnow(),
+        duration_ms=int((time.perf_counter() - t0) * 1000),
+    ))
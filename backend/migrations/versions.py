@@ -0,0 +1,281 @@
+"""
+backend/migrations/versions.py
+Ordered schema migrations. Never edit or renumber one that has shipped —
+add a new version instead.
+
+0001-0011 fold in the former migrate_*.py scripts and the onsite
+_ensure_columns startup hook; on databases that already ran those they are
+no-ops apart from being recorded in schema_version.
+"""
+import os
+
+from migrations import migration
+
+
+@migration(1, "base tables from models")
+def base_tables(ops):
+    # Fresh databases get every table in its current shape; later column
+    # migrations then find nothing to add.
+    ops.create_all()
+
+
+@migration(2, "reports.engineer_id, reports.created_by")
+def reports_owner_columns(ops):
+    ops.add_column("reports", "engineer_id", "INTEGER REFERENCES engineers(id)")
+    ops.add_column("reports", "created_by", "INTEGER REFERENCES users(id)")
+
+
+@migration(3, "report_images.caption")
+def report_image_caption(ops):
+    ops.add_column("report_images", "caption", "VARCHAR(500)", default="''")
+
+
+@migration(4, "onsite_reports legacy columns")
+def onsite_legacy_columns(ops):
+    ops.add_column("onsite_reports", "client_company", "VARCHAR(200)")
+    ops.add_column("onsite_reports", "materials_used", "TEXT")
+    ops.add_column("onsite_reports", "equipment_tag", "VARCHAR(100)")
+    # client_name is the contact person / PIC now
+    if ops.has_column("onsite_reports", "contact_person"):
+        ops.execute("""
+            UPDATE onsite_reports
+            SET client_name = contact_person
+            WHERE (client_name IS NULL OR client_name = '')
+              AND contact_person IS NOT NULL AND contact_person != ''
+        """)
+
+
+@migration(5, "onsite_reports.equipment_items")
+def onsite_equipment_items(ops):
+    if ops.is_postgres:
+        ops.add_column("onsite_reports", "equipment_items", "JSONB", default="'[]'::jsonb")
+        # Move single-equipment data into equipment_items
+        ops.execute("""
+            UPDATE onsite_reports
+            SET equipment_items = jsonb_build_array(
+                jsonb_build_object(
+                    'description', COALESCE(equipment_tag, ''),
+                    'model', COALESCE(equipment_model, ''),
+                    'serial_number', COALESCE(serial_number, '')
+                )
+            )
+            WHERE (equipment_items IS NULL OR equipment_items = '[]'::jsonb)
+              AND (equipment_tag IS NOT NULL OR equipment_model IS NOT NULL OR serial_number IS NOT NULL)
+        """)
+    else:
+        ops.add_column("onsite_reports", "equipment_items", "JSON", default="'[]'")
+
+
+@migration(6, "onsite_reports visit date range")
+def onsite_visit_dates(ops):
+    ops.add_column("onsite_reports", "visit_date_from", "DATE")
+    ops.add_column("onsite_reports", "visit_date_to", "DATE")
+    ops.execute("""
+        UPDATE onsite_reports
+        SET visit_date_from = visit_date
+        WHERE visit_date_from IS NULL AND visit_date IS NOT NULL
+    """)
+
+
+@migration(7, "quotations revision & form columns")
+def quotation_columns(ops):
+    for column, type_sql, default in [
+        ("base_number",    "VARCHAR(30)",  None),
+        ("revision",       "INTEGER",      "0"),
+        ("sales_person",   "VARCHAR(100)", None),
+        ("ref_no",         "VARCHAR(100)", None),
+        ("shipment_terms", "VARCHAR(200)", None),
+        ("delivery",       "VARCHAR(200)", None),
+        ("payment_terms",  "VARCHAR(200)", None),
+        ("vat_pct",        "FLOAT",        "11"),
+        ("vat_include",    "BOOLEAN",      "FALSE"),
+    ]:
+        ops.add_column("quotations", column, type_sql, default=default)
+    ops.execute("""
+        UPDATE quotations
+        SET base_number = quotation_number, revision = 0
+        WHERE base_number IS NULL
+    """)
+
+
+@migration(8, "leave unique keys + joint leave 2026")
+def leave_constraints(ops):
+    # Older databases have these as named constraints; elsewhere a unique index does the same job
+    if not ops.has_unique("leave_entitlements", "uq_leave_entitlements_user_year"):
+        ops.create_index("uq_leave_entitlements_user_year", "leave_entitlements",
+                         ["user_id", "year"], unique=True)
+    if not ops.has_unique("joint_leave_schedules", "uq_joint_leave_year_date"):
+        ops.create_index("uq_joint_leave_year_date", "joint_leave_schedules",
+                         ["year", "leave_date"], unique=True)
+
+    for year, name, leave_date in [
+        (2026, "Cuti Bersama Idul Fitri", "2026-03-20"),
+        (2026, "Cuti Bersama Idul Fitri", "2026-03-23"),
+        (2026, "Cuti Bersama Idul Fitri", "2026-03-24"),
+        (2026, "Cuti Bersama Natal",      "2026-12-24"),
+    ]:
+        # (table is missing only in a dry-run against a fresh database)
+        exists = ops.has_table("joint_leave_schedules") and ops.scalar(
+            "SELECT id FROM joint_leave_schedules WHERE year = :y AND leave_date = :d",
+            y=year, d=leave_date)
+        if not exists:
+            ops.execute(
+                "INSERT INTO joint_leave_schedules (year, name, leave_date, created_at) "
+                "VALUES (:y, :n, :d, CURRENT_TIMESTAMP)",
+                y=year, n=name, d=leave_date)
+
+
+@migration(9, "notifications indexes")
+def notification_indexes(ops):
+    ops.create_index("idx_notifications_user_id", "notifications", ["user_id"])
+    ops.create_index("idx_notifications_unread", "notifications", ["user_id", "is_read"])
+
+
+@migration(10, "quotation_revisions index")
+def quotation_revision_index(ops):
+    ops.create_index("ix_quotation_revisions_quotation_id", "quotation_revisions", ["quotation_id"])
+
+
+@migration(11, "surat_resmi inline images to uploads/surat")
+def surat_resmi_images(ops):
+    from upload_store import ingest_inline_images
+
+    if not ops.has_table("surat_resmi"):
+        return
+    for sid, html in ops.rows(
+            "SELECT id, content_html FROM surat_resmi WHERE content_html LIKE '%data:image/%'"):
+        new_html = ingest_inline_images(html) if not ops.dry_run else html
+        ops.echo(f"      surat_resmi #{sid}: {len(html)} karakter")
+        if new_html != html:
+            ops.execute("UPDATE surat_resmi SET content_html = :h WHERE id = :id", h=new_html, id=sid)
+
+
+
+@migration(12, "updated_at on reports, report_images, catalog_files")
+def updated_at_columns(ops):
+    # ETag / Last-Modified versions need a last-change time on every cached row
+    for table, source in [
+        ("reports", "created_at"),
+        ("report_images", "uploaded_at"),
+        ("catalog_files", "created_at"),
+    ]:
+        if ops.add_column(table, "updated_at", "TIMESTAMP"):
+            ops.execute(f"UPDATE {table} SET updated_at = {source} WHERE updated_at IS NULL")
+
+
+@migration(13, "updated_at indexes for conditional GET", transactional=False)
+def updated_at_indexes(ops):
+    # table_version() runs count + max(updated_at) per list request
+    for table in ["reports", "onsite_reports", "quotations", "surat_serah_terima",
+                  "surat_resmi", "stock_units", "catalog_files"]:
+        ops.create_index(f"ix_{table}_updated_at", table, ["updated_at"], concurrently=True)
+
+
+@migration(14, "upload_sessions (chunked uploads)")
+def upload_sessions(ops):
+    ops.create_all(tables=["upload_sessions"])
+
+
+@migration(15, "blobs (content-addressed uploads, reference counts)")
+def blobs(ops):
+    from upload_store import blob_digest, html_refs, resolve_upload
+
+    ops.create_all(tables=["blobs"])
+    # Count references that already point into blobs/ (surat images stored by 0011)
+    refs = {}
+    for table, column in [("report_images", "file_path"), ("catalog_files", "file_path")]:
+        if ops.has_table(table):
+            for (path,) in ops.rows(f"SELECT {column} FROM {table} WHERE {column} LIKE 'blobs/%'"):
+                refs[path] = refs.get(path, 0) + 1
+    if ops.has_table("surat_resmi"):
+        for (html,) in ops.rows("SELECT content_html FROM surat_resmi WHERE content_html LIKE '%/uploads/blobs/%'"):
+            for path in html_refs(html):
+                refs[path] = refs.get(path, 0) + 1
+    for path, count in refs.items():
+        digest = blob_digest(path)
+        if digest is None or (ops.has_table("blobs")
+                              and ops.scalar("SELECT 1 FROM blobs WHERE sha256 = :d", d=digest)):
+            continue
+        full = resolve_upload(path)
+        ops.execute(
+            "INSERT INTO blobs (sha256, path, size, ref_count, created_at, updated_at) "
+            "VALUES (:d, :p, :s, :n, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            d=digest, p=path, s=os.path.getsize(full) if full and os.path.exists(full) else None, n=count)
+
+
+def _count_ref(ops, rel_path):
+    from upload_store import blob_digest, resolve_upload
+
+    digest = blob_digest(rel_path)
+    if ops.scalar("SELECT 1 FROM blobs WHERE sha256 = :d", d=digest):
+        ops.execute("UPDATE blobs SET ref_count = ref_count + 1, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE sha256 = :d", d=digest)
+    else:
+        ops.execute(
+            "INSERT INTO blobs (sha256, path, size, ref_count, created_at, updated_at) "
+            "VALUES (:d, :p, :s, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            d=digest, p=rel_path, s=os.path.getsize(resolve_upload(rel_path)))
+
+
+@migration(16, "relocate flat uploads into blobs/", transactional=False)
+def relocate_uploads(ops):
+    # Copies, never moves: every row is repointed only after its blob exists,
+    # and committed together with its reference count (ops.atomic), so an
+    # interrupted run just continues. The originals are
+    # deleted afterwards by `flask uploads gc` once nothing references them.
+    from upload_store import blob_digest, html_refs, import_file, relocate_html
+
+    batch = 200
+    for table in ["report_images", "catalog_files"]:
+        if not ops.has_table(table):
+            continue
+        last, moved, missing = 0, 0, 0
+        while True:
+            rows = ops.rows(f"SELECT id, file_path FROM {table} WHERE id > :last ORDER BY id LIMIT {batch}",
+                            last=last)
+            if not rows:
+                break
+            for row_id, file_path in rows:
+                last = row_id
+                if not file_path or blob_digest(file_path):
+                    continue
+                if ops.dry_run:
+                    moved += 1
+                    continue
+                new_path = import_file(file_path)
+                if new_path is None:
+                    missing += 1
+                    continue
+                with ops.atomic() as tx:  # repointed and counted together, or not at all
+                    tx.execute(f"UPDATE {table} SET file_path = :p WHERE id = :id", p=new_path, id=row_id)
+                    _count_ref(tx, new_path)
+                moved += 1
+        ops.echo(f"      {table}: {moved} file {'akan ' if ops.dry_run else ''}dipindah, {missing} tidak ditemukan")
+
+    if not ops.has_table("surat_resmi"):
+        return
+    for sid, html in ops.rows("SELECT id, content_html FROM surat_resmi WHERE content_html LIKE '%/uploads/%'"):
+        if ops.dry_run:
+            continue
+        new_html, copied = relocate_html(html)
+        if copied:
+            with ops.atomic() as tx:
+                tx.execute("UPDATE surat_resmi SET content_html = :h WHERE id = :id", h=new_html, id=sid)
+                for rel_path in html_refs(new_html) - html_refs(html):
+                    _count_ref(tx, rel_path)
+            ops.echo(f"      surat_resmi #{sid}: {copied} gambar dipindah")
+
+
+@migration(17, "report_images.width, report_images.height")
+def report_image_size(ops):
+    # Diisi saat upload (photo_ingest); foto lama tetap NULL dan diukur saat render
+    ops.add_column("report_images", "width", "INTEGER")
+    ops.add_column("report_images", "height", "INTEGER")
+
+
+@migration(18, "report_images byte_size, mime_type, content_hash")
+def report_image_info(ops):
+    # Baris lama diisi dengan: flask --app app uploads backfill-images
+    ops.add_column("report_images", "byte_size", "BIGINT")
+    ops.add_column("report_images", "mime_type", "VARCHAR(100)")
+    ops.add_column("report_images", "content_hash", "VARCHAR(64)")
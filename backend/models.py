@@ -52,6 +52,7 @@ class Report(db.Model):
     data_json = db.Column(db.JSON)
     created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     images = db.relationship("ReportImage", backref="report", lazy=True)
 
@@ -63,7 +64,25 @@ class ReportImage(db.Model):
     report_id = db.Column(db.Integer, db.ForeignKey("reports.id"))
     file_path = db.Column(db.String(300))
     caption = db.Column(db.String(500), default="")   # ← NEW: image caption/annotation
+    width = db.Column(db.Integer)    # pixels after normalization at upload (photo_ingest)
+    height = db.Column(db.Integer)
+    byte_size = db.Column(db.BigInteger)
+    mime_type = db.Column(db.String(100))
+    content_hash = db.Column(db.String(64))   # SHA-256 of the stored file
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Blob(db.Model):
+    """One stored file in uploads/blobs/, shared by every row that references it (see upload_store)."""
+    __tablename__ = "blobs"
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(120), nullable=False)   # blobs/ab/cd/<sha256>.<ext>
+    size = db.Column(db.BigInteger)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class LeaveEntitlement(db.Model):
     __tablename__ = "leave_entitlements"
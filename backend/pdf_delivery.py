@@ -0,0 +1,157 @@
+"""
+backend/pdf_delivery.py
+Rendered PDFs: kept on disk, linearized, sent with Content-Length and ranges.
+
+The PDF routes used to render into a BytesIO and hand it to send_file / Response
+as a stream of unknown length. The browser could not show progress, could not
+fetch a byte range, and every download rendered the document again.
+
+pdf_response() now writes each render to PDF_CACHE_FOLDER, named after the
+document and its version (the same values conditional() uses for the ETag):
+
+    report-12-print-<hash>.pdf   onsite-3-screen-<hash>.pdf   quotation-7-rev2-<hash>.pdf
+
+Documents with photos are rendered per output profile (image_cache.OUTPUT_PROFILES,
+`?profile=screen|email|print`): downloads default to PDF_OUTPUT_PROFILE,
+previews to PDF_PREVIEW_PROFILE. Download and preview of the same profile
+share one file. Until the document changes, the next
+request is a plain file send: Content-Length is known, the body goes out in
+blocks, and Range requests get 206. An edit changes the version, so the next
+request renders a new file and deletes the older ones for that document.
+
+Because a file is served until the document changes, cached builders must not
+print the render time: their "Issued" / "Updated" stamp is issued_at(), the
+document's own updated_at in WIB, so every download of one version shows the
+same, correct time. Exports built fresh per request and never cached (the
+stock report, the quotation list PDF) keep printing the current time.
+
+With pikepdf installed (optional, `pip install pikepdf`) and PDF_LINEARIZE
+on, files are linearized ("fast web view"). A viewer that reads the stream
+progressively, or fetches ranges such as pdf.js, can then show page one
+before the last byte arrives. Without pikepdf, the ReportLab output is
+cached and sent unchanged.
+"""
+import glob
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+from flask import current_app, request, jsonify, send_file
+
+from http_cache import make_etag
+from image_cache import OUTPUT_PROFILES
+
+
+def _pikepdf():
+    """pikepdf (optional), imported on first render; None if missing."""
+    try:
+        import pikepdf
+    except ImportError:  # optional
+        return None
+    return pikepdf
+
+
+WIB = timezone(timedelta(hours=7))
+
+VERSION_LEN = 16
+# report-1-<version>.pdf only: not report-12-... nor quotation-7-rev2-...
+_VERSION_GLOB = "[0-9a-f]" * VERSION_LEN
+
+
+def issued_at(updated_at):
+    """Time a cached PDF prints (see module docstring): `updated_at` (naive UTC) in WIB."""
+    return (updated_at or datetime.utcnow()).replace(tzinfo=timezone.utc).astimezone(WIB)
+
+
+def cache_folder():
+    folder = os.path.abspath(current_app.config["PDF_CACHE_FOLDER"])
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _linearize(data):
+    """Linearized copy of the PDF bytes, or the bytes unchanged if pikepdf is missing / fails."""
+    if not current_app.config["PDF_LINEARIZE"]:
+        return data
+    pikepdf = _pikepdf()
+    if pikepdf is None:
+        return data
+    try:
+        out = BytesIO()
+        with pikepdf.open(BytesIO(data)) as pdf:
+            pdf.save(out, linearize=True)
+        return out.getvalue()
+    except Exception:
+        current_app.logger.exception("PDF linearization failed, sending as rendered")
+        return data
+
+
+def _store(name, version, data):
+    """Write the artifact atomically and drop older versions of the same document."""
+    folder = cache_folder()
+    path = os.path.join(folder, f"{name}-{version}.pdf")
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    for old in glob.glob(os.path.join(folder, f"{name}-{_VERSION_GLOB}.pdf")):
+        if old != path:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def cached_pdf(name, version, render):
+    """
+    Path of the rendered PDF for document `name` at `version` (a tuple of the
+    values it depends on), rendering it with render() → BytesIO if needed.
+    None if render() returns None. With PDF_CACHE off, every call renders
+    and the result is returned as a BytesIO instead.
+    """
+    version = make_etag(*version)[:VERSION_LEN]
+    path = os.path.join(cache_folder(), f"{name}-{version}.pdf")
+    if current_app.config["PDF_CACHE"] and os.path.exists(path):
+        return path
+    buf = render()
+    if buf is None:
+        return None
+    data = _linearize(buf.getvalue())
+    if not current_app.config["PDF_CACHE"]:
+        return BytesIO(data)
+    return _store(name, version, data)
+
+
+def pdf_response(name, version, render, download_name, inline=False):
+    """
+    Response for a document PDF (see module docstring), or None if render()
+    failed. inline=True for the preview endpoints.
+    """
+    path = cached_pdf(name, version, render)
+    if path is None:
+        return None
+    # etag=False: conditional() sets the document-version ETag on top
+    return send_file(path, mimetype="application/pdf", as_attachment=not inline,
+                     download_name=download_name, conditional=True, etag=False)
+
+
+def request_profile(preview=False):
+    """OutputProfile named by ?profile=, else the configured default; None for an unknown name."""
+    name = request.args.get("profile") or current_app.config[
+        "PDF_PREVIEW_PROFILE" if preview else "PDF_OUTPUT_PROFILE"]
+    return OUTPUT_PROFILES.get(name)
+
+
+def profile_error():
+    return jsonify({"error": f"profile must be one of {', '.join(OUTPUT_PROFILES)}"}), 400
+
+
+def purge_cache():
+    """Delete every cached PDF (e.g. after changing fonts or the logo outside a deploy)."""
+    removed = 0
+    for path in glob.glob(os.path.join(cache_folder(), "*.pdf")):
+        os.remove(path)
+        removed += 1
+    return removed
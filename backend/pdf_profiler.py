@@ -0,0 +1,216 @@
+"""
+backend/pdf_profiler.py
+Phase timers for the PDF builders.
+
+A builder decorated with @profiled("<doc type>") calls mark("load") once its
+rows are fetched and mark("flowables") just before doc.build(). It calls
+done(doc, buffer) right after doc.build(). Time spent decoding images and
+logos (image_cache, asset_registry) is split out into an "assets" phase
+wherever it happens. So a render is reported as
+
+    load · assets · flowables · build   + page count and PDF size
+
+Totals per document type appear in /metrics and /api/internal/pdf, and the
+phases of the current request are added to its Server-Timing header.
+
+A cProfile dump of one render is written to PDF_PROFILE_DIR when the
+request carries X-Profile-Pdf: 1 and passes the same guard as
+/api/internal (loopback or X-Metrics-Token).
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, current_app, request
+
+
+PHASES = ("load", "assets", "flowables", "build")
+
+_local = threading.local()
+
+
+class _Render:
+    __slots__ = ("doc_type", "started", "last", "asset_ms", "phases", "pages", "size")
+
+    def __init__(self, doc_type):
+        self.doc_type = doc_type
+        self.started = self.last = time.perf_counter()
+        self.asset_ms = 0.0   # asset time not yet attributed to a phase
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.pages = 0
+        self.size = 0
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        elapsed = (now - self.last) * 1000
+        self.phases["assets"] += self.asset_ms
+        self.phases[phase] += max(elapsed - self.asset_ms, 0.0)
+        self.asset_ms = 0.0
+        self.last = now
+
+
+class _DocStats:
+    __slots__ = ("renders", "errors", "pages", "bytes", "total_ms", "max_ms", "phases")
+
+    def __init__(self):
+        self.renders = 0
+        self.errors = 0
+        self.pages = 0
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+
+class PdfMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs = {}
+        self.profile_dir = "profiles"
+
+    def init_app(self, app):
+        self.profile_dir = app.config.get("PDF_PROFILE_DIR", self.profile_dir)
+        app.extensions["pdf_metrics"] = self
+        app.after_request(_server_timing)
+
+    def record(self, render, total_ms, failed=False):
+        with self._lock:
+            ds = self._docs.get(render.doc_type)
+            if ds is None:
+                ds = self._docs[render.doc_type] = _DocStats()
+            if failed:
+                ds.errors += 1
+                return
+            ds.renders += 1
+            ds.pages += render.pages
+            ds.bytes += render.size
+            ds.total_ms += total_ms
+            ds.max_ms = max(ds.max_ms, total_ms)
+            for phase, ms in render.phases.items():
+                ds.phases[phase] += ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                doc_type: {
+                    "renders": ds.renders,
+                    "errors": ds.errors,
+                    "pages": ds.pages,
+                    "bytes": ds.bytes,
+                    "total_ms": round(ds.total_ms, 2),
+                    "avg_ms": round(ds.total_ms / ds.renders, 2) if ds.renders else 0.0,
+                    "max_ms": round(ds.max_ms, 2),
+                    "phases_ms": {p: round(ms, 2) for p, ms in ds.phases.items()},
+                }
+                for doc_type, ds in self._docs.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._docs.clear()
+
+
+pdf_metrics = PdfMetrics()
+
+
+# ── builder hooks ────────────────────────────────────────────────────────────
+def profiled(doc_type):
+    """Decorator for a PDF builder; a nested call (merged exports) is timed by the outer one."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "render", None) is not None:
+                return fn(*args, **kwargs)
+            render = _local.render = _Render(doc_type)
+            profile = _start_cprofile()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                pdf_metrics.record(render, 0, failed=True)
+                raise
+            finally:
+                _local.render = None
+                if profile is not None:
+                    _dump_cprofile(profile, doc_type)
+            if render.size:  # builder reached done() — not a 404 / early return
+                total_ms = (time.perf_counter() - render.started) * 1000
+                render.mark("build")  # anything after done() (e.g. seek) counts as build
+                pdf_metrics.record(render, total_ms)
+                _add_server_timing(render)
+            return result
+        return wrapper
+    return wrap
+
+
+def mark(phase):
+    """End the current phase of the active render (no-op outside @profiled)."""
+    render = getattr(_local, "render", None)
+    if render is not None:
+        render.mark(phase)
+
+
+def done(doc, buffer):
+    """Call right after doc.build(): closes the build phase and records pages / size."""
+    render = getattr(_local, "render", None)
+    if render is None:
+        return
+    render.mark("build")
+    render.pages = getattr(doc, "page", 0)
+    render.size = buffer.getbuffer().nbytes
+
+
+@contextmanager
+def asset_timer():
+    """Wrap image/logo decoding so its time is reported as the assets phase."""
+    render = getattr(_local, "render", None)
+    if render is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        render.asset_ms += (time.perf_counter() - t0) * 1000
+
+
+# ── request integration ──────────────────────────────────────────────────────
+def _add_server_timing(render):
+    if has_request_context():
+        g.setdefault("_pdf_renders", []).append(render)
+
+
+def _server_timing(response):
+    renders = g.pop("_pdf_renders", None)
+    if renders:
+        for r in renders:
+            response.headers.add("Server-Timing", ", ".join(
+                f'pdf-{p};dur={r.phases[p]:.1f}' for p in PHASES
+            ) + f', pdf;desc="{r.doc_type} {r.pages}p {r.size}B"')
+    return response
+
+
+def _profiling_requested():
+    if not has_request_context() or request.headers.get("X-Profile-Pdf") != "1":
+        return False
+    from routes.internal import is_internal_request
+    return is_internal_request()
+
+
+def _start_cprofile():
+    if not _profiling_requested():
+        return None
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+
+def _dump_cprofile(profile, doc_type):
+    profile.disable()
+    os.makedirs(pdf_metrics.profile_dir, exist_ok=True)
+    path = os.path.join(pdf_metrics.profile_dir,
+                        f"{doc_type}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+    profile.dump_stats(path)
+    current_app.logger.info("PDF profile written to %s (view: python -m pstats %s)", path, path)
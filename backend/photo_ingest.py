@@ -0,0 +1,181 @@
+"""
+backend/photo_ingest.py
+Normalization of report photos at upload.
+
+Phone photos arrive with an EXIF orientation flag instead of rotated pixels,
+a large embedded thumbnail, GPS and camera metadata, and sometimes a CMYK or
+wide-gamut colour space. ReportLab ignores all of that, so photos printed
+sideways and every render carried the extra bytes.
+
+normalize_photo() applies the orientation to the pixels, converts to sRGB /
+RGB and re-encodes without metadata: JPEG at PHOTO_JPEG_QUALITY for photos,
+PNG for screenshots and drawings (PNG, GIF) so text stays sharp. The pixel
+size, byte size, MIME type and SHA-256 are stored on ReportImage, so the PDF
+layout and the frontend can size a photo without opening the file. Rows
+from before this are filled in by `flask uploads backfill-images`.
+
+Anything PIL cannot read is stored unchanged, as before.
+"""
+import hashlib
+import mimetypes
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from flask import current_app
+
+from image_cache import LOSSLESS_FORMATS
+from upload_store import save_bytes, save_file, save_stream, file_ext, locate, blob_digest, COPY_BLOCK
+
+
+NormalizedPhoto = namedtuple("NormalizedPhoto", ["data", "ext", "width", "height"])
+# Field names match the ReportImage columns
+StoredPhoto = namedtuple("StoredPhoto", ["file_path", "width", "height", "byte_size",
+                                         "mime_type", "content_hash"])
+
+# Accepted as report photos (upload init checks the name and declared type up front)
+PHOTO_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic", ".heif"}
+
+
+def photo_type_error(filename, mime_type=None):
+    """Error message if `filename` / the client-declared MIME type is not a photo, else None."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in PHOTO_EXTENSIONS:
+        return f"File type not allowed for a report photo: {ext or filename}"
+    if mime_type and not mime_type.lower().startswith("image/"):
+        return f"File type not allowed for a report photo: {mime_type}"
+    return None
+
+
+def _to_srgb(pil):
+    """Convert pixels with an embedded non-sRGB ICC profile (Adobe RGB, Display P3, CMYK) to sRGB."""
+    icc = pil.info.get("icc_profile")
+    if not icc:
+        return pil
+    try:
+        from PIL import ImageCms
+        src = ImageCms.ImageCmsProfile(BytesIO(icc))
+        if "srgb" in ImageCms.getProfileDescription(src).lower():
+            return pil
+        mode = "RGBA" if pil.mode in ("RGBA", "LA", "PA") else "RGB"
+        return ImageCms.profileToProfile(pil, src, ImageCms.createProfile("sRGB"), outputMode=mode)
+    except Exception:
+        return pil  # broken profile or no littlecms: keep the pixels as they are
+
+
+def normalize_photo(src, quality=88):
+    """
+    NormalizedPhoto for the image in `src` (a path or a seekable file-like
+    object), or None if it is not an image PIL can read. PIL reads the file
+    as it decodes, so the upload itself is never held in memory.
+    """
+    from PIL import Image as PILImage, ImageOps
+
+    try:
+        with PILImage.open(src) as opened:
+            fmt = opened.format
+            pil = _to_srgb(ImageOps.exif_transpose(opened))  # a decoded copy
+    except Exception:
+        return None
+
+    buf = BytesIO()
+    if fmt in LOSSLESS_FORMATS:
+        has_alpha = pil.mode in ("RGBA", "LA", "PA") or (pil.mode == "P" and "transparency" in pil.info)
+        pil = pil.convert("RGBA" if has_alpha else "RGB")
+        pil.save(buf, format="PNG", optimize=True)
+        ext = "png"
+    else:
+        if pil.mode in ("RGBA", "LA", "PA", "P"):
+            pil = pil.convert("RGBA")
+            flat = PILImage.new("RGB", pil.size, (255, 255, 255))
+            flat.paste(pil, mask=pil.split()[3])
+            pil = flat
+        elif pil.mode != "RGB":
+            pil = pil.convert("RGB")
+        # No exif / icc_profile passed: the saved file carries pixels only
+        pil.save(buf, format="JPEG", quality=quality, optimize=True)
+        ext = "jpg"
+    return NormalizedPhoto(buf.getvalue(), ext, pil.size[0], pil.size[1])
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stored(file_path, width, height):
+    path = locate(file_path)
+    return StoredPhoto(file_path, width, height, os.path.getsize(path),
+                       mimetypes.guess_type(path)[0] or "application/octet-stream",
+                       blob_digest(file_path) or _sha256(path))
+
+
+def save_photo(src, filename):
+    """
+    Normalize and store an uploaded photo. `src` is a file-like object
+    (multipart upload) or the path of a finished chunked upload, which is
+    consumed. Returns a StoredPhoto; width / height are None for a file that
+    is not a readable image and was stored unchanged.
+    """
+    is_path = isinstance(src, str)
+    photo = normalize_photo(src, current_app.config["PHOTO_JPEG_QUALITY"])
+    if photo is None:
+        if is_path:
+            return _stored(save_file(src, file_ext(filename)), None, None)
+        src.seek(0)
+        return _stored(save_stream(src, file_ext(filename)), None, None)
+
+    file_path = save_bytes(photo.data, photo.ext)
+    if is_path:
+        os.remove(src)
+    return _stored(file_path, photo.width, photo.height)
+
+
+def describe_photo(file_path):
+    """
+    StoredPhoto for a file already in the store, read from its header only
+    (no pixel decode). The size is as displayed, i.e. after EXIF rotation.
+    None if the file is gone.
+    """
+    from PIL import Image as PILImage
+
+    path = locate(file_path)
+    if not os.path.exists(path):
+        return None
+    width = height = None
+    try:
+        with PILImage.open(path) as pil:
+            width, height = pil.size
+            if pil.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+    except Exception:
+        pass
+    return _stored(file_path, width, height)
+
+
+def backfill_image_info(batch_size=500, echo=print):
+    """Fill width / height / byte_size / mime_type / content_hash on older ReportImage rows."""
+    from extensions import db
+    from models import ReportImage
+
+    last, updated, missing = 0, 0, 0
+    while True:
+        rows = (ReportImage.query.filter(ReportImage.id > last, ReportImage.byte_size.is_(None))
+                .order_by(ReportImage.id).limit(batch_size).all())
+        if not rows:
+            break
+        for img in rows:
+            last = img.id
+            info = describe_photo(img.file_path) if img.file_path else None
+            if info is None:
+                missing += 1
+                continue
+            for field in ("width", "height", "byte_size", "mime_type", "content_hash"):
+                setattr(img, field, getattr(info, field))
+            updated += 1
+        db.session.commit()
+        echo(f"   … {updated} foto")
+    return updated, missing
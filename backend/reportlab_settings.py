@@ -0,0 +1,10 @@
+"""
+backend/reportlab_settings.py
+ReportLab configuration overrides. reportlab.rl_config imports this module
+(by name, from sys.path) the first time ReportLab is loaded, so the settings
+apply to every PDF builder without importing ReportLab at startup.
+"""
+
+# Write image and page streams as binary instead of ASCII85: 25% smaller, and
+# without the optional rl_accel extension the armour is encoded in pure Python.
+useA85 = 0
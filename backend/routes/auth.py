@@ -5,6 +5,7 @@ from flask_jwt_extended import (
     create_access_token, jwt_required, get_jwt_identity
 )
 from werkzeug.security import generate_password_hash, check_password_hash
+from cache import cached, invalidate, list_key
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -32,6 +33,7 @@ def register():
     )
     db.session.add(new_user)
     db.session.commit()
+    invalidate(User, new_user.id)
     return jsonify({"message": "User registered successfully"}), 201
 
 
@@ -122,6 +124,7 @@ def update_profile():
         user.password_hash = generate_password_hash(data['new_password'])
 
     db.session.commit()
+    invalidate(User, user_id)
     return jsonify({
         "message":  "Profil berhasil diperbarui",
         "name":     user.name,
@@ -138,13 +141,12 @@ def list_users():
     if not me:
         return jsonify({"error": "Access denied"}), 403
 
-    users = User.query.order_by(User.name).all()
-    return jsonify([{
+    return jsonify(cached(list_key(User), lambda: [{
         "id":       u.id,
         "name":     u.name,
         "username": u.username,
         "role":     u.role or "engineer",
-    } for u in users]), 200
+    } for u in User.query.order_by(User.name).all()])), 200
 
 # ── CREATE USER (Admin only) ──────────────────────────────────────────────────
 @auth_bp.route('/users/create', methods=['POST'])
@@ -182,6 +184,7 @@ def create_user():
     )
     db.session.add(new_user)
     db.session.commit()
+    invalidate(User, new_user.id)
     return jsonify({
         "message":  f"User '{username}' berhasil dibuat",
         "id":       new_user.id,
@@ -208,6 +211,7 @@ def delete_user(uid):
 
     db.session.delete(target)
     db.session.commit()
+    invalidate(User, uid)
     return jsonify({"message": f"User '{target.username}' berhasil dihapus"}), 200
 
 
@@ -234,6 +238,7 @@ def update_user(uid):
         target.password_hash = generate_password_hash(data['new_password'])
 
     db.session.commit()
+    invalidate(User, uid)
     return jsonify({
         "message":  "User berhasil diperbarui",
         "id":       target.id,
@@ -1,9 +1,12 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify
 from extensions import db
 from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
+from http_cache import conditional, table_version
+from file_delivery import send_upload
+from upload_store import save_stream, locate, acquire, discard
 
 catalog_bp = Blueprint('catalog', __name__)
 
@@ -23,6 +26,7 @@ class CatalogFile(db.Model):
     file_path = db.Column(db.String(500))
     file_size = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 def file_to_dict(f):
@@ -38,8 +42,38 @@ def file_to_dict(f):
 @catalog_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_files():
-    files = CatalogFile.query.order_by(CatalogFile.created_at.desc()).all()
-    return jsonify([file_to_dict(f) for f in files]), 200
+    def build():
+        files = CatalogFile.query.order_by(CatalogFile.created_at.desc()).all()
+        return jsonify([file_to_dict(f) for f in files]), 200
+
+    return conditional(build, table_version(CatalogFile))
+
+
+def catalog_filename(original_name):
+    """Download name for an uploaded file (the bytes themselves live in the blob store)."""
+    filename = secure_filename(original_name)
+    # Add timestamp so same-named uploads stay distinguishable
+    base, extension = os.path.splitext(filename)
+    return f"{base}_{int(datetime.utcnow().timestamp())}{extension}"
+
+
+def add_catalog_file(filename, file_path, form):
+    """Record a stored file (blobs/... path); form holds title / brand / ... (multipart or chunked upload)."""
+    cf = CatalogFile(
+        title=form.get("title") or filename,
+        brand=form.get("brand"),
+        model_series=form.get("model_series"),
+        document_type=form.get("document_type") or "catalog",
+        description=form.get("description"),
+        tags=form.get("tags"),
+        filename=filename,
+        file_path=file_path,
+        file_size=os.path.getsize(locate(file_path)),
+    )
+    db.session.add(cf)
+    acquire(file_path)
+    db.session.commit()
+    return cf
 
 
 @catalog_bp.route('/upload', methods=['POST'])
@@ -56,32 +90,8 @@ def upload_file():
     if ext not in ALLOWED_EXTENSIONS:
         return jsonify({"error": f"File type not allowed: {ext}"}), 400
 
-    # Save to catalog subfolder
-    catalog_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "catalog")
-    os.makedirs(catalog_folder, exist_ok=True)
-
-    filename = secure_filename(file.filename)
-    # Add timestamp to avoid collision
-    base, extension = os.path.splitext(filename)
-    filename = f"{base}_{int(datetime.utcnow().timestamp())}{extension}"
-    file_path = os.path.join(catalog_folder, filename)
-    file.save(file_path)
-
-    file_size = os.path.getsize(file_path)
-
-    cf = CatalogFile(
-        title=request.form.get("title", filename),
-        brand=request.form.get("brand"),
-        model_series=request.form.get("model_series"),
-        document_type=request.form.get("document_type", "catalog"),
-        description=request.form.get("description"),
-        tags=request.form.get("tags"),
-        filename=filename,
-        file_path=file_path,
-        file_size=file_size,
-    )
-    db.session.add(cf)
-    db.session.commit()
+    file_path = save_stream(file.stream, ext.lstrip("."))
+    cf = add_catalog_file(catalog_filename(file.filename), file_path, request.form)
 
     return jsonify({"message": "File uploaded", "id": cf.id}), 201
 
@@ -91,9 +101,12 @@ def upload_file():
 def download_file(fid):
     cf = CatalogFile.query.get(fid)
     if not cf: return jsonify({"error": "Not found"}), 404
-    if not os.path.exists(cf.file_path):
+    path = locate(cf.file_path)
+    if not os.path.exists(path):
         return jsonify({"error": "File not found on server"}), 404
-    return send_file(cf.file_path, as_attachment=True, download_name=cf.filename)
+    # The bytes behind an id never change (blob store / timestamped legacy names)
+    return send_upload(path, download_name=cf.filename, as_attachment=True,
+                       immutable=True, private=True)
 
 
 @catalog_bp.route('/delete/<int:fid>', methods=['DELETE'])
@@ -101,12 +114,7 @@ def download_file(fid):
 def delete_file(fid):
     cf = CatalogFile.query.get(fid)
     if not cf: return jsonify({"error": "Not found"}), 404
-    # Delete physical file
-    try:
-        if os.path.exists(cf.file_path):
-            os.remove(cf.file_path)
-    except Exception:
-        pass
+    discard(cf.file_path)
     db.session.delete(cf)
     db.session.commit()
     return jsonify({"message": "Deleted"}), 200
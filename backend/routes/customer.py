@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from cache import cached, invalidate, list_key
 
 customer_bp = Blueprint('customer', __name__)
 
@@ -39,10 +40,11 @@ def cust_to_dict(c):
 @jwt_required()
 def list_customers():
     q = request.args.get('q', '').lower()
-    qs = Customer.query.order_by(Customer.company_name).all()
-    result = [cust_to_dict(c) for c in qs
-              if not q or q in (c.company_name or '').lower()
-              or q in (c.email or '').lower()]
+    customers = cached(list_key(Customer),
+                       lambda: [cust_to_dict(c) for c in Customer.query.order_by(Customer.company_name).all()])
+    result = [c for c in customers
+              if not q or q in (c["company_name"] or '').lower()
+              or q in (c["email"] or '').lower()]
     return jsonify(result), 200
 
 @customer_bp.route('/create', methods=['POST'])
@@ -63,6 +65,7 @@ def create_customer():
     )
     db.session.add(c)
     db.session.commit()
+    invalidate(Customer, c.id)
     return jsonify({"message": "Customer berhasil ditambahkan", "id": c.id, "customer": cust_to_dict(c)}), 201
 
 @customer_bp.route('/update/<int:cid>', methods=['PUT'])
@@ -75,6 +78,7 @@ def update_customer(cid):
         if f in data: setattr(c, f, data[f])
     c.updated_at = datetime.utcnow()
     db.session.commit()
+    invalidate(Customer, cid)
     return jsonify({"message": "Updated", "customer": cust_to_dict(c)}), 200
 
 @customer_bp.route('/delete/<int:cid>', methods=['DELETE'])
@@ -84,4 +88,5 @@ def delete_customer(cid):
     if not c: return jsonify({"error": "Not found"}), 404
     db.session.delete(c)
     db.session.commit()
+    invalidate(Customer, cid)
     return jsonify({"message": "Deleted"}), 200
@@ -0,0 +1,187 @@
+"""
+backend/routes/dashboard.py
+Landing-page numbers in one request.
+
+    GET /api/dashboard/summary
+
+Dashboard.jsx used to fetch six full /list endpoints (every report,
+quotation, stock unit ...) only to count them in the browser. The summary
+is now computed in SQL: one GROUP BY per table, a single statement for the
+plain counts, and LIMIT 4 for the recent rows.
+
+The result is kept in process for DASHBOARD_CACHE_TTL seconds. A commit
+that inserts, updates or deletes a row of one of the summarized tables
+drops it (SQLAlchemy session events), so an edit shows up on the next
+load. Other gunicorn workers, and bulk query.update() / raw SQL writes,
+are only covered by the TTL.
+"""
+import threading
+import time
+from datetime import datetime
+from itertools import chain
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Report, LeaveRequest
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+# Tables the summary reads; a committed change to any of them invalidates it
+SUMMARY_TABLES = {"reports", "onsite_reports", "quotations", "stock_units", "catalog_files",
+                  "surat_serah_terima", "leave_requests"}
+PIPELINE_STAGES = ("draft", "sent", "followup")
+RECENT = 4
+
+
+class SummaryCache:
+    """One cached value with a TTL, dropped after a commit that touches SUMMARY_TABLES."""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._value = None
+        self._expires = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get("DASHBOARD_CACHE_TTL", self.ttl))
+        app.extensions["dashboard_cache"] = self
+
+    def get(self, build):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            generation = self._generation
+        # Built outside the lock; two concurrent misses both query, the later one wins
+        value = build()
+        with self._lock:
+            # not kept if a commit invalidated the cache while this was being built
+            if self.ttl > 0 and generation == self._generation:
+                self._value, self._expires = value, time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {"entries": int(self._value is not None), "ttl": self.ttl, "hits": self.hits,
+                    "misses": self.misses, "invalidations": self.invalidations}
+
+
+summary_cache = SummaryCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_summary_writes(session, flush_context):
+    # new / dirty / deleted still hold what was just flushed
+    if session.info.get("dashboard_dirty"):
+        return
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, "__tablename__", None) in SUMMARY_TABLES:
+            session.info["dashboard_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_summary(session):
+    if session.info.pop("dashboard_dirty", False):
+        summary_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_summary_writes(session):
+    session.info.pop("dashboard_dirty", None)
+
+
+def _grouped(column, default, *aggregates):
+    """{group value: count} (or {value: (count, *aggregates)}) for one GROUP BY."""
+    key = func.coalesce(column, default)
+    rows = db.session.query(key, func.count(), *aggregates).group_by(key).all()
+    if not aggregates:
+        return {k: n for k, n in rows}
+    return {k: rest for k, *rest in rows}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def build_summary():
+    from routes.onsite_report import OnsiteReport
+    from routes.quotation import Quotation
+    from routes.stock import StockUnit
+    from routes.catalog import CatalogFile
+    from routes.surat_serah_terima import SuratSerahTerima
+
+    rtype_key, key = func.coalesce(Report.report_type, "other"), func.coalesce(Report.status, "draft")
+    by_type, by_status = {}, {}
+    for rtype, status, n in (db.session.query(rtype_key, key, func.count())
+                             .group_by(rtype_key, key).all()):
+        by_type[rtype] = by_type.get(rtype, 0) + n
+        by_status[status] = by_status.get(status, 0) + n
+
+    onsite = _grouped(OnsiteReport.status, "draft")
+    stock = _grouped(StockUnit.status, "available")
+    quotes = {st: {"count": n, "value": float(v or 0)}
+              for st, (n, v) in _grouped(Quotation.status, "draft", func.sum(Quotation.total_amount)).items()}
+
+    counts = db.session.execute(select(
+        select(func.count(CatalogFile.id)).scalar_subquery(),
+        select(func.count(SuratSerahTerima.id)).scalar_subquery(),
+        select(func.count(LeaveRequest.id)).where(LeaveRequest.status == "pending").scalar_subquery(),
+    )).one()
+
+    recent_reports = (db.session.query(Report.id, Report.report_number, Report.client_name, Report.report_type)
+                      .order_by(Report.created_at.desc()).limit(RECENT).all())
+    recent_onsite = (db.session.query(OnsiteReport.id, OnsiteReport.report_number, OnsiteReport.client_name,
+                                      OnsiteReport.site_location, OnsiteReport.status, OnsiteReport.visit_date)
+                     .order_by(OnsiteReport.created_at.desc()).limit(RECENT).all())
+    recent_quotes = (db.session.query(Quotation.id, Quotation.quotation_number, Quotation.customer_company,
+                                      Quotation.status, Quotation.total_amount)
+                     .order_by(Quotation.created_at.desc()).limit(RECENT).all())
+    recent_surat = (db.session.query(SuratSerahTerima.id, SuratSerahTerima.surat_number,
+                                     SuratSerahTerima.surat_type, SuratSerahTerima.surat_date,
+                                     SuratSerahTerima.pihak_pertama_nama, SuratSerahTerima.pihak_pertama_perusahaan,
+                                     SuratSerahTerima.pihak_kedua_nama, SuratSerahTerima.pihak_kedua_perusahaan)
+                    .order_by(SuratSerahTerima.created_at.desc()).limit(RECENT).all())
+
+    return {
+        "reports": {"total": sum(by_type.values()), "by_type": by_type, "by_status": by_status},
+        "onsite": {"total": sum(onsite.values()), "by_status": onsite},
+        "quotations": {
+            "total": sum(q["count"] for q in quotes.values()),
+            "by_status": quotes,
+            "won_value": quotes.get("won", {}).get("value", 0.0),
+            "pipeline_value": sum(quotes.get(st, {}).get("value", 0.0) for st in PIPELINE_STAGES),
+        },
+        "stock": {"total": sum(stock.values()), "by_status": stock},
+        "catalog": {"total": counts[0]},
+        "surat": {"total": counts[1]},
+        "leave": {"pending": counts[2]},
+        "recent": {
+            "reports": [r._asdict() for r in recent_reports],
+            "onsite": [dict(r._asdict(), visit_date=_iso(r.visit_date)) for r in recent_onsite],
+            "quotations": [r._asdict() for r in recent_quotes],
+            "surat": [dict(r._asdict(), surat_date=_iso(r.surat_date)) for r in recent_surat],
+        },
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+@dashboard_bp.route("/summary", methods=["GET"])
+@jwt_required()
+def summary():
+    return jsonify(summary_cache.get(build_summary)), 200
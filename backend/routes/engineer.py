@@ -3,6 +3,7 @@ from extensions import db
 from models import Engineer
 from flask_jwt_extended import jwt_required
 from datetime import datetime
+from cache import cached, invalidate, list_key
 
 engineer_bp = Blueprint('engineer', __name__)
 
@@ -11,6 +12,10 @@ engineer_bp = Blueprint('engineer', __name__)
 @engineer_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_engineers():
+    return jsonify(cached(list_key(Engineer), _engineer_list)), 200
+
+
+def _engineer_list():
     engineers = Engineer.query.order_by(Engineer.created_at.desc()).all()
     result = []
     for e in engineers:
@@ -29,7 +34,7 @@ def get_engineers():
             "has_signature": bool(e.signature_data),
             "created_at": e.created_at.isoformat() if e.created_at else None
         })
-    return jsonify(result), 200
+    return result
 
 
 # GET SINGLE ENGINEER
@@ -84,6 +89,7 @@ def create_engineer():
 
     db.session.add(new_eng)
     db.session.commit()
+    invalidate(Engineer, new_eng.id)
 
     return jsonify({"message": "Engineer created", "id": new_eng.id}), 201
 
@@ -111,6 +117,7 @@ def update_engineer(engineer_id):
     e.updated_at = datetime.utcnow()
 
     db.session.commit()
+    invalidate(Engineer, engineer_id)
     return jsonify({"message": "Engineer updated"}), 200
 
 
@@ -126,6 +133,7 @@ def save_signature(engineer_id):
     e.signature_data = data.get("signature_data")
     e.updated_at = datetime.utcnow()
     db.session.commit()
+    invalidate(Engineer, engineer_id)
 
     return jsonify({"message": "Signature saved"}), 200
 
@@ -140,4 +148,5 @@ def delete_engineer(engineer_id):
 
     db.session.delete(e)
     db.session.commit()
+    invalidate(Engineer, engineer_id)
     return jsonify({"message": "Engineer deleted"}), 200
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+backend/routes/export.py
+Merged PDF export: every service / commissioning / ... report and onsite
+report for one client or project in a single bookmarked PDF.
+
+    POST /api/export/merged
+        {client?, project?, date_from?, date_to?, include_onsite?: true,
+         report_ids?: [...], onsite_ids?: [...], profile?: "screen" | "email" | "print"}
+
+client matches Report.client_name and OnsiteReport.client_name /
+client_company. project matches Report.project_name and
+OnsiteReport.site_location (onsite reports have no project field). Dates
+filter report_date / visit_date. Explicit ids are used instead of the
+filter when given (e.g. the selection on the Reports page) and must be
+lists of integers.
+
+Each document is taken from the rendered-PDF cache (pdf_delivery), the same
+file /api/report/pdf/<id>?profile=... would send (profile defaults to
+PDF_OUTPUT_PROFILE). Missing ones are rendered in
+PDF_EXPORT_WORKERS threads, each with its own app context and session. The
+merge starts on the first document as soon as it is ready. The result is a
+table of contents page, then the documents, grouped by type in date order,
+with one bookmark per type and per document. It is written to an anonymous
+temp file and sent with Content-Length. An export is refused (413) above
+PDF_EXPORT_MAX_DOCS documents, or once the documents merged so far exceed
+PDF_EXPORT_MAX_SIZE bytes; rendering then stops.
+
+Merging needs pypdf (optional, `pip install pypdf`); without it the
+endpoint answers 501.
+"""
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from flask import Blueprint, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required
+
+from extensions import db
+from models import Report
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import pdf_version
+from pdf_delivery import cached_pdf, cache_folder, profile_error
+from image_cache import OUTPUT_PROFILES
+
+
+def _pypdf():
+    """pypdf (optional), imported on first export since it loads PIL; None if missing."""
+    try:
+        import pypdf
+    except ImportError:  # optional
+        return None
+    return pypdf
+
+
+export_bp = Blueprint("export", __name__)
+
+TYPE_LABELS = {
+    "commissioning":   "Commissioning Report",
+    "investigation":   "Investigation Report",
+    "troubleshooting": "Troubleshooting Report",
+    "service":         "Service Report",
+    "onsite":          "Onsite Report",
+}
+
+# One document of the export; `version` / `name` as used by pdf_delivery, `output` an OutputProfile
+Doc = namedtuple("Doc", ["kind", "id", "number", "client", "project", "date", "name", "version", "output"])
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _id_list(value):
+    """True if `value` is absent or a list of integer ids (bools excluded)."""
+    return value is None or (isinstance(value, list)
+                             and all(isinstance(v, int) and not isinstance(v, bool) for v in value))
+
+
+def _pdf_size(pdf):
+    """Bytes of a cached PDF as returned by cached_pdf(): a file path or a BytesIO."""
+    return os.path.getsize(pdf) if isinstance(pdf, str) else pdf.getbuffer().nbytes
+
+
+def _collect(data, output):
+    from routes.report import _report_version
+    from routes.onsite_report import OnsiteReport, _version as onsite_version
+
+    client = (data.get("client") or "").strip()
+    project = (data.get("project") or "").strip()
+    date_from = _parse_date(data.get("date_from"))
+    date_to = _parse_date(data.get("date_to"))
+    report_ids, onsite_ids = data.get("report_ids"), data.get("onsite_ids")
+    explicit = report_ids is not None or onsite_ids is not None
+
+    docs = []
+    query = Report.query
+    if explicit:
+        query = query.filter(Report.id.in_(report_ids or []))
+    else:
+        if client: query = query.filter(Report.client_name.ilike(f"%{client}%"))
+        if project: query = query.filter(Report.project_name.ilike(f"%{project}%"))
+        if date_from: query = query.filter(Report.report_date >= date_from)
+        if date_to: query = query.filter(Report.report_date <= date_to)
+    for r in query.all():
+        docs.append(Doc(r.report_type, r.id, r.report_number, r.client_name, r.project_name,
+                        r.report_date, f"report-{r.id}-{output.name}",
+                        (*_report_version(r), pdf_version(), output), output))
+
+    if explicit or data.get("include_onsite", True):
+        query = OnsiteReport.query
+        if explicit:
+            query = query.filter(OnsiteReport.id.in_(onsite_ids or []))
+        else:
+            if client:
+                query = query.filter(db.or_(OnsiteReport.client_name.ilike(f"%{client}%"),
+                                            OnsiteReport.client_company.ilike(f"%{client}%")))
+            if project: query = query.filter(OnsiteReport.site_location.ilike(f"%{project}%"))
+            if date_from: query = query.filter(OnsiteReport.visit_date >= date_from)
+            if date_to: query = query.filter(OnsiteReport.visit_date <= date_to)
+        for o in query.all():
+            docs.append(Doc("onsite", o.id, o.report_number, o.client_company or o.client_name,
+                            o.site_location, o.visit_date, f"onsite-{o.id}-{output.name}",
+                            (*onsite_version(o), pdf_version(), output), output))
+
+    order = list(TYPE_LABELS)
+    docs.sort(key=lambda d: (order.index(d.kind) if d.kind in order else len(order),
+                             d.date or datetime.max.date(), d.number or ""))
+    return docs
+
+
+def _render(app, doc):
+    """Cached PDF (path or BytesIO) for one document; runs in a worker thread."""
+    from routes.report import build_report_pdf
+    from routes.onsite_report import build_onsite_pdf
+
+    builder = build_onsite_pdf if doc.kind == "onsite" else build_report_pdf
+    with app.app_context():
+        try:
+            return cached_pdf(doc.name, doc.version, lambda: builder(doc.id, doc.output))
+        except Exception:
+            # One broken report should not sink the whole export; it is left out and counted
+            app.logger.exception("merged export: %s failed to render", doc.name)
+            return None
+
+
+@profiled("merged_toc")
+def build_toc_pdf(title, subtitle, entries):
+    """
+    Table of contents: `entries` are (group label, None, None) headings and
+    (number, description, first page) rows.
+    """
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+
+    pdf_profiler.mark("load")
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm,
+                            leftMargin=2*cm, rightMargin=2*cm, title=title)
+    primary = colors.HexColor("#0B3D91")
+    text_c = colors.HexColor("#374151")
+    gray_c = colors.HexColor("#6B7280")
+    accent = colors.HexColor("#EEF3FB")
+    border = colors.HexColor("#D1D5DB")
+
+    title_s = ParagraphStyle("TocTitle", fontName="Helvetica-Bold", fontSize=16, textColor=primary, leading=20)
+    sub_s = ParagraphStyle("TocSub", fontName="Helvetica", fontSize=9, textColor=gray_c, leading=12)
+    cell_s = ParagraphStyle("TocCell", fontName="Helvetica", fontSize=9, textColor=text_c, leading=12)
+    group_s = ParagraphStyle("TocGroup", fontName="Helvetica-Bold", fontSize=9.5, textColor=primary, leading=12)
+
+    rows, style = [], [
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ALIGN", (2, 0), (2, -1), "RIGHT"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.2, border),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]
+    for number, description, page in entries:
+        if description is None:
+            style += [("SPAN", (0, len(rows)), (-1, len(rows))),
+                      ("BACKGROUND", (0, len(rows)), (-1, len(rows)), accent)]
+            rows.append([Paragraph(number, group_s), "", ""])
+        else:
+            rows.append([Paragraph(escape(number or "-"), cell_s), Paragraph(escape(description), cell_s), str(page)])
+
+    elements = [Paragraph(title, title_s), Spacer(1, 0.2*cm), Paragraph(escape(subtitle), sub_s),
+                Spacer(1, 0.6*cm)]
+    if rows:
+        table = Table(rows, colWidths=[4.5*cm, 10.5*cm, 2*cm])
+        table.setStyle(TableStyle(style))
+        elements.append(table)
+
+    pdf_profiler.mark("flowables")
+    doc.build(elements)
+    pdf_profiler.done(doc, buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _toc(docs, page_counts, title, subtitle, toc_pages):
+    entries, page, group = [], toc_pages + 1, None
+    for doc, pages in zip(docs, page_counts):
+        if doc.kind != group:
+            group = doc.kind
+            entries.append((TYPE_LABELS.get(group, group.title()), None, None))
+        parts = [doc.client, doc.project, doc.date.strftime("%d %b %Y") if doc.date else None]
+        entries.append((doc.number, " · ".join(p for p in parts if p) or "-", page))
+        page += pages
+    return build_toc_pdf(title, subtitle, entries)
+
+
+def _subtitle(data, count, failed):
+    parts = []
+    if data.get("client"): parts.append(f"Client: {data['client']}")
+    if data.get("project"): parts.append(f"Project: {data['project']}")
+    if data.get("date_from") or data.get("date_to"):
+        parts.append(f"Periode: {data.get('date_from') or '…'} s/d {data.get('date_to') or '…'}")
+    parts.append(f"{count} dokumen · dibuat {datetime.now().strftime('%d %b %Y %H:%M')}")
+    if failed:
+        parts.append(f"{failed} dokumen gagal dibuat dan tidak disertakan")
+    return " · ".join(parts)
+
+
+@export_bp.route("/merged", methods=["POST"])
+@jwt_required()
+def merged_pdf():
+    pypdf = _pypdf()
+    if pypdf is None:
+        return jsonify({"error": "Merged export needs pypdf on the server (pip install pypdf)"}), 501
+    data = request.get_json() or {}
+    if not (_id_list(data.get("report_ids")) and _id_list(data.get("onsite_ids"))):
+        return jsonify({"error": "report_ids and onsite_ids must be lists of integers"}), 400
+    output = OUTPUT_PROFILES.get(data.get("profile") or current_app.config["PDF_OUTPUT_PROFILE"])
+    if output is None:
+        return profile_error()
+    try:
+        docs = _collect(data, output)
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+    if not docs:
+        return jsonify({"error": "No reports match the filter"}), 404
+    if len(docs) > current_app.config["PDF_EXPORT_MAX_DOCS"]:
+        return jsonify({"error": f"Too many documents ({len(docs)}), "
+                                 f"max {current_app.config['PDF_EXPORT_MAX_DOCS']}: narrow the filter"}), 413
+
+    app = current_app._get_current_object()
+    max_size = current_app.config["PDF_EXPORT_MAX_SIZE"]
+    writer = pypdf.PdfWriter()
+    outline = []  # (doc, first page index, page count) of each document that rendered
+    total = 0
+    workers = max(1, min(current_app.config["PDF_EXPORT_WORKERS"], len(docs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # map() yields in order: document 1 is merged while later ones still render
+        for doc, pdf in zip(docs, pool.map(lambda d: _render(app, d), docs)):
+            if pdf is None:
+                continue
+            total += _pdf_size(pdf)
+            if total > max_size:
+                pool.shutdown(wait=False, cancel_futures=True)  # documents not started yet are skipped
+                return jsonify({"error": f"Export too large (over {max_size // (1024 * 1024)} MB "
+                                         f"after {len(outline) + 1} of {len(docs)} documents): "
+                                         "narrow the filter"}), 413
+            start = len(writer.pages)
+            writer.append(pdf, import_outline=False)
+            outline.append((doc, start, len(writer.pages) - start))
+    if not outline:
+        return jsonify({"error": "PDF generation failed"}), 500
+
+    title = "Daftar Isi Laporan"
+    subtitle = _subtitle(data, len(outline), len(docs) - len(outline))
+    rendered = [d for d, _, _ in outline]
+    counts = [n for _, _, n in outline]
+    # Page numbers in the TOC depend on its own length: measure it once, then render for real
+    toc_pages = len(pypdf.PdfReader(_toc(rendered, counts, title, subtitle, 1)).pages)
+    writer.merge(0, _toc(rendered, counts, title, subtitle, toc_pages), import_outline=False)
+
+    writer.add_outline_item("Daftar Isi", 0)
+    group, parent = None, None
+    for doc, start, _ in outline:
+        if doc.kind != group:
+            group = doc.kind
+            parent = writer.add_outline_item(TYPE_LABELS.get(group, group.title()), toc_pages + start)
+        writer.add_outline_item(doc.number or f"#{doc.id}", toc_pages + start, parent=parent)
+    writer.add_metadata({"/Title": title})
+    writer.page_mode = "/UseOutlines"  # open with the bookmark panel
+
+    # Anonymous temp file: removed by the OS once the response closes it
+    f = tempfile.TemporaryFile(dir=cache_folder())
+    writer.write(f)
+    size = f.tell()
+    f.seek(0)
+    name = "_".join(p for p in ["Laporan", data.get("client"), data.get("project")] if p)
+    response = send_file(f, mimetype="application/pdf", as_attachment=True,
+                         download_name=f"{name.replace('/', '-').replace(' ', '_')}.pdf")
+    response.content_length = size
+    return response
@@ -0,0 +1,94 @@
+"""
+backend/routes/internal.py
+Operational endpoints — not for the frontend.
+Allowed from localhost, or from anywhere with header X-Metrics-Token: <METRICS_TOKEN>.
+Reads are GET; resetting counters or clearing a cache is POST, so a proxy or
+link prefetcher repeating a GET cannot change state.
+"""
+import hmac
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request, current_app
+from extensions import db
+from db_pool import pool_status
+from metrics import sql_metrics, render_prometheus
+from pdf_profiler import pdf_metrics
+from cache import cache
+
+internal_bp = Blueprint("internal", __name__)
+# /metrics lives at the root where Prometheus scrapers look for it
+metrics_bp = Blueprint("metrics", __name__)
+
+LOOPBACK = ("127.0.0.1", "::1")
+
+
+def is_internal_request():
+    token = current_app.config.get("METRICS_TOKEN")
+    given = request.headers.get("X-Metrics-Token", "")
+    if token and hmac.compare_digest(given, token):
+        return True
+    # Behind a proxy remote_addr is the proxy; only trust loopback without forwarding
+    return request.remote_addr in LOOPBACK and not request.headers.get("X-Forwarded-For")
+
+
+def internal_only(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not is_internal_request():
+            return jsonify({"error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@internal_bp.route("/pool", methods=["GET"])
+@internal_only
+def pool():
+    return jsonify(pool_status(db.engine)), 200
+
+
+@internal_bp.route("/sql", methods=["GET"])
+@internal_only
+def sql():
+    """Per-endpoint query counts and slowest statements (needs SQL_METRICS=1)."""
+    return jsonify({"enabled": sql_metrics.enabled, "endpoints": sql_metrics.snapshot()}), 200
+
+
+@internal_bp.route("/sql/reset", methods=["POST"])
+@internal_only
+def sql_reset():
+    sql_metrics.reset()
+    return jsonify({"message": "Reset"}), 200
+
+
+@internal_bp.route("/pdf", methods=["GET"])
+@internal_only
+def pdf():
+    """Render counts and phase totals per PDF document type."""
+    return jsonify(pdf_metrics.snapshot()), 200
+
+
+@internal_bp.route("/pdf/reset", methods=["POST"])
+@internal_only
+def pdf_reset():
+    pdf_metrics.reset()
+    return jsonify({"message": "Reset"}), 200
+
+
+@internal_bp.route("/cache", methods=["GET"])
+@internal_only
+def reference_cache():
+    """Reference data cache: backend, entries, hit rate."""
+    return jsonify(cache.stats()), 200
+
+
+@internal_bp.route("/cache/clear", methods=["POST"])
+@internal_only
+def reference_cache_clear():
+    cache.clear()
+    return jsonify(cache.stats()), 200
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+@internal_only
+def prometheus():
+    return Response(render_prometheus(db.engine), mimetype="text/plain; version=0.0.4")
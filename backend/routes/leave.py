@@ -12,6 +12,7 @@ from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models import User
+from cache import lookup
 from datetime import datetime, date
 from io import BytesIO
 import json
@@ -113,7 +114,7 @@ def get_my_requests():
     reqs = LeaveRequest.query.filter_by(user_id=user_id).order_by(LeaveRequest.created_at.desc()).all()
     result = []
     for r in reqs:
-        approver = User.query.get(r.approved_by) if r.approved_by else None
+        approver = lookup(User, r.approved_by)
         result.append(request_to_dict(r, approver))
     return jsonify(result), 200
 
@@ -131,8 +132,8 @@ def get_all_requests():
     reqs = LeaveRequest.query.order_by(LeaveRequest.created_at.desc()).all()
     result = []
     for r in reqs:
-        requester = User.query.get(r.user_id)
-        approver = User.query.get(r.approved_by) if r.approved_by else None
+        requester = lookup(User, r.user_id)
+        approver = lookup(User, r.approved_by)
         d = request_to_dict(r, approver)
         d["requester_name"] = requester.name if requester else None
         result.append(d)
@@ -152,7 +153,7 @@ def get_pending_requests():
     reqs = LeaveRequest.query.filter_by(status="pending").order_by(LeaveRequest.created_at.asc()).all()
     result = []
     for r in reqs:
-        requester = User.query.get(r.user_id)
+        requester = lookup(User, r.user_id)
         d = request_to_dict(r)
         d["requester_name"] = requester.name if requester else None
         result.append(d)
@@ -413,7 +414,7 @@ def export_csv():
     from models import LeaveRequest, JointLeaveSchedule, LeaveEntitlement
     user_id = int(get_jwt_identity())
     year = request.args.get('year', datetime.utcnow().year, type=int)
-    user = User.query.get(user_id)
+    user = lookup(User, user_id)
 
     reqs = LeaveRequest.query.filter(
         LeaveRequest.user_id == user_id,
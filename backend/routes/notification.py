@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models import User
+from cache import lookup
 from datetime import datetime
 
 notification_bp = Blueprint("notification", __name__)
@@ -112,7 +113,7 @@ def get_notifications():
 
     result = []
     for n in notifs:
-        actor = User.query.get(n.actor_id) if n.actor_id else None
+        actor = lookup(User, n.actor_id)
         result.append(_notif_to_dict(n, actor))
 
     unread_count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
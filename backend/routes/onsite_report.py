@@ -1,30 +1,19 @@
-import os, base64, json, re
+import os, json
 from datetime import datetime
 from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file, Response, current_app
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models import Engineer
-from sqlalchemy import text
-
-# ReportLab
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table,
-                                 TableStyle, HRFlowable, Image, KeepTogether,
-                                 PageBreak, BaseDocTemplate, Frame, PageTemplate)
-from reportlab.platypus.doctemplate import ActionFlowable
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-from reportlab.pdfgen import canvas as rl_canvas
-
-try:
-    from PIL import Image as PILImage
-except ImportError:
-    PILImage = None
-
-from html.parser import HTMLParser
+
+from asset_registry import assets
+from image_cache import image_flowable, OUTPUT_PROFILES
+from upload_store import resolve_upload
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import conditional, table_version, pdf_version, newest
+from pdf_delivery import pdf_response, request_profile, profile_error, issued_at
+from cache import lookup
 
 onsite_bp = Blueprint("onsite", __name__)
 
@@ -70,11 +59,12 @@ class OnsiteReport(db.Model):
     visit_date_to   = db.Column(db.Date)
     created_by      = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     created_at      = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at      = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at      = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-def report_to_dict(r, include_sig=False):
-    eng = Engineer.query.get(r.engineer_id) if r.engineer_id else None
+def report_to_dict(r, include_sig=False, engineers=None):
+    """`engineers` (id -> Engineer), when given, is used instead of the cached lookup()."""
+    eng = engineers.get(r.engineer_id) if engineers is not None else lookup(Engineer, r.engineer_id)
     d = {
         "id": r.id,
         "report_number": r.report_number,
@@ -111,8 +101,13 @@ def report_to_dict(r, include_sig=False):
 @onsite_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_reports():
-    reports = OnsiteReport.query.order_by(OnsiteReport.created_at.desc()).all()
-    return jsonify([report_to_dict(r) for r in reports]), 200
+    def build():
+        reports = OnsiteReport.query.order_by(OnsiteReport.created_at.desc()).all()
+        # From the database like the ETag (table_version(Engineer)), not from lookup()
+        engineers = {e.id: e for e in Engineer.query.all()}
+        return jsonify([report_to_dict(r, engineers=engineers) for r in reports]), 200
+
+    return conditional(build, table_version(OnsiteReport), table_version(Engineer))
 
 
 @onsite_bp.route('/create', methods=['POST'])
@@ -175,12 +170,19 @@ def create_report():
     return jsonify({"message": "Created", "id": r.id}), 201
 
 
+def _version(r):
+    eng = lookup(Engineer, r.engineer_id)
+    return r.updated_at, eng.updated_at if eng else None
+
+
 @onsite_bp.route('/detail/<int:rid>', methods=['GET'])
 @jwt_required()
 def get_detail(rid):
     r = OnsiteReport.query.get(rid)
     if not r: return jsonify({"error": "Not found"}), 404
-    return jsonify(report_to_dict(r, include_sig=True)), 200
+    version = _version(r)
+    return conditional(lambda: (jsonify(report_to_dict(r, include_sig=True)), 200),
+                       *version, last_modified=newest(*version))
 
 
 @onsite_bp.route('/update/<int:rid>', methods=['PUT'])
@@ -227,250 +229,24 @@ def delete_report(rid):
     return jsonify({"message": "Deleted"}), 200
 
 
-# ── AUTO-MIGRATE: add new columns if not exists ───────────────────────────────
-def _ensure_columns():
-    """Run once at startup to add new columns if missing."""
-    try:
-        with db.engine.connect() as conn:
-            conn.execute(text("""
-                ALTER TABLE onsite_reports
-                ADD COLUMN IF NOT EXISTS equipment_items JSONB DEFAULT '[]'::jsonb
-            """))
-            conn.execute(text("""
-                ALTER TABLE onsite_reports
-                ADD COLUMN IF NOT EXISTS visit_date_from DATE
-            """))
-            conn.execute(text("""
-                ALTER TABLE onsite_reports
-                ADD COLUMN IF NOT EXISTS visit_date_to DATE
-            """))
-            # Backfill visit_date_from from visit_date for existing records
-            conn.execute(text("""
-                UPDATE onsite_reports
-                SET visit_date_from = visit_date
-                WHERE visit_date_from IS NULL AND visit_date IS NOT NULL
-            """))
-            conn.commit()
-    except Exception:
-        pass
-
-
-@onsite_bp.record_once
-def _on_register(state):
-    """Called automatically when this blueprint is registered with the Flask app."""
-    with state.app.app_context():
-        _ensure_columns()
-
-
-# ── HTML → ReportLab Paragraphs ───────────────────────────────────────────────
-class _HTMLtoParagraphs(HTMLParser):
-    """Very lightweight HTML → list of ReportLab Paragraph/Spacer."""
-    def __init__(self, usable_w, text_style, ps_fn, primary, white, accent, border, gray, dark):
-        super().__init__()
-        self._usable_w = usable_w
-        self._ts = text_style
-        self._ps = ps_fn
-        self._primary = primary
-        self._white = white
-        self._accent = accent
-        self._border = border
-        self._gray = gray
-        self._dark = dark
-        self._paragraphs = []
-        self._buf = []
-        self._list_type = None   # 'ul' or 'ol'
-        self._list_counter = 0
-        self._img_queue = []
-        # inline style tracking
-        self._bold = 0
-        self._italic = 0
-        self._underline = 0
-        self._color_stack = []
-        self._size_stack = []
-        self._align = TA_LEFT
-
-    def _flush_buf(self):
-        text = "".join(self._buf).strip()
-        self._buf = []
-        return text
-
-    def _open_tag(self, tag):
-        return f"<{tag}>"
-
-    def _close_tag(self, tag):
-        return f"</{tag}>"
-
-    def handle_starttag(self, tag, attrs):
-        attrmap = dict(attrs)
-        style_str = attrmap.get("style", "")
-        if tag in ("b", "strong"):
-            self._buf.append("<b>"); self._bold += 1
-        elif tag in ("i", "em"):
-            self._buf.append("<i>"); self._italic += 1
-        elif tag in ("u",):
-            self._buf.append("<u>"); self._underline += 1
-        elif tag == "br":
-            self._buf.append("<br/>")
-        elif tag in ("p", "div"):
-            # flush previous
-            t = self._flush_buf()
-            if t:
-                self._paragraphs.append(Paragraph(t, self._ps('HP', fontSize=10, textColor=self._dark, leading=14)))
-            # check alignment
-            align = TA_LEFT
-            if "text-align:center" in style_str or "text-align: center" in style_str:
-                align = TA_CENTER
-            elif "text-align:right" in style_str or "text-align: right" in style_str:
-                align = TA_RIGHT
-            self._align = align
-        elif tag in ("ul",):
-            self._list_type = "ul"
-        elif tag in ("ol",):
-            self._list_type = "ol"; self._list_counter = 0
-        elif tag == "li":
-            t = self._flush_buf()
-            if t:
-                self._paragraphs.append(Paragraph(t, self._ps('HP', fontSize=10, textColor=self._dark, leading=14, alignment=self._align)))
-            self._list_counter += 1
-            if self._list_type == "ol":
-                self._buf.append(f"{self._list_counter}. ")
-            else:
-                self._buf.append("• ")
-        elif tag == "font":
-            color_val = attrmap.get("color", "")
-            if color_val:
-                self._buf.append(f'<font color="{color_val}">')
-                self._color_stack.append(True)
-            size_val = attrmap.get("size", "")
-            if size_val:
-                # ignore size attribute, handled by style
-                self._size_stack.append(True)
-        elif tag == "span":
-            # parse inline style for color and font-size
-            color_match = re.search(r'color\s*:\s*([^;]+)', style_str)
-            size_match = re.search(r'font-size\s*:\s*([^;]+)', style_str)
-            if color_match:
-                c = color_match.group(1).strip()
-                self._buf.append(f'<font color="{c}">')
-                self._color_stack.append(True)
-            else:
-                self._color_stack.append(False)
-            if size_match:
-                sz_str = size_match.group(1).strip()
-                try:
-                    px = float(re.sub(r'[^0-9.]', '', sz_str))
-                    pt = px * 0.75
-                    self._buf.append(f'<font size="{pt:.0f}">')
-                    self._size_stack.append(True)
-                except:
-                    self._size_stack.append(False)
-            else:
-                self._size_stack.append(False)
-        elif tag == "img":
-            src = attrmap.get("src", "")
-            style_i = attrmap.get("style", "")
-            # Parse width
-            w_cm = 10 * cm  # default
-            w_match = re.search(r'width\s*:\s*(\d+(?:\.\d+)?)(px|cm|mm)?', style_i)
-            if w_match:
-                val = float(w_match.group(1))
-                unit = w_match.group(2) or "px"
-                if unit == "px": w_cm = min(val * 0.026458 * cm, self._usable_w)
-                elif unit == "cm": w_cm = min(val * cm, self._usable_w)
-                elif unit == "mm": w_cm = min(val * 0.1 * cm, self._usable_w)
-            self._img_queue.append((src, w_cm))
-
-    def handle_endtag(self, tag):
-        if tag in ("b", "strong"):
-            self._buf.append("</b>"); self._bold -= 1
-        elif tag in ("i", "em"):
-            self._buf.append("</i>"); self._italic -= 1
-        elif tag in ("u",):
-            self._buf.append("</u>"); self._underline -= 1
-        elif tag in ("p", "div"):
-            t = self._flush_buf()
-            if t:
-                self._paragraphs.append(Paragraph(t, self._ps('HP2', fontSize=10, textColor=self._dark, leading=14, alignment=self._align)))
-            self._align = TA_LEFT
-        elif tag == "li":
-            t = self._flush_buf()
-            if t:
-                self._paragraphs.append(Paragraph(t, self._ps('LI', fontSize=10, textColor=self._dark, leading=14, leftIndent=12)))
-        elif tag in ("ul", "ol"):
-            self._list_type = None; self._list_counter = 0
-        elif tag == "font":
-            if self._color_stack and self._color_stack[-1]:
-                self._buf.append("</font>")
-            if self._color_stack: self._color_stack.pop()
-        elif tag == "span":
-            if self._color_stack and self._color_stack[-1]:
-                self._buf.append("</font>")
-            if self._color_stack: self._color_stack.pop()
-            if self._size_stack and self._size_stack[-1]:
-                self._buf.append("</font>")
-            if self._size_stack: self._size_stack.pop()
-
-    def handle_data(self, data):
-        self._buf.append(data)
-
-    def get_elements(self, ps_fn, primary, white, accent, border, dark, usable_w):
-        """Return ReportLab flowables from parsed HTML."""
-        # Flush any remaining buffer
-        t = self._flush_buf()
-        if t:
-            self._paragraphs.append(Paragraph(t, ps_fn('HR', fontSize=10, textColor=dark, leading=14)))
-
-        elements = []
-        for p in self._paragraphs:
-            elements.append(p)
-        # Process queued images
-        for src, w_cm in self._img_queue:
-            try:
-                if src.startswith("data:"):
-                    # Base64 embedded image
-                    if "base64," in src:
-                        b64 = src.split("base64,")[1]
-                        decoded = base64.b64decode(b64)
-                        buf = BytesIO(decoded)
-                        if PILImage:
-                            pil = PILImage.open(BytesIO(decoded))
-                            ratio = pil.size[1] / pil.size[0]
-                            h_cm = w_cm * ratio
-                            img = Image(buf, width=w_cm, height=h_cm)
-                        else:
-                            img = Image(buf, width=w_cm, height=w_cm * 0.6)
-                        img.hAlign = 'LEFT'
-                        elements.append(Spacer(1, 0.2 * cm))
-                        elements.append(img)
-                        elements.append(Spacer(1, 0.2 * cm))
-            except Exception:
-                pass
-
-        return elements
-
-
-def _html_to_flowables(html_text, usable_w, ps_fn, primary, white, accent, border, gray, dark):
-    """Convert HTML string to a list of ReportLab flowables."""
-    if not html_text:
-        return []
-    # Simple text (no HTML tags)
-    if not re.search(r'<[a-z]', html_text, re.IGNORECASE):
-        return [Paragraph(html_text, ps_fn('PT', fontSize=10, textColor=dark, leading=14))]
-
-    parser = _HTMLtoParagraphs(usable_w, None, ps_fn, primary, white, accent, border, gray, dark)
-    try:
-        parser.feed(html_text)
-    except Exception:
-        pass
-    return parser.get_elements(ps_fn, primary, white, accent, border, dark, usable_w)
-
-
 # ── PDF BUILDER ───────────────────────────────────────────────────────────────
-def build_onsite_pdf(rid):
+@profiled("onsite")
+def build_onsite_pdf(rid, output=None):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table,
+                                     TableStyle, HRFlowable, KeepTogether)
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfgen import canvas as rl_canvas
+    from html_flowables import HtmlProfile, html_to_flowables
+
     r = OnsiteReport.query.get(rid)
     if not r:
         return None
-    eng = Engineer.query.get(r.engineer_id) if r.engineer_id else None
+    issued = issued_at(r.updated_at or r.created_at)  # not now(): the PDF is cached per version
+    eng = lookup(Engineer, r.engineer_id)
+    pdf_profiler.mark("load")
 
     buffer = BytesIO()
     LEFT = RIGHT = 2 * cm
@@ -497,20 +273,11 @@ def build_onsite_pdf(rid):
     elements = []
 
     # ── HEADER: logo left + title right ─────────────────────────
-    logo_path = os.path.join(current_app.root_path, "assets", "logo.png")
     logo_col_w = 8 * cm
     title_col_w = USABLE_W - logo_col_w  # 9cm
 
-    if os.path.exists(logo_path):
-        try:
-            pil_logo = PILImage.open(logo_path)
-            lw, lh = pil_logo.size
-            target_h = 1.6 * cm
-            target_w = min((lw / lh) * target_h, 4.5 * cm)
-            logo_cell = Image(logo_path, width=target_w, height=target_h)
-        except:
-            logo_cell = Paragraph("<b>FLOTECH</b>", ps('LF', fontSize=16, fontName='Helvetica-Bold', textColor=primary))
-    else:
+    logo_cell = assets.logo_flowable(height=1.6 * cm, max_width=4.5 * cm)
+    if logo_cell is None:
         logo_cell = Paragraph("<b>FLOTECH</b>", ps('LF', fontSize=16, fontName='Helvetica-Bold', textColor=primary))
 
     right_block = Table([
@@ -648,9 +415,13 @@ def build_onsite_pdf(rid):
     if r.job_description:
         section("DETAIL PEKERJAAN")
         # Convert HTML to flowables
-        job_flowables = _html_to_flowables(
-            r.job_description, USABLE_W, ps, primary, white, accent, border, gray, dark
-        )
+        job_flowables = html_to_flowables(r.job_description, HtmlProfile(
+            ps('HP', fontSize=10, textColor=dark, leading=14),
+            li=ps('LI', fontSize=10, textColor=dark, leading=14, leftIndent=12),
+            gap=14, img_width=10 * cm, img_max_w=USABLE_W, img_max_h=18 * cm,
+            resolve_upload=resolve_upload,
+            output=output or OUTPUT_PROFILES[current_app.config["PDF_OUTPUT_PROFILE"]],
+        ))
         # Wrap in a bordered container
         if job_flowables:
             # Build a table with the content for consistent border
@@ -668,22 +439,8 @@ def build_onsite_pdf(rid):
     half_w = USABLE_W / 2  # 8.5cm each
 
     def sig_image(b64_data):
-        if not b64_data:
-            return Spacer(1, 1.8 * cm)
-        try:
-            data = b64_data
-            if "base64," in data:
-                data = data.split("base64,")[1]
-            decoded = base64.b64decode(data)
-            pil_img = PILImage.open(BytesIO(decoded)).convert("RGBA")
-            buf = BytesIO()
-            pil_img.save(buf, format="PNG")
-            buf.seek(0)
-            img = Image(buf, width=4 * cm, height=1.6 * cm)
-            img.hAlign = 'CENTER'
-            return img
-        except:
-            return Spacer(1, 1.8 * cm)
+        img = image_flowable(b64_data, width=4 * cm, height=1.6 * cm, h_align='CENTER')
+        return img or Spacer(1, 1.8 * cm)
 
     sig_l = ps('SL', fontSize=9, fontName='Helvetica-Bold', textColor=primary, alignment=1)
     sig_sub = ps('SS', fontSize=8, textColor=gray, alignment=1, leading=11)
@@ -712,7 +469,7 @@ def build_onsite_pdf(rid):
     ]))
 
     # Digital document declaration
-    gen_ts = datetime.now().strftime("%d %B %Y, %H:%M WIB")
+    gen_ts = issued.strftime("%d %B %Y, %H:%M WIB")
     digital_notice = Table([[
         Paragraph(
             f'<font color="#6B7280" size="7.5">🔒  This document is digitally generated by the system of PT Flotech Controls Indonesia'
@@ -783,10 +540,12 @@ def build_onsite_pdf(rid):
             self.drawCentredString(pw / 2, 1.4 * cm, FLOTECH_INFO["email"])
             self.setFillColor(colors.HexColor("#9CA3AF"))
             self.drawCentredString(pw / 2, 1.0 * cm,
-                f"Generated: {datetime.now().strftime('%d %B %Y %H:%M')}  ·  Halaman {page_num} dari {total}")
+                f"Updated: {issued.strftime('%d %B %Y %H:%M')}  ·  Halaman {page_num} dari {total}")
             self.restoreState()
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, canvasmaker=NumberedCanvas)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
@@ -797,12 +556,17 @@ def download_pdf(rid):
     r = OnsiteReport.query.get(rid)
     if not r:
         return jsonify({"error": "Not found"}), 404
-    buf = build_onsite_pdf(rid)
-    if not buf:
-        return jsonify({"error": "Failed"}), 500
-    return send_file(buf, as_attachment=True,
-                     download_name=f"OnsiteReport_{r.report_number}.pdf",
-                     mimetype="application/pdf")
+    output = request_profile()
+    if output is None: return profile_error()
+
+    def build():
+        return pdf_response(f"onsite-{rid}-{output.name}", (*version, pdf_version(), output),
+                            lambda: build_onsite_pdf(rid, output),
+                            f"OnsiteReport_{r.report_number}.pdf") \
+            or (jsonify({"error": "Failed"}), 500)
+
+    version = _version(r)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
 
 
 @onsite_bp.route('/pdf/preview/<int:rid>', methods=['GET'])
@@ -811,8 +575,14 @@ def preview_pdf(rid):
     r = OnsiteReport.query.get(rid)
     if not r:
         return jsonify({"error": "Not found"}), 404
-    buf = build_onsite_pdf(rid)
-    if not buf:
-        return jsonify({"error": "Failed"}), 500
-    return Response(buf, mimetype="application/pdf",
-                    headers={"Content-Disposition": f"inline; filename=OnsiteReport_{r.report_number}.pdf"})
\ No newline at end of file
+    output = request_profile(preview=True)
+    if output is None: return profile_error()
+
+    def build():
+        return pdf_response(f"onsite-{rid}-{output.name}", (*version, pdf_version(), output),
+                            lambda: build_onsite_pdf(rid, output),
+                            f"OnsiteReport_{r.report_number}.pdf", inline=True) \
+            or (jsonify({"error": "Failed"}), 500)
+
+    version = _version(r)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
\ No newline at end of file
@@ -1,22 +1,18 @@
-from flask import Blueprint, request, jsonify, send_file, Response
+from flask import Blueprint, request, jsonify, send_file
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone, timedelta
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable, KeepTogether
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm, mm
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-from reportlab.platypus import Image as RLImage
-from PIL import Image as PILImage
+from asset_registry import assets
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import conditional, table_version, pdf_version
+from pdf_delivery import pdf_response
 from io import BytesIO
-import os, re
+from types import SimpleNamespace
+import os, re, copy
 
-# ── openpyxl for Excel export ──────────────────────────────────────────────────
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, GradientFill
-from openpyxl.utils import get_column_letter
+# ReportLab / openpyxl are imported inside the export and PDF functions so
+# that loading this blueprint stays cheap at startup.
 
 quotation_bp = Blueprint('quotation', __name__)
 
@@ -69,6 +65,17 @@ class Quotation(db.Model):
     created_at       = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at       = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class QuotationRevision(db.Model):
+    """Reverse delta: the old values of every field an edit overwrote."""
+    __tablename__ = "quotation_revisions"
+    id           = db.Column(db.Integer, primary_key=True)
+    quotation_id = db.Column(db.Integer, db.ForeignKey("quotations.id"), nullable=False, index=True)
+    revision     = db.Column(db.Integer, default=0)      # revision the delta restores
+    bumped       = db.Column(db.Boolean, default=False)  # True = this edit closed `revision`
+    changes      = db.Column(db.JSON)
+    created_by   = db.Column(db.Integer, db.ForeignKey("users.id"))
+    created_at   = db.Column(db.DateTime, default=datetime.utcnow)
+
 # ── Constants ──────────────────────────────────────────────────────────────────
 FLOTECH_INFO = {
     "name":    "PT. FLOTECH CONTROLS INDONESIA",
@@ -97,20 +104,6 @@ def calc_item(item):
     net   = gross - disc_amt
     return gross, disc_amt, net
 
-def _find_logo():
-    base = os.path.dirname(os.path.abspath(__file__))
-    candidates = [
-        os.path.join(base, "..", "frontend", "public", "logo.png"),
-        os.path.join(base, "static", "logo.png"),
-        os.path.join(base, "static", "flotech_logo.png"),
-        os.path.join(base, "..", "..", "frontend", "public", "logo.png"),
-    ]
-    for p in candidates:
-        n = os.path.normpath(p)
-        if os.path.isfile(n):
-            return n
-    return None
-
 # ── Auto-number generator ──────────────────────────────────────────────────────
 def generate_quotation_number():
     now = now_wib()
@@ -131,6 +124,103 @@ def generate_quotation_number():
                 pass
     return f"{prefix}{max_seq + 1:03d}"
 
+# ── Revision history (reverse deltas) ──────────────────────────────────────────
+# Only the current state lives in `quotations`. Every edit stores the previous
+# values of the fields it changed; items are diffed per position, so the cost of
+# a revision is proportional to what changed. Older states are rebuilt by
+# walking the deltas backwards from the current row.
+SNAPSHOT_FIELDS = [
+    "quotation_number", "base_number", "revision",
+    "customer_name", "customer_company", "customer_email", "customer_phone",
+    "customer_address", "project_name", "category", "status", "valid_until",
+    "currency", "total_amount", "notes", "terms", "items", "sales_person",
+    "ref_no", "shipment_terms", "delivery", "payment_terms", "vat_pct", "vat_include",
+]
+
+def quotation_snapshot(q):
+    snap = {}
+    for f in SNAPSHOT_FIELDS:
+        v = getattr(q, f, None)
+        if f == "valid_until":
+            v = v.isoformat() if v else None
+        elif f == "items":
+            v = copy.deepcopy(v or [])
+        snap[f] = v
+    return snap
+
+def _items_delta(old, new):
+    """Delta that turns the `new` item list back into `old`."""
+    changed = {str(i): item for i, item in enumerate(old)
+               if i >= len(new) or new[i] != item}
+    if not changed and len(old) == len(new):
+        return None
+    return {"len": len(old), "set": changed}
+
+def _apply_items_delta(items, delta):
+    n = delta["len"]
+    items = list(items[:n]) + [None] * max(0, n - len(items))
+    for idx, item in delta["set"].items():
+        items[int(idx)] = item
+    return items
+
+def snapshot_delta(before, after):
+    delta = {}
+    for f in SNAPSHOT_FIELDS:
+        if f == "items":
+            d = _items_delta(before["items"], after["items"])
+            if d is not None:
+                delta["items"] = d
+        elif before[f] != after[f]:
+            delta[f] = before[f]
+    return delta
+
+def record_revision(q, before, user_id=None, bumped=False):
+    """Store the reverse delta between `before` and the current state of q."""
+    changes = snapshot_delta(before, quotation_snapshot(q))
+    if not changes:
+        return None
+    rev = QuotationRevision(quotation_id=q.id, revision=before["revision"] or 0,
+                            bumped=bumped, changes=changes, created_by=user_id)
+    db.session.add(rev)
+    return rev
+
+def oldest_revision(q):
+    """
+    Oldest revision that can be rebuilt. Bumps made before the history table
+    existed left no delta, so those revisions are gone.
+    """
+    first = db.session.query(db.func.min(QuotationRevision.revision)) \
+        .filter_by(quotation_id=q.id, bumped=True).scalar()
+    return first if first is not None else (q.revision or 0)
+
+def revision_error(q, rev):
+    """404 response if revision `rev` of q cannot be rebuilt, else None."""
+    if rev < 0 or rev > (q.revision or 0):
+        return jsonify({"error": "Revision not found"}), 404
+    if rev < oldest_revision(q):
+        return jsonify({"error": "Revision history not recorded for this revision"}), 404
+    return None
+
+def rebuild_revision(q, revision):
+    """Return the snapshot of q as it was when `revision` was last current."""
+    snap = quotation_snapshot(q)
+    deltas = QuotationRevision.query.filter_by(quotation_id=q.id) \
+        .order_by(QuotationRevision.id.desc()).all()
+    for d in deltas:
+        if d.revision < revision or (d.revision == revision and not d.bumped):
+            break
+        for f, v in (d.changes or {}).items():
+            snap[f] = _apply_items_delta(snap["items"], v) if f == "items" else v
+    return snap
+
+def _snapshot_to_obj(q, snap):
+    """Detached object with the attributes build_quotation_pdf reads."""
+    data = dict(snap)
+    data["valid_until"] = datetime.strptime(snap["valid_until"], "%Y-%m-%d").date() \
+        if snap.get("valid_until") else None
+    data["created_at"] = q.created_at
+    return SimpleNamespace(**data)
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ROUTES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -142,21 +232,24 @@ def get_next_number():
 @quotation_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_quotations():
-    qs = Quotation.query.order_by(Quotation.created_at.desc()).all()
-    result = []
-    for q in qs:
-        result.append({
-            "id": q.id, "quotation_number": q.quotation_number,
-            "base_number": q.base_number, "revision": q.revision or 0,
-            "customer_name": q.customer_name, "customer_company": q.customer_company,
-            "project_name": q.project_name, "category": q.category,
-            "status": q.status, "total_amount": q.total_amount, "currency": q.currency,
-            "sales_person": q.sales_person,
-            "created_at": q.created_at.isoformat() if q.created_at else None,
-            "updated_at": q.updated_at.isoformat() if q.updated_at else None,
-            "valid_until": q.valid_until.isoformat() if q.valid_until else None,
-        })
-    return jsonify(result), 200
+    def build():
+        qs = Quotation.query.order_by(Quotation.created_at.desc()).all()
+        result = []
+        for q in qs:
+            result.append({
+                "id": q.id, "quotation_number": q.quotation_number,
+                "base_number": q.base_number, "revision": q.revision or 0,
+                "customer_name": q.customer_name, "customer_company": q.customer_company,
+                "project_name": q.project_name, "category": q.category,
+                "status": q.status, "total_amount": q.total_amount, "currency": q.currency,
+                "sales_person": q.sales_person,
+                "created_at": q.created_at.isoformat() if q.created_at else None,
+                "updated_at": q.updated_at.isoformat() if q.updated_at else None,
+                "valid_until": q.valid_until.isoformat() if q.valid_until else None,
+            })
+        return jsonify(result), 200
+
+    return conditional(build, table_version(Quotation))
 
 @quotation_bp.route('/analytics', methods=['GET'])
 @jwt_required()
@@ -212,23 +305,27 @@ def create_quotation():
 def get_quotation(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
-    return jsonify({
-        "id": q.id, "quotation_number": q.quotation_number,
-        "base_number": q.base_number, "revision": q.revision or 0,
-        "customer_name": q.customer_name, "customer_company": q.customer_company,
-        "customer_email": q.customer_email, "customer_phone": q.customer_phone,
-        "customer_address": q.customer_address, "project_name": q.project_name,
-        "category": q.category, "status": q.status,
-        "valid_until": q.valid_until.isoformat() if q.valid_until else None,
-        "currency": q.currency, "total_amount": q.total_amount,
-        "notes": q.notes, "terms": q.terms, "items": q.items or [],
-        "sales_person": q.sales_person, "ref_no": q.ref_no,
-        "shipment_terms": q.shipment_terms, "delivery": q.delivery,
-        "payment_terms": q.payment_terms,
-        "vat_pct": q.vat_pct or 11, "vat_include": q.vat_include or False,
-        "created_at": q.created_at.isoformat() if q.created_at else None,
-        "updated_at": q.updated_at.isoformat() if q.updated_at else None,
-    }), 200
+
+    def build():
+        return jsonify({
+            "id": q.id, "quotation_number": q.quotation_number,
+            "base_number": q.base_number, "revision": q.revision or 0,
+            "customer_name": q.customer_name, "customer_company": q.customer_company,
+            "customer_email": q.customer_email, "customer_phone": q.customer_phone,
+            "customer_address": q.customer_address, "project_name": q.project_name,
+            "category": q.category, "status": q.status,
+            "valid_until": q.valid_until.isoformat() if q.valid_until else None,
+            "currency": q.currency, "total_amount": q.total_amount,
+            "notes": q.notes, "terms": q.terms, "items": q.items or [],
+            "sales_person": q.sales_person, "ref_no": q.ref_no,
+            "shipment_terms": q.shipment_terms, "delivery": q.delivery,
+            "payment_terms": q.payment_terms,
+            "vat_pct": q.vat_pct or 11, "vat_include": q.vat_include or False,
+            "created_at": q.created_at.isoformat() if q.created_at else None,
+            "updated_at": q.updated_at.isoformat() if q.updated_at else None,
+        }), 200
+
+    return conditional(build, q.updated_at, last_modified=q.updated_at)
 
 @quotation_bp.route('/update/<int:qid>', methods=['PUT'])
 @jwt_required()
@@ -236,9 +333,10 @@ def update_quotation(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
     data = request.get_json()
+    before = quotation_snapshot(q)
     REVISION_FIELDS = {"items", "total_amount", "notes", "terms", "payment_terms",
                        "shipment_terms", "delivery", "currency"}
-    bump = data.get("bump_revision", False)
+    bump = bool(data.get("bump_revision", False))  # stored in QuotationRevision.bumped (Boolean)
     if not bump:
         for rf in REVISION_FIELDS:
             if rf in data and str(getattr(q, rf, None)) != str(data[rf]):
@@ -256,6 +354,7 @@ def update_quotation(qid):
         base = q.base_number or q.quotation_number
         q.base_number = base
         q.quotation_number = f"{base}-Rev{new_rev}"
+    record_revision(q, before, int(get_jwt_identity()), bumped=bump)
     q.updated_at = datetime.utcnow()
     db.session.commit()
     return jsonify({"message": "Updated", "quotation_number": q.quotation_number, "revision": q.revision}), 200
@@ -265,7 +364,9 @@ def update_quotation(qid):
 def update_status(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
+    before = quotation_snapshot(q)
     q.status = request.get_json().get("status", q.status)
+    record_revision(q, before, int(get_jwt_identity()))
     q.updated_at = datetime.utcnow()
     db.session.commit()
     return jsonify({"message": "Updated"}), 200
@@ -275,15 +376,52 @@ def update_status(qid):
 def delete_quotation(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
+    QuotationRevision.query.filter_by(quotation_id=q.id).delete()
     db.session.delete(q); db.session.commit()
     return jsonify({"message": "Deleted"}), 200
 
+# ── Revision history ───────────────────────────────────────────────────────────
+@quotation_bp.route('/revisions/<int:qid>', methods=['GET'])
+@jwt_required()
+def list_revisions(qid):
+    q = Quotation.query.get(qid)
+    if not q: return jsonify({"error": "Not found"}), 404
+    closed = {d.revision: d.created_at for d in QuotationRevision.query.filter_by(
+        quotation_id=qid, bumped=True).order_by(QuotationRevision.id).all()}
+    base = q.base_number or q.quotation_number
+    oldest = oldest_revision(q)
+    result = []
+    for rev in range(0, (q.revision or 0) + 1):
+        result.append({
+            "revision": rev,
+            "quotation_number": base if rev == 0 else f"{base}-Rev{rev}",
+            "current": rev == (q.revision or 0),
+            "available": rev >= oldest,
+            "superseded_at": closed[rev].isoformat() if closed.get(rev) else None,
+        })
+    return jsonify(result), 200
+
+@quotation_bp.route('/revision/<int:qid>/<int:rev>', methods=['GET'])
+@jwt_required()
+def get_revision(qid, rev):
+    q = Quotation.query.get(qid)
+    if not q: return jsonify({"error": "Not found"}), 404
+    err = revision_error(q, rev)
+    if err: return err
+    snap = rebuild_revision(q, rev)
+    snap.update({"id": q.id, "created_at": q.created_at.isoformat() if q.created_at else None})
+    return jsonify(snap), 200
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # EXPORT — Excel
 # ═══════════════════════════════════════════════════════════════════════════════
 @quotation_bp.route('/export/excel', methods=['POST'])
 @jwt_required()
 def export_excel():
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
     data = request.get_json() or {}
     ids  = data.get("ids")
     if ids:
@@ -369,13 +507,22 @@ def export_excel():
 # ═══════════════════════════════════════════════════════════════════════════════
 @quotation_bp.route('/export/pdf', methods=['POST'])
 @jwt_required()
+@profiled("quotation_list")
 def export_pdf_list():
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable, KeepTogether
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm, mm
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+
     data = request.get_json() or {}
     ids  = data.get("ids")
     if ids:
         qs = Quotation.query.filter(Quotation.id.in_(ids)).order_by(Quotation.created_at.desc()).all()
     else:
         qs = Quotation.query.order_by(Quotation.created_at.desc()).all()
+    pdf_profiler.mark("load")
 
     buffer = BytesIO()
     L = R = 1.8 * cm
@@ -399,13 +546,8 @@ def export_pdf_list():
         d=dict(fontName="Helvetica",fontSize=9,leading=12,textColor=text_c); d.update(kw); return ParagraphStyle(name,**d)
 
     elements=[]
-    logo_path=_find_logo()
-    if logo_path:
-        try:
-            pil=PILImage.open(logo_path); lw=4.5*cm; lh=lw*pil.size[1]/pil.size[0]
-            logo_cell=RLImage(logo_path,width=lw,height=lh)
-        except: logo_cell=Paragraph("<b>FLOTECH</b>",ps("lg",fontSize=18,fontName="Helvetica-Bold",textColor=primary))
-    else: logo_cell=Paragraph("<b>FLOTECH</b>",ps("lg2",fontSize=18,fontName="Helvetica-Bold",textColor=primary))
+    logo_cell=assets.logo_flowable(width=4.5*cm)
+    if logo_cell is None: logo_cell=Paragraph("<b>FLOTECH</b>",ps("lg2",fontSize=18,fontName="Helvetica-Bold",textColor=primary))
 
     wib_now=now_wib()
     title_cell=[
@@ -466,7 +608,9 @@ def export_pdf_list():
     def footer_cb(cv, doc_obj):
         _draw_standard_footer(cv, doc_obj, L, R)
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, onFirstPage=footer_cb, onLaterPages=footer_cb)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return send_file(buffer,as_attachment=True,download_name=f"QuotationList_{wib_now.strftime('%Y%m%d')}.pdf",mimetype="application/pdf")
 
@@ -476,6 +620,8 @@ def export_pdf_list():
 def _draw_standard_footer(cv, doc_obj, L, R):
     """Draw the standard Flotech footer on any PDF page."""
     from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
     PW, PH = A4
     C_PRIMARY = colors.HexColor("#0B3D91")
 
@@ -510,7 +656,15 @@ def _draw_standard_footer(cv, doc_obj, L, R):
 # Layout: A4 | L/R = 1.8cm → usable ≈ 17.4cm
 # Items table: NO Disc% column — only shown below subtotal if discount exists
 # ═══════════════════════════════════════════════════════════════════════════════
+@profiled("quotation")
 def build_quotation_pdf(q):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable, KeepTogether
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm, mm
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+
     buffer = BytesIO()
 
     PW, PH  = A4
@@ -557,17 +711,8 @@ def build_quotation_pdf(q):
     elements = []
 
     # ── SECTION 1: Header ────────────────────────────────────────────────────
-    logo_path = _find_logo()
-    if logo_path:
-        try:
-            pil = PILImage.open(logo_path)
-            lw  = 5.2 * cm
-            lh  = lw * pil.size[1] / pil.size[0]
-            logo_c = RLImage(logo_path, width=lw, height=lh)
-        except:
-            logo_c = Paragraph("<b>FLOTECH</b>",
-                S("lf", fontName="Helvetica-Bold", fontSize=20, textColor=C_PRIMARY))
-    else:
+    logo_c = assets.logo_flowable(width=5.2 * cm)
+    if logo_c is None:
         logo_c = Paragraph(
             "<b>FLOTECH</b><br/><font size='7'>PROCESS CONTROL &amp; INSTRUMENTATION</font>",
             S("lf2", fontName="Helvetica-Bold", fontSize=18, textColor=C_PRIMARY, leading=22))
@@ -961,7 +1106,9 @@ def build_quotation_pdf(q):
     def footer_cb(cv, doc_obj):
         _draw_standard_footer(cv, doc_obj, L, R)
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, onFirstPage=footer_cb, onLaterPages=footer_cb)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
@@ -971,16 +1118,37 @@ def build_quotation_pdf(q):
 def quotation_pdf(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
-    buf = build_quotation_pdf(q)
-    return send_file(buf, as_attachment=True,
-        download_name=f"Quotation_{q.quotation_number}.pdf",
-        mimetype="application/pdf")
+
+    def build():
+        return pdf_response(f"quotation-{qid}", (q.updated_at, pdf_version()), lambda: build_quotation_pdf(q),
+                            f"Quotation_{q.quotation_number}.pdf")
+
+    return conditional(build, q.updated_at, pdf_version(), last_modified=q.updated_at)
 
 @quotation_bp.route('/pdf/preview/<int:qid>', methods=['GET'])
 @jwt_required()
 def quotation_pdf_preview(qid):
     q = Quotation.query.get(qid)
     if not q: return jsonify({"error": "Not found"}), 404
-    buf = build_quotation_pdf(q)
-    return Response(buf, mimetype="application/pdf",
-        headers={"Content-Disposition": f"inline; filename=Quotation_{q.quotation_number}.pdf"})
\ No newline at end of file
+
+    def build():
+        return pdf_response(f"quotation-{qid}", (q.updated_at, pdf_version()), lambda: build_quotation_pdf(q),
+                            f"Quotation_{q.quotation_number}.pdf", inline=True)
+
+    return conditional(build, q.updated_at, pdf_version(), last_modified=q.updated_at)
+
+@quotation_bp.route('/revision/pdf/<int:qid>/<int:rev>', methods=['GET'])
+@jwt_required()
+def quotation_revision_pdf(qid, rev):
+    q = Quotation.query.get(qid)
+    if not q: return jsonify({"error": "Not found"}), 404
+    err = revision_error(q, rev)
+    if err: return err
+
+    def build():
+        hist = _snapshot_to_obj(q, rebuild_revision(q, rev))
+        return pdf_response(f"quotation-{qid}-rev{rev}", (q.updated_at, pdf_version()),
+                            lambda: build_quotation_pdf(hist), f"Quotation_{hist.quotation_number}.pdf",
+                            inline=bool(request.args.get("inline")))
+
+    return conditional(build, q.updated_at, pdf_version(), last_modified=q.updated_at)
@@ -1,21 +1,20 @@
-from flask import Blueprint, request, jsonify, current_app, Response
+from flask import Blueprint, request, jsonify, current_app
 from extensions import db
 from models import Report, ReportImage, Engineer
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import os
 import base64
-from werkzeug.utils import secure_filename
-from flask import send_file
-from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Image, Table,
-                                 TableStyle, HRFlowable, KeepTogether)
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch, cm
-from reportlab.pdfgen import canvas as rl_canvas
 from io import BytesIO
-from PIL import Image as PILImage
+from asset_registry import assets
+from image_cache import image_flowable, prefetch_photos, photo_flowable, OUTPUT_PROFILES
+import pdf_profiler
+from pdf_profiler import profiled, asset_timer
+from http_cache import conditional, table_version, pdf_version, newest
+from pdf_delivery import pdf_response, request_profile, profile_error, issued_at
+from upload_store import acquire, discard
+from photo_ingest import save_photo
+from cache import lookup
 
 report_bp = Blueprint('report', __name__)
 
@@ -90,40 +89,50 @@ def create_report():
 @report_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_reports():
-    query = Report.query
-    search = request.args.get("search")
-    if search:
-        query = query.filter(db.or_(
-            Report.report_number.ilike(f"%{search}%"),
-            Report.client_name.ilike(f"%{search}%"),
-            Report.project_name.ilike(f"%{search}%"),
-        ))
-    if request.args.get("type"): query = query.filter(Report.report_type == request.args.get("type"))
-    if request.args.get("status"): query = query.filter(Report.status == request.args.get("status"))
-    if request.args.get("engineer_id"): query = query.filter(Report.engineer_id == int(request.args.get("engineer_id")))
-    if request.args.get("date_from"):
-        try: query = query.filter(Report.report_date >= datetime.strptime(request.args.get("date_from"), "%Y-%m-%d").date())
-        except: pass
-    if request.args.get("date_to"):
-        try: query = query.filter(Report.report_date <= datetime.strptime(request.args.get("date_to"), "%Y-%m-%d").date())
-        except: pass
-    reports = query.order_by(Report.created_at.desc()).all()
-    result = []
-    for r in reports:
-        engineer_name = None
-        if r.engineer_id:
-            eng = Engineer.query.get(r.engineer_id)
-            if eng: engineer_name = eng.name
-        result.append({
-            "id": r.id, "report_number": r.report_number, "report_type": r.report_type,
-            "client_name": r.client_name, "project_name": r.project_name,
-            "engineer_id": r.engineer_id,
-            "engineer_name": engineer_name,
-            "report_date": r.report_date.isoformat() if r.report_date else None,
-            "status": r.status,
-            "created_at": r.created_at.isoformat() if r.created_at else None
-        })
-    return jsonify(result), 200
+    def build():
+        query = Report.query
+        search = request.args.get("search")
+        if search:
+            query = query.filter(db.or_(
+                Report.report_number.ilike(f"%{search}%"),
+                Report.client_name.ilike(f"%{search}%"),
+                Report.project_name.ilike(f"%{search}%"),
+            ))
+        if request.args.get("type"): query = query.filter(Report.report_type == request.args.get("type"))
+        if request.args.get("status"): query = query.filter(Report.status == request.args.get("status"))
+        if request.args.get("engineer_id"): query = query.filter(Report.engineer_id == int(request.args.get("engineer_id")))
+        if request.args.get("date_from"):
+            try: query = query.filter(Report.report_date >= datetime.strptime(request.args.get("date_from"), "%Y-%m-%d").date())
+            except: pass
+        if request.args.get("date_to"):
+            try: query = query.filter(Report.report_date <= datetime.strptime(request.args.get("date_to"), "%Y-%m-%d").date())
+            except: pass
+        reports = query.order_by(Report.created_at.desc()).all()
+        # Names from the database, not lookup(): the ETag is table_version(Engineer)
+        # and must describe the same data, whichever worker answers
+        engineers = {e.id: e.name for e in Engineer.query.all()}
+        result = []
+        for r in reports:
+            engineer_name = engineers.get(r.engineer_id)
+            result.append({
+                "id": r.id, "report_number": r.report_number, "report_type": r.report_type,
+                "client_name": r.client_name, "project_name": r.project_name,
+                "engineer_id": r.engineer_id,
+                "engineer_name": engineer_name,
+                "report_date": r.report_date.isoformat() if r.report_date else None,
+                "status": r.status,
+                "created_at": r.created_at.isoformat() if r.created_at else None
+            })
+        return jsonify(result), 200
+
+    return conditional(build, table_version(Report), table_version(Engineer))
+
+
+def add_report_image(report, photo, caption=""):
+    """Attach a stored photo (StoredPhoto from photo_ingest.save_photo) to a report (caller commits)."""
+    db.session.add(ReportImage(report_id=report.id, caption=caption, **photo._asdict()))
+    acquire(photo.file_path)
+    report.updated_at = datetime.utcnow()  # images are part of the report's ETag
 
 
 @report_bp.route('/upload/<int:report_id>', methods=['POST'])
@@ -136,11 +145,9 @@ def upload_images(report_id):
     saved_files = []
     for file in files:
         if file.filename == "": continue
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-        file.save(file_path)
-        db.session.add(ReportImage(report_id=report_id, file_path=filename))
-        saved_files.append(filename)
+        photo = save_photo(file.stream, file.filename)
+        add_report_image(report, photo)
+        saved_files.append(photo.file_path)
     db.session.commit()
     return jsonify({"message": "Images uploaded", "files": saved_files}), 201
 
@@ -150,10 +157,8 @@ def upload_images(report_id):
 def delete_image(image_id):
     img = ReportImage.query.get(image_id)
     if not img: return jsonify({"error": "Image not found"}), 404
-    try:
-        fp = os.path.join(current_app.config["UPLOAD_FOLDER"], img.file_path) if not os.path.isabs(img.file_path) else img.file_path
-        if os.path.exists(fp): os.remove(fp)
-    except: pass
+    discard(img.file_path)
+    if img.report: img.report.updated_at = datetime.utcnow()
     db.session.delete(img)
     db.session.commit()
     return jsonify({"message": "Image deleted"}), 200
@@ -166,33 +171,47 @@ def update_image_caption(image_id):
     if not img: return jsonify({"error": "Image not found"}), 404
     data = request.get_json()
     img.caption = data.get("caption", "")
+    if img.report: img.report.updated_at = datetime.utcnow()
     db.session.commit()
     return jsonify({"message": "Caption updated"}), 200
 
 
+def _report_version(report):
+    """What a report's detail / PDF depends on: the report (touched on image changes) and its engineer."""
+    eng = lookup(Engineer, report.engineer_id)
+    return report.updated_at, eng.updated_at if eng else None
+
+
 @report_bp.route('/detail/<int:report_id>', methods=['GET'])
 @jwt_required()
 def get_report_detail(report_id):
     report = Report.query.get(report_id)
     if not report: return jsonify({"error": "Report not found"}), 404
-    engineer_data = None
-    if report.engineer_id:
-        eng = Engineer.query.get(report.engineer_id)
-        if eng:
-            engineer_data = {"id": eng.id, "name": eng.name, "employee_id": eng.employee_id,
-                             "position": eng.position, "department": eng.department,
-                             "certification": eng.certification, "signature_data": eng.signature_data}
-    images = [{"id": img.id, "file_path": img.file_path,
-                "caption": getattr(img, 'caption', '') or "",
-                "uploaded_at": img.uploaded_at.isoformat() if img.uploaded_at else None}
-              for img in report.images]
-    return jsonify({
-        "id": report.id, "report_number": report.report_number, "report_type": report.report_type,
-        "client_name": report.client_name, "project_name": report.project_name,
-        "engineer": engineer_data,
-        "report_date": report.report_date.isoformat() if report.report_date else None,
-        "status": report.status, "data_json": report.data_json, "images": images
-    }), 200
+
+    def build():
+        engineer_data = None
+        if report.engineer_id:
+            eng = lookup(Engineer, report.engineer_id)
+            if eng:
+                engineer_data = {"id": eng.id, "name": eng.name, "employee_id": eng.employee_id,
+                                 "position": eng.position, "department": eng.department,
+                                 "certification": eng.certification, "signature_data": eng.signature_data}
+        images = [{"id": img.id, "file_path": img.file_path,
+                    "caption": getattr(img, 'caption', '') or "",
+                    "width": img.width, "height": img.height,
+                    "byte_size": img.byte_size, "mime_type": img.mime_type,
+                    "uploaded_at": img.uploaded_at.isoformat() if img.uploaded_at else None}
+                  for img in report.images]
+        return jsonify({
+            "id": report.id, "report_number": report.report_number, "report_type": report.report_type,
+            "client_name": report.client_name, "project_name": report.project_name,
+            "engineer": engineer_data,
+            "report_date": report.report_date.isoformat() if report.report_date else None,
+            "status": report.status, "data_json": report.data_json, "images": images
+        }), 200
+
+    version = _report_version(report)
+    return conditional(build, *version, last_modified=newest(*version))
 
 
 @report_bp.route('/update/<int:report_id>', methods=['PUT'])
@@ -230,10 +249,7 @@ def delete_report(report_id):
     report = Report.query.get(report_id)
     if not report: return jsonify({"error": "Report not found"}), 404
     for img in report.images:
-        try:
-            fp = os.path.join(current_app.config["UPLOAD_FOLDER"], img.file_path) if not os.path.isabs(img.file_path) else img.file_path
-            if os.path.exists(fp): os.remove(fp)
-        except: pass
+        discard(img.file_path)
         db.session.delete(img)
     db.session.delete(report)
     db.session.commit()
@@ -243,10 +259,30 @@ def delete_report(report_id):
 # ─────────────────────────────────────────────────────────────────────────────
 # PDF BUILDER
 # ─────────────────────────────────────────────────────────────────────────────
-def build_report_pdf(report_id):
+def _image_path(file_path):
+    """Absolute path of a report photo, or None if the file is gone."""
+    if not file_path:
+        return None
+    path = os.path.join(current_app.config["UPLOAD_FOLDER"], file_path) if not os.path.isabs(file_path) else file_path
+    if not os.path.exists(path): path = file_path
+    return path if os.path.exists(path) else None
+
+
+@profiled("report")
+def build_report_pdf(report_id, output=None):
+    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Image, Table,
+                                     TableStyle, HRFlowable, KeepTogether)
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas as rl_canvas
+
     report = Report.query.get(report_id)
     if not report: return None
-    engineer = Engineer.query.get(report.engineer_id) if report.engineer_id else None
+    engineer = lookup(Engineer, report.engineer_id)
+    issued = issued_at(report.updated_at or report.created_at)  # not now(): the PDF is cached per version
+    pdf_profiler.mark("load")
 
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4,
@@ -278,17 +314,8 @@ def build_report_pdf(report_id):
     report_type_label = (report.report_type or "FIELD").upper()
 
     # ─── HEADER: logo + report type title block ──────────────────
-    logo_path = os.path.join(current_app.root_path, "assets", "logo.png")
-    if os.path.exists(logo_path):
-        try:
-            pil_logo = PILImage.open(logo_path)
-            lw, lh = pil_logo.size
-            target_h = 1.8*cm
-            target_w = target_h * lw / lh
-            logo_img = Image(logo_path, width=target_w, height=target_h)
-        except:
-            logo_img = Paragraph("<b>FLOTECH</b>", ps('LF', fontName='Helvetica-Bold', fontSize=16, textColor=primary_color))
-    else:
+    logo_img = assets.logo_flowable(height=1.8*cm)
+    if logo_img is None:
         logo_img = Paragraph("<b>FLOTECH</b>", ps('LF2', fontName='Helvetica-Bold', fontSize=16, textColor=primary_color))
 
     type_labels = {
@@ -504,22 +531,17 @@ def build_report_pdf(report_id):
         img_table_data = []
         row_imgs = []
         row_caps = []
+        photos = prefetch_photos(
+            [_image_path(img_obj.file_path) for img_obj in report.images], 8*cm, 6*cm,
+            output or OUTPUT_PROFILES[current_app.config["PDF_OUTPUT_PROFILE"]],
+            workers=current_app.config["PDF_IMAGE_WORKERS"])
         for i, img_obj in enumerate(report.images):
-            try:
-                upload_folder = current_app.config["UPLOAD_FOLDER"]
-                img_path = os.path.join(upload_folder, img_obj.file_path) if not os.path.isabs(img_obj.file_path) else img_obj.file_path
-                if not os.path.exists(img_path): img_path = img_obj.file_path
-                if os.path.exists(img_path):
-                    pil_img = PILImage.open(img_path)
-                    w, h = pil_img.size
-                    max_w, max_h = 8*cm, 6*cm
-                    ratio = min(max_w / w, max_h / h)
-                    rl_img = Image(img_path, width=w*ratio, height=h*ratio)
-                    rl_img.hAlign = 'CENTER'
-                    row_imgs.append(rl_img)
-                else:
-                    row_imgs.append(Paragraph("Image not found", body_style))
-            except:
+            if photos[i]:
+                row_imgs.append(photo_flowable(photos[i], 8*cm, 6*cm, h_align='CENTER',
+                                               size=(img_obj.width, img_obj.height)))
+            elif photos[i] is None:
+                row_imgs.append(Paragraph("Image not found", body_style))
+            else:
                 row_imgs.append(Paragraph("Image error", body_style))
 
             caption_text = getattr(img_obj, 'caption', '') or ""
@@ -550,17 +572,7 @@ def build_report_pdf(report_id):
 
     eng_sig_cell = Spacer(1, 1.5*cm)
     if engineer and engineer.signature_data:
-        try:
-            sig_b64 = engineer.signature_data
-            if "base64," in sig_b64: sig_b64 = sig_b64.split("base64,")[1]
-            sig_bytes = base64.b64decode(sig_b64)
-            sig_pil = PILImage.open(BytesIO(sig_bytes)).convert("RGBA")
-            sig_buf = BytesIO()
-            sig_pil.save(sig_buf, format="PNG")
-            sig_buf.seek(0)
-            eng_sig_cell = Image(sig_buf, width=4*cm, height=1.5*cm)
-            eng_sig_cell.hAlign = 'CENTER'
-        except: pass
+        eng_sig_cell = image_flowable(engineer.signature_data, width=4*cm, height=1.5*cm, h_align='CENTER') or eng_sig_cell
 
     sig_rows = [
         [Paragraph("ENGINEER", sig_label_style), Paragraph("CLIENT / CUSTOMER", sig_label_style)],
@@ -586,7 +598,7 @@ def build_report_pdf(report_id):
     ]))
 
     # ─── DIGITAL DOCUMENT NOTICE ────────────────────────────────
-    gen_ts = datetime.now().strftime("%d %B %Y, %H:%M WIB")
+    gen_ts = issued.strftime("%d %B %Y, %H:%M WIB")
     digital_notice = Table([[
         Paragraph(
             f'<font color="#6B7280" size="7.5">'
@@ -652,10 +664,12 @@ def build_report_pdf(report_id):
             self.drawCentredString(pw/2, 1.4*cm, FLOTECH_INFO["email"])
             self.setFillColor(colors.HexColor("#9CA3AF"))
             self.drawCentredString(pw/2, 1.0*cm,
-                f"Generated: {datetime.now().strftime('%d %B %Y %H:%M')}  \xb7  Page {page_num} of {total}")
+                f"Updated: {issued.strftime('%d %B %Y %H:%M')}  \xb7  Page {page_num} of {total}")
             self.restoreState()
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, canvasmaker=NumberedCanvas)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
@@ -665,11 +679,17 @@ def build_report_pdf(report_id):
 def generate_pdf(report_id):
     report = Report.query.get(report_id)
     if not report: return jsonify({"error": "Report not found"}), 404
-    buf = build_report_pdf(report_id)
-    if not buf: return jsonify({"error": "PDF generation failed"}), 500
-    return send_file(buf, as_attachment=True,
-        download_name=f"{report.report_number or 'report'}_{report.report_type}.pdf",
-        mimetype="application/pdf")
+    output = request_profile()
+    if output is None: return profile_error()
+
+    def build():
+        return pdf_response(f"report-{report_id}-{output.name}", (*version, pdf_version(), output),
+                            lambda: build_report_pdf(report_id, output),
+                            f"{report.report_number or 'report'}_{report.report_type}.pdf") \
+            or (jsonify({"error": "PDF generation failed"}), 500)
+
+    version = _report_version(report)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
 
 
 @report_bp.route('/pdf/preview/<int:report_id>', methods=['GET'])
@@ -677,7 +697,14 @@ def generate_pdf(report_id):
 def preview_pdf(report_id):
     report = Report.query.get(report_id)
     if not report: return jsonify({"error": "Report not found"}), 404
-    buf = build_report_pdf(report_id)
-    if not buf: return jsonify({"error": "PDF generation failed"}), 500
-    return Response(buf, mimetype="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={report.report_number}_{report.report_type}.pdf"})
\ No newline at end of file
+    output = request_profile(preview=True)
+    if output is None: return profile_error()
+
+    def build():
+        return pdf_response(f"report-{report_id}-{output.name}", (*version, pdf_version(), output),
+                            lambda: build_report_pdf(report_id, output),
+                            f"{report.report_number}_{report.report_type}.pdf", inline=True) \
+            or (jsonify({"error": "PDF generation failed"}), 500)
+
+    version = _report_version(report)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
\ No newline at end of file
@@ -5,11 +5,9 @@ from datetime import datetime
 
 from flask import send_file
 from io import BytesIO
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-from reportlab.lib.styles import ParagraphStyle
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import conditional, table_version
 
 
 stock_bp = Blueprint('stock', __name__)
@@ -63,8 +61,11 @@ def unit_to_dict(u):
 @stock_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_units():
-    units = StockUnit.query.order_by(StockUnit.created_at.desc()).all()
-    return jsonify([unit_to_dict(u) for u in units]), 200
+    def build():
+        units = StockUnit.query.order_by(StockUnit.created_at.desc()).all()
+        return jsonify([unit_to_dict(u) for u in units]), 200
+
+    return conditional(build, table_version(StockUnit))
 
 
 @stock_bp.route('/create', methods=['POST'])
@@ -164,6 +165,7 @@ def _ps(name, **kw):
     return ParagraphStyle(name, **kw)
 
 
+@profiled("stock")
 def build_stock_pdf(units, category_filter, status_filter):
     from io import BytesIO
     from reportlab.lib.pagesizes import A4, landscape
@@ -357,7 +359,9 @@ def build_stock_pdf(units, category_filter, status_filter):
             "Dokumen ini digenerate otomatis oleh sistem")
         canvas.restoreState()
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, onFirstPage=footer, onLaterPages=footer)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
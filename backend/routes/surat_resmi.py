@@ -3,32 +3,28 @@ backend/routes/surat_resmi.py
 Surat Rekomendasi & Surat Pernyataan — PT Flotech Controls Indonesia
 Fixes:
   - Image from contenteditable rendered in PDF (base64 extracted)
-  - Real logo.png from frontend/public or backend/static
+  - Real logo.png via the shared asset registry
   - Consistent left/right margins on header/footer lines
   - Cleaner PDF layout
 """
-from flask import Blueprint, request, jsonify, send_file, Response, current_app
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models import Engineer
 from datetime import datetime
 from io import BytesIO
-import base64
-import re as _re
 import os
 
-# ── ReportLab (all at top level) ───────────────────────────────────────────────
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    HRFlowable, KeepTogether
-)
-from reportlab.platypus import Image as RLImage
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm, mm
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
-from PIL import Image as PILImage
+# ReportLab is imported inside the PDF functions so startup does not pay for it
+# (even reportlab.lib.units pulls in reportlab.lib.utils and PIL).
+from asset_registry import assets
+from image_cache import image_flowable, OUTPUT_PROFILES
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import conditional, table_version, pdf_version, newest
+from pdf_delivery import pdf_response, request_profile, profile_error, issued_at
+from upload_store import ingest_inline_images, expand_upload_urls, resolve_upload, sync_html_refs
+from cache import lookup
 
 surat_resmi_bp = Blueprint("surat_resmi", __name__)
 
@@ -43,12 +39,6 @@ FLOTECH_INFO = {
 MONTHS_ID = ["Januari","Februari","Maret","April","Mei","Juni",
              "Juli","Agustus","September","Oktober","November","Desember"]
 
-# Page constants
-PAGE_W, PAGE_H = A4          # 595.27 x 841.89 pt
-MARGIN_L = MARGIN_R = 2.5 * cm
-USABLE_W = PAGE_W - MARGIN_L - MARGIN_R   # ≈ 495 pt
-
-
 # ── MODEL ──────────────────────────────────────────────────────────────────────
 class SuratResmi(db.Model):
     __tablename__ = "surat_resmi"
@@ -71,8 +61,9 @@ class SuratResmi(db.Model):
     updated_at        = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-def to_dict(s, include_content=False):
-    eng = Engineer.query.get(s.engineer_id) if s.engineer_id else None
+def to_dict(s, include_content=False, engineers=None):
+    """`engineers` (id -> Engineer), when given, is used instead of the cached lookup()."""
+    eng = engineers.get(s.engineer_id) if engineers is not None else lookup(Engineer, s.engineer_id)
     d = {
         "id": s.id, "nomor": s.nomor, "surat_type": s.surat_type,
         "perihal": s.perihal, "lampiran": s.lampiran,
@@ -88,7 +79,7 @@ def to_dict(s, include_content=False):
         "updated_at": s.updated_at.isoformat() if s.updated_at else None,
     }
     if include_content:
-        d["content_html"] = s.content_html
+        d["content_html"] = expand_upload_urls(s.content_html, request.host_url)
         if eng:
             d["engineer_signature"] = eng.signature_data
     return d
@@ -98,8 +89,13 @@ def to_dict(s, include_content=False):
 @surat_resmi_bp.route("/list", methods=["GET"])
 @jwt_required()
 def list_surat():
-    items = SuratResmi.query.order_by(SuratResmi.created_at.desc()).all()
-    return jsonify([to_dict(s) for s in items]), 200
+    def build():
+        items = SuratResmi.query.order_by(SuratResmi.created_at.desc()).all()
+        # From the database like the ETag (table_version(Engineer)), not from lookup()
+        engineers = {e.id: e for e in Engineer.query.all()}
+        return jsonify([to_dict(s, engineers=engineers) for s in items]), 200
+
+    return conditional(build, table_version(SuratResmi), table_version(Engineer))
 
 
 @surat_resmi_bp.route("/create", methods=["POST"])
@@ -123,22 +119,30 @@ def create_surat():
         surat_date=surat_date,
         kepada_nama=data.get("kepada_nama"), kepada_jabatan=data.get("kepada_jabatan"),
         kepada_perusahaan=data.get("kepada_perusahaan"), kepada_alamat=data.get("kepada_alamat"),
-        content_html=data.get("content_html", ""),
+        content_html=ingest_inline_images(data.get("content_html", "")),
         engineer_id=engineer_id,
         include_signature=data.get("include_signature", True),
         status=data.get("status", "draft"),
         created_by=user_id,
     )
+    sync_html_refs("", s.content_html)
     db.session.add(s); db.session.commit()
     return jsonify({"message": "Created", "id": s.id}), 201
 
 
+def _version(s):
+    eng = lookup(Engineer, s.engineer_id)
+    return s.updated_at, eng.updated_at if eng else None
+
+
 @surat_resmi_bp.route("/detail/<int:sid>", methods=["GET"])
 @jwt_required()
 def get_detail(sid):
     s = SuratResmi.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    return jsonify(to_dict(s, include_content=True)), 200
+    version = _version(s)
+    return conditional(lambda: (jsonify(to_dict(s, include_content=True)), 200),
+                       *version, last_modified=newest(*version))
 
 
 @surat_resmi_bp.route("/update/<int:sid>", methods=["PUT"])
@@ -149,8 +153,12 @@ def update_surat(sid):
     data = request.get_json()
     for f in ["nomor","surat_type","perihal","lampiran","kepada_nama",
               "kepada_jabatan","kepada_perusahaan","kepada_alamat",
-              "content_html","include_signature","status"]:
+              "include_signature","status"]:
         if f in data: setattr(s, f, data[f])
+    if "content_html" in data:
+        new_html = ingest_inline_images(data["content_html"])
+        sync_html_refs(s.content_html, new_html)
+        s.content_html = new_html
     if "engineer_id" in data:
         eid = data["engineer_id"]
         s.engineer_id = int(eid) if eid not in (None, "", 0, "0") else None
@@ -167,180 +175,51 @@ def update_surat(sid):
 def delete_surat(sid):
     s = SuratResmi.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
+    sync_html_refs(s.content_html, "")
     db.session.delete(s); db.session.commit()
     return jsonify({"message": "Deleted"}), 200
 
 
 # ── PDF HELPERS ────────────────────────────────────────────────────────────────
 def _ps(name, **kw):
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
     d = dict(fontName="Helvetica", fontSize=10,
              textColor=colors.HexColor("#374151"), leading=15)
     d.update(kw)
     return ParagraphStyle(name, **d)
 
 
-def _find_logo():
-    """Try several paths to find the Flotech logo."""
-    candidates = [
-        # backend/static/logo.png
-        os.path.join(os.path.dirname(__file__), "..", "static", "logo.png"),
-        # project root/frontend/public/logo.png
-        os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "public", "logo.png"),
-        # frontend/src/assets/logo.png
-        os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "src", "assets", "logo.png"),
-        "/app/static/logo.png",
-    ]
-    for p in candidates:
-        norm = os.path.normpath(p)
-        if os.path.isfile(norm):
-            return norm
-    return None
-
-
 def _b64_to_rl_image(b64_str, max_w, max_h):
-    """Convert a base64 image string to a ReportLab Image flowable."""
-    try:
-        if "base64," in b64_str:
-            b64_str = b64_str.split("base64,")[1]
-        raw = base64.b64decode(b64_str)
-        pil = PILImage.open(BytesIO(raw)).convert("RGBA")
-        buf = BytesIO()
-        pil.save(buf, format="PNG")
-        buf.seek(0)
-
-        # Scale proportionally
-        ow, oh = pil.size
-        ratio = min(max_w / ow, max_h / oh, 1.0)
-        w, h = ow * ratio, oh * ratio
-
-        img = RLImage(buf, width=w, height=h)
-        img.hAlign = "LEFT"
-        return img
-    except Exception:
-        return None
-
+    """Convert a base64 image string to a ReportLab Image flowable (decoded once, cached)."""
+    return image_flowable(b64_str, max_w=max_w, max_h=max_h, h_align="LEFT")
 
-def _html_to_flowables(html_str):
-    """
-    Convert HTML from contenteditable to ReportLab flowables.
-    Handles: bold/italic/underline, ol/ul lists, paragraphs,
-             inline base64 images, plain text.
-    """
-    if not html_str or not html_str.strip():
-        return []
 
-    flowables = []
-
-    # ── Extract and replace <img> tags first ──────────────────────
-    def replace_img(m):
-        src = m.group(1)
-        return f"\x00IMG\x00{src}\x00IMGEND\x00"
-
-    html_str = _re.sub(
-        r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>',
-        replace_img, html_str, flags=_re.IGNORECASE
+# ── PDF BUILDER ────────────────────────────────────────────────────────────────
+@profiled("surat_resmi")
+def build_pdf(sid, output=None):
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+        HRFlowable, KeepTogether
     )
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm, mm
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
+    from html_flowables import HtmlProfile, html_to_flowables
 
-    # Normalize breaks
-    html_str = _re.sub(r'<br\s*/?>', '\n', html_str, flags=_re.IGNORECASE)
-    html_str = _re.sub(r'</p>\s*<p[^>]*>', '\n', html_str, flags=_re.IGNORECASE)
-    html_str = _re.sub(r'</div>\s*<div[^>]*>', '\n', html_str, flags=_re.IGNORECASE)
-
-    # Convert lists
-    def proc_list(m):
-        tag = m.group(1).lower()
-        inner = m.group(2)
-        items = _re.findall(r'<li[^>]*>(.*?)</li>', inner, _re.DOTALL | _re.IGNORECASE)
-        result = []
-        for i, item in enumerate(items):
-            clean = _re.sub(r'<[^>]+>', '', item).strip()
-            clean = clean.replace('&nbsp;',' ').replace('&amp;','&').replace('&lt;','<').replace('&gt;','>')
-            result.append(f"__OL__{i+1}. {clean}" if tag == 'ol' else f"__UL__\u2022  {clean}")
-        return '\n'.join(result) + '\n'
-
-    html_str = _re.sub(r'<(ol|ul)[^>]*>(.*?)</(ol|ul)>', proc_list,
-                       html_str, flags=_re.DOTALL | _re.IGNORECASE)
-
-    # Split by block elements
-    blocks = _re.split(r'<(?:p|div|h[1-6])[^>]*>|</(?:p|div|h[1-6])>',
-                       html_str, flags=_re.IGNORECASE)
-
-    for block in blocks:
-        block = block.strip()
-        if not block:
-            continue
-
-        for line in block.split('\n'):
-            line = line.strip()
-            if not line:
-                flowables.append(Spacer(1, 0.18 * cm))
-                continue
-
-            # ── Image token ───────────────────────────────────
-            if '\x00IMG\x00' in line:
-                img_srcs = _re.findall(r'\x00IMG\x00(.*?)\x00IMGEND\x00', line)
-                for src in img_srcs:
-                    if src.startswith('data:'):
-                        img_el = _b64_to_rl_image(src, USABLE_W * 0.9, 12 * cm)
-                        if img_el:
-                            flowables.append(Spacer(1, 0.2 * cm))
-                            flowables.append(img_el)
-                            flowables.append(Spacer(1, 0.2 * cm))
-                # Also handle any text after/before img tokens
-                text_part = _re.sub(r'\x00IMG\x00.*?\x00IMGEND\x00', '', line).strip()
-                if text_part:
-                    text_part = _clean_inline(text_part)
-                    if text_part:
-                        flowables.append(Paragraph(text_part,
-                            _ps('Body', alignment=TA_JUSTIFY, leading=17)))
-                        flowables.append(Spacer(1, 0.1 * cm))
-                continue
-
-            # ── List items ────────────────────────────────────
-            if line.startswith('__OL__') or line.startswith('__UL__'):
-                text = line[6:]
-                flowables.append(Paragraph(text,
-                    _ps('Li', leftIndent=1.2*cm, leading=16, alignment=TA_LEFT)))
-                flowables.append(Spacer(1, 0.08 * cm))
-                continue
-
-            # ── Normal paragraph ─────────────────────────────
-            cleaned = _clean_inline(line)
-            if cleaned:
-                flowables.append(Paragraph(cleaned,
-                    _ps('Body', alignment=TA_JUSTIFY, leading=17)))
-                flowables.append(Spacer(1, 0.1 * cm))
-
-    return flowables
-
-
-def _clean_inline(line):
-    """Convert inline HTML tags to ReportLab XML and strip the rest."""
-    line = _re.sub(r'<strong[^>]*>(.*?)</strong>', r'<b>\1</b>',
-                   line, flags=_re.IGNORECASE | _re.DOTALL)
-    line = _re.sub(r'<b[^>]*>(.*?)</b>', r'<b>\1</b>',
-                   line, flags=_re.IGNORECASE | _re.DOTALL)
-    line = _re.sub(r'<em[^>]*>(.*?)</em>', r'<i>\1</i>',
-                   line, flags=_re.IGNORECASE | _re.DOTALL)
-    line = _re.sub(r'<i[^>]*>(.*?)</i>', r'<i>\1</i>',
-                   line, flags=_re.IGNORECASE | _re.DOTALL)
-    line = _re.sub(r'<u[^>]*>(.*?)</u>', r'<u>\1</u>',
-                   line, flags=_re.IGNORECASE | _re.DOTALL)
-    # Strip remaining tags (but keep our rl tags)
-    line = _re.sub(r'<(?!/?b>|/?i>|/?u>)[^>]+>', '', line)
-    line = (line.replace('&nbsp;', ' ').replace('&amp;', '&')
-                .replace('&lt;', '<').replace('&gt;', '>')
-                .replace('&quot;', '"'))
-    return line.strip()
+    # Page constants
+    PAGE_W, PAGE_H = A4          # 595.27 x 841.89 pt
+    MARGIN_L = MARGIN_R = 2.5 * cm
+    USABLE_W = PAGE_W - MARGIN_L - MARGIN_R   # ≈ 495 pt
 
-
-# ── PDF BUILDER ────────────────────────────────────────────────────────────────
-def build_pdf(sid):
     s = SuratResmi.query.get(sid)
     if not s:
         return None
+    issued = issued_at(s.updated_at or s.created_at)  # not now(): the PDF is cached per version
 
-    eng = Engineer.query.get(s.engineer_id) if s.engineer_id else None
+    eng = lookup(Engineer, s.engineer_id)
+    pdf_profiler.mark("load")
 
     buffer   = BytesIO()
     primary  = colors.HexColor("#0B3D91")
@@ -374,21 +253,9 @@ def build_pdf(sid):
     ]
 
     # Right: Logo or fallback box
-    logo_path = _find_logo()
-    if logo_path:
-        try:
-            logo_pil = PILImage.open(logo_path)
-            ow, oh = logo_pil.size
-            logo_h = 1.6 * cm
-            logo_w = min(ow / oh * logo_h, 5 * cm)
-            right_el = RLImage(logo_path, width=logo_w, height=logo_h)
-            right_el.hAlign = "RIGHT"
-            right_cell = [right_el]
-        except Exception:
-            right_cell = [Paragraph(
-                '<b><font color="#FFFFFF">FLOTECH</font></b>',
-                _ps("LogoFB", fontName="Helvetica-Bold", fontSize=12,
-                    alignment=TA_CENTER, textColor=colors.white, leading=28))]
+    logo_el = assets.logo_flowable(height=1.6 * cm, max_width=5 * cm, h_align="RIGHT")
+    if logo_el is not None:
+        right_cell = [logo_el]
     else:
         right_cell = [Paragraph(
             '<b><font color="#FFFFFF">FLOTECH</font></b>',
@@ -403,7 +270,7 @@ def build_pdf(sid):
         ("VALIGN",      (0, 0), (-1, -1), "MIDDLE"),
         ("ALIGN",       (1, 0), (1, -1),  "RIGHT"),
     ]
-    if not logo_path:
+    if logo_el is None:
         # Only add blue background for fallback text box
         hdr_style += [
             ("BACKGROUND",  (1, 0), (1, -1),  primary),
@@ -475,7 +342,14 @@ def build_pdf(sid):
     elements.append(Spacer(1, 0.35 * cm))
 
     # ── BODY ──────────────────────────────────────────────────────
-    body = _html_to_flowables(s.content_html or "")
+    body = html_to_flowables(s.content_html or "", HtmlProfile(
+        _ps('Body', alignment=TA_JUSTIFY, leading=17),
+        li=_ps('Li', leftIndent=1.2*cm, leading=16, alignment=TA_LEFT),
+        para_space=0.1 * cm, li_space=0.08 * cm, gap=0.18 * cm,
+        img_max_w=USABLE_W * 0.9, img_max_h=12 * cm,
+        resolve_upload=resolve_upload,
+        output=output or OUTPUT_PROFILES[current_app.config["PDF_OUTPUT_PROFILE"]],
+    ))
     elements.extend(body)
     elements.append(Spacer(1, 0.5 * cm))
 
@@ -537,30 +411,42 @@ def build_pdf(sid):
         canvas.setFillColor(colors.HexColor("#9CA3AF"))
         canvas.setFont("Helvetica", 7.5)
         canvas.drawCentredString(PAGE_W / 2, 1.1 * cm,
-            f"Generated: {datetime.now().strftime('%d %B %Y %H:%M')}   |   Halaman {doc_obj.page}")
+            f"Updated: {issued.strftime('%d %B %Y %H:%M')}   |   Halaman {doc_obj.page}")
         canvas.restoreState()
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, onFirstPage=draw_footer, onLaterPages=draw_footer)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
 
 # ── PDF ROUTES ────────────────────────────────────────────────────────────────
+def _pdf(s, sid, version, output, inline=False):
+    fname = (f"Surat_{s.surat_type.capitalize()}_{(s.nomor or str(sid))}.pdf"
+             .replace("/", "-").replace(" ", "_"))
+    try:
+        return pdf_response(f"surat_resmi-{sid}-{output.name}", (*version, pdf_version(), output),
+                            lambda: build_pdf(sid, output), fname, inline=inline) \
+            or (jsonify({"error": "Failed"}), 500)
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return jsonify({"error": f"PDF error: {str(e)}"}), 500
+
+
 @surat_resmi_bp.route("/pdf/<int:sid>", methods=["GET"])
 @jwt_required()
 def download_pdf(sid):
     s = SuratResmi.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    try:
-        buf = build_pdf(sid)
-    except Exception as e:
-        import traceback; traceback.print_exc()
-        return jsonify({"error": f"PDF error: {str(e)}"}), 500
-    if not buf: return jsonify({"error": "Failed"}), 500
-    fname = (f"Surat_{s.surat_type.capitalize()}_{(s.nomor or str(sid))}.pdf"
-             .replace("/", "-").replace(" ", "_"))
-    return send_file(buf, as_attachment=True, download_name=fname,
-                     mimetype="application/pdf")
+    output = request_profile()
+    if output is None: return profile_error()
+
+    def build():
+        return _pdf(s, sid, version, output)
+
+    version = _version(s)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
 
 
 @surat_resmi_bp.route("/pdf/preview/<int:sid>", methods=["GET"])
@@ -568,13 +454,11 @@ def download_pdf(sid):
 def preview_pdf(sid):
     s = SuratResmi.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    try:
-        buf = build_pdf(sid)
-    except Exception as e:
-        import traceback; traceback.print_exc()
-        return jsonify({"error": f"PDF error: {str(e)}"}), 500
-    if not buf: return jsonify({"error": "Failed"}), 500
-    fname = (f"Surat_{s.surat_type.capitalize()}_{(s.nomor or str(sid))}.pdf"
-             .replace("/", "-").replace(" ", "_"))
-    return Response(buf, mimetype="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={fname}"})
\ No newline at end of file
+    output = request_profile(preview=True)
+    if output is None: return profile_error()
+
+    def build():
+        return _pdf(s, sid, version, output, inline=True)
+
+    version = _version(s)
+    return conditional(build, *version, pdf_version(), output, last_modified=newest(*version))
\ No newline at end of file
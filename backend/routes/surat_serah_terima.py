@@ -1,15 +1,14 @@
-from flask import Blueprint, request, jsonify, send_file, Response, current_app
+from flask import Blueprint, request, jsonify, current_app
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable, Image
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
 from io import BytesIO
-from PIL import Image as PILImage
-import base64
+from asset_registry import assets
+from image_cache import image_flowable
+import pdf_profiler
+from pdf_profiler import profiled
+from http_cache import conditional, table_version, pdf_version
+from pdf_delivery import pdf_response, issued_at
 import os
 
 surat_bp = Blueprint('surat', __name__)
@@ -70,8 +69,11 @@ def surat_to_dict(s, include_sig=False):
 @surat_bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_surat():
-    items = SuratSerahTerima.query.order_by(SuratSerahTerima.created_at.desc()).all()
-    return jsonify([surat_to_dict(s) for s in items]), 200
+    def build():
+        items = SuratSerahTerima.query.order_by(SuratSerahTerima.created_at.desc()).all()
+        return jsonify([surat_to_dict(s) for s in items]), 200
+
+    return conditional(build, table_version(SuratSerahTerima))
 
 
 @surat_bp.route('/create', methods=['POST'])
@@ -108,7 +110,8 @@ def create_surat():
 def get_detail(sid):
     s = SuratSerahTerima.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    return jsonify(surat_to_dict(s, include_sig=True)), 200
+    return conditional(lambda: (jsonify(surat_to_dict(s, include_sig=True)), 200),
+                       s.updated_at, last_modified=s.updated_at)
 
 
 @surat_bp.route('/update/<int:sid>', methods=['PUT'])
@@ -144,9 +147,18 @@ def delete_surat(sid):
 # ── PDF BUILDER ──────────────────────────────────────────────────────────────
 # usable_w = A4(210mm) - 2x2.5cm = 165mm = 16.5cm
 # ─────────────────────────────────────────────────────────────────────────────
+@profiled("surat_serah_terima")
 def build_surat_pdf(sid):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+
     s = SuratSerahTerima.query.get(sid)
     if not s: return None
+    issued = issued_at(s.updated_at or s.created_at)  # not now(): the PDF is cached per version
+    pdf_profiler.mark("load")
 
     buffer = BytesIO()
     LEFT = RIGHT = 2.5*cm
@@ -195,20 +207,11 @@ def build_surat_pdf(sid):
         p2_header_color = primary
 
     # ── HEADER ──────────────────────────────────────────────────
-    logo_path = os.path.join(current_app.root_path, "assets", "logo.png")
     logo_col_w = 7.5*cm
     title_col_w = USABLE_W - logo_col_w  # 9cm
 
-    if os.path.exists(logo_path):
-        try:
-            pil_logo = PILImage.open(logo_path)
-            lw, lh = pil_logo.size
-            target_h = 1.6*cm
-            target_w = min((lw / lh) * target_h, 4.5*cm)
-            logo_cell = Image(logo_path, width=target_w, height=target_h)
-        except:
-            logo_cell = Paragraph("<b>FLOTECH</b>", ps('LF', fontSize=16, fontName='Helvetica-Bold', textColor=primary))
-    else:
+    logo_cell = assets.logo_flowable(height=1.6*cm, max_width=4.5*cm)
+    if logo_cell is None:
         logo_cell = Paragraph("<b>FLOTECH</b>", ps('LF', fontSize=16, fontName='Helvetica-Bold', textColor=primary))
 
     right_block = Table([
@@ -376,16 +379,8 @@ def build_surat_pdf(sid):
 
     # ── SIGNATURES (two columns) ─────────────────────────────────
     def sig_image(b64_data):
-        if not b64_data: return Spacer(1, 1.8*cm)
-        try:
-            data = b64_data
-            if "base64," in data: data = data.split("base64,")[1]
-            pil_img = PILImage.open(BytesIO(base64.b64decode(data))).convert("RGBA")
-            buf = BytesIO(); pil_img.save(buf, format="PNG"); buf.seek(0)
-            img = Image(buf, width=4*cm, height=1.6*cm)
-            img.hAlign = 'CENTER'
-            return img
-        except: return Spacer(1, 1.8*cm)
+        img = image_flowable(b64_data, width=4*cm, height=1.6*cm, h_align='CENTER')
+        return img or Spacer(1, 1.8*cm)
 
     sig_l  = ps('SL',  fontSize=9, fontName='Helvetica-Bold', alignment=1)
     sig_sub = ps('SS', fontSize=8, textColor=gray, alignment=1, leading=11)
@@ -432,10 +427,12 @@ def build_surat_pdf(sid):
         cv.drawCentredString(pw/2, 1.7*cm, FLOTECH_INFO["telp"])
         cv.drawCentredString(pw/2, 1.4*cm, FLOTECH_INFO["email"])
         cv.setFillColor(colors.HexColor("#9CA3AF"))
-        cv.drawCentredString(pw/2, 1.0*cm, f"Generated: {datetime.now().strftime('%d %B %Y %H:%M')}  |  Halaman {doc_obj.page}")
+        cv.drawCentredString(pw/2, 1.0*cm, f"Updated: {issued.strftime('%d %B %Y %H:%M')}  |  Halaman {doc_obj.page}")
         cv.restoreState()
 
+    pdf_profiler.mark("flowables")
     doc.build(elements, onFirstPage=footer_canvas, onLaterPages=footer_canvas)
+    pdf_profiler.done(doc, buffer)
     buffer.seek(0)
     return buffer
 
@@ -445,9 +442,13 @@ def build_surat_pdf(sid):
 def download_pdf(sid):
     s = SuratSerahTerima.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    buf = build_surat_pdf(sid)
-    if not buf: return jsonify({"error": "Failed"}), 500
-    return send_file(buf, as_attachment=True, download_name=f"Surat_{s.surat_number}.pdf", mimetype="application/pdf")
+
+    def build():
+        return pdf_response(f"surat-{sid}", (s.updated_at, pdf_version()), lambda: build_surat_pdf(sid),
+                            f"Surat_{s.surat_number}.pdf") \
+            or (jsonify({"error": "Failed"}), 500)
+
+    return conditional(build, s.updated_at, pdf_version(), last_modified=s.updated_at)
 
 
 @surat_bp.route('/pdf/preview/<int:sid>', methods=['GET'])
@@ -455,7 +456,10 @@ def download_pdf(sid):
 def preview_pdf(sid):
     s = SuratSerahTerima.query.get(sid)
     if not s: return jsonify({"error": "Not found"}), 404
-    buf = build_surat_pdf(sid)
-    if not buf: return jsonify({"error": "Failed"}), 500
-    return Response(buf, mimetype="application/pdf",
-        headers={"Content-Disposition": f"inline; filename=Surat_{s.surat_number}.pdf"})
\ No newline at end of file
+
+    def build():
+        return pdf_response(f"surat-{sid}", (s.updated_at, pdf_version()), lambda: build_surat_pdf(sid),
+                            f"Surat_{s.surat_number}.pdf", inline=True) \
+            or (jsonify({"error": "Failed"}), 500)
+
+    return conditional(build, s.updated_at, pdf_version(), last_modified=s.updated_at)
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+backend/routes/upload.py
+Chunked, resumable uploads for catalog files and report photos.
+
+    POST   /api/upload/init            {purpose, filename, size, type?, sha256?, report_id?, fields?}
+                                        → {id, offset: 0, chunk_size}
+                                        (400 if the name / MIME type is not allowed for the purpose)
+    PUT    /api/upload/<id>?offset=N    raw bytes (application/octet-stream),
+                                        optional header X-Chunk-Sha256
+                                        → {offset}   409 {offset} if N is not the current offset
+    GET    /api/upload/<id>             → {offset, size}   (where to resume after a dropped connection)
+    POST   /api/upload/<id>/complete    checks size / sha256, then stores the file exactly like
+                                        /api/catalog/upload or /api/report/upload/<id>
+    DELETE /api/upload/<id>             abandon
+
+Chunks are streamed from the socket straight into UPLOAD_PARTIAL_FOLDER/<id>.part;
+nothing larger than a 64 KB read buffer is held in memory. A chunk whose
+checksum does not match is cut off again, so the client just resends it.
+No database transaction is open while a chunk streams in (a slow client would
+hold a pooled connection and the row lock for the whole transfer): the .part
+file is locked instead (flock, 409 if another chunk of the session is being
+written) and the offset is advanced afterwards with a conditional UPDATE.
+Sessions untouched for UPLOAD_SESSION_TTL_HOURS are removed on the next init.
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows (development only): chunks of one session are not locked
+    fcntl = None
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import db
+from models import Report
+from upload_store import save_file, file_ext
+
+upload_bp = Blueprint("upload", __name__)
+
+PURPOSES = ("catalog", "report_image")
+READ_BLOCK = 64 * 1024
+
+
+class UploadSession(db.Model):
+    __tablename__ = "upload_sessions"
+    id         = db.Column(db.String(32), primary_key=True)
+    user_id    = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    purpose    = db.Column(db.String(20), nullable=False)   # catalog / report_image
+    report_id  = db.Column(db.Integer, db.ForeignKey("reports.id"), nullable=True)
+    filename   = db.Column(db.String(300), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received   = db.Column(db.BigInteger, default=0)
+    sha256     = db.Column(db.String(64))     # of the whole file, checked on complete (optional)
+    fields     = db.Column(db.JSON)           # catalog title / brand / ..., photo caption
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def _partial_path(sid):
+    folder = current_app.config["UPLOAD_PARTIAL_FOLDER"]
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{sid}.part")
+
+
+def _remove(s):
+    try:
+        os.remove(_partial_path(s.id))
+    except FileNotFoundError:
+        pass
+    db.session.delete(s)
+
+
+def purge_stale():
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config["UPLOAD_SESSION_TTL_HOURS"])
+    stale = UploadSession.query.filter(UploadSession.updated_at < cutoff).all()
+    for s in stale:
+        _remove(s)
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def _try_lock(f):
+    """Exclusive lock on an open .part file, released when it is closed; False if taken."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _received(sid):
+    """Current offset of a session (None if it is gone), read without keeping a transaction open."""
+    received = db.session.query(UploadSession.received).filter_by(id=sid).scalar()
+    db.session.rollback()
+    return received
+
+
+def _get_session(sid, lock=False):
+    query = UploadSession.query.filter_by(id=sid, user_id=int(get_jwt_identity()))
+    if lock:
+        query = query.with_for_update()  # one writer per session
+    return query.first()
+
+
+def _status(s):
+    return {"id": s.id, "offset": s.received, "size": s.total_size,
+            "chunk_size": current_app.config["UPLOAD_CHUNK_SIZE"]}
+
+
+@upload_bp.route("/init", methods=["POST"])
+@jwt_required()
+def init_upload():
+    from routes.catalog import ALLOWED_EXTENSIONS
+
+    data = request.get_json() or {}
+    purpose = data.get("purpose")
+    filename = (data.get("filename") or "").strip()
+    try:
+        size = int(data.get("size"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "size is required"}), 400
+    if purpose not in PURPOSES:
+        return jsonify({"error": f"purpose must be one of {', '.join(PURPOSES)}"}), 400
+    if not filename:
+        return jsonify({"error": "filename is required"}), 400
+    if size <= 0:
+        return jsonify({"error": "Empty file"}), 400
+    if size > current_app.config["UPLOAD_MAX_SIZE"]:
+        return jsonify({"error": "File too large"}), 413
+
+    report_id = None
+    if purpose == "catalog":
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            return jsonify({"error": f"File type not allowed: {ext}"}), 400
+    else:
+        from photo_ingest import photo_type_error
+        error = photo_type_error(filename, data.get("type"))
+        if error:
+            return jsonify({"error": error}), 400
+        report_id = data.get("report_id")
+        if not report_id or not db.session.get(Report, report_id):
+            return jsonify({"error": "Report not found"}), 404
+
+    purge_stale()
+    s = UploadSession(
+        id=uuid.uuid4().hex, user_id=int(get_jwt_identity()), purpose=purpose,
+        report_id=report_id, filename=filename, total_size=size, received=0,
+        sha256=(data.get("sha256") or "").lower() or None, fields=data.get("fields") or {},
+    )
+    open(_partial_path(s.id), "wb").close()
+    db.session.add(s)
+    db.session.commit()
+    return jsonify(_status(s)), 201
+
+
+@upload_bp.route("/<sid>", methods=["GET"])
+@jwt_required()
+def upload_status(sid):
+    s = _get_session(sid)
+    if not s: return jsonify({"error": "Upload not found"}), 404
+    return jsonify(_status(s)), 200
+
+
+@upload_bp.route("/<sid>", methods=["PUT"])
+@jwt_required()
+def append_chunk(sid):
+    s = _get_session(sid)
+    if not s: return jsonify({"error": "Upload not found"}), 404
+    received, total_size = s.received, s.total_size
+    db.session.rollback()  # the connection goes back to the pool before the body is read
+    offset = request.args.get("offset", type=int)
+    if offset != received:
+        return jsonify({"error": "Offset mismatch", "offset": received}), 409
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Content-Length required"}), 411
+    if offset + length > total_size:
+        return jsonify({"error": "Chunk past end of file", "offset": received}), 413
+
+    digest = hashlib.sha256()
+    written = 0
+    path = _partial_path(sid)
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        if not _try_lock(f):
+            return jsonify({"error": "Another chunk of this upload is in progress", "offset": received}), 409
+        # Another chunk may have been committed between the check above and the lock
+        received = _received(sid)
+        if received is None:
+            return jsonify({"error": "Upload not found"}), 404
+        if offset != received:
+            return jsonify({"error": "Offset mismatch", "offset": received}), 409
+        f.seek(offset)
+        f.truncate()  # drop the tail of a chunk that was cut off mid-write
+        while True:
+            block = request.stream.read(READ_BLOCK)
+            if not block:
+                break
+            f.write(block)
+            digest.update(block)
+            written += len(block)
+        expected = request.headers.get("X-Chunk-Sha256", "").lower()
+        if written != length or (expected and expected != digest.hexdigest()):
+            f.truncate(offset)
+            return jsonify({"error": "Chunk incomplete or checksum mismatch", "offset": offset}), 400
+
+        # Committed while the file is still locked, so the next chunk sees the new offset
+        advanced = UploadSession.query.filter_by(id=sid, received=offset).update(
+            {"received": offset + written, "updated_at": datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+    if not advanced:  # completed, cancelled or purged meanwhile
+        received = _received(sid)
+        if received is None:
+            return jsonify({"error": "Upload not found"}), 404
+        return jsonify({"error": "Offset mismatch", "offset": received}), 409
+    return jsonify({"offset": offset + written, "size": total_size}), 200
+
+
+@upload_bp.route("/<sid>/complete", methods=["POST"])
+@jwt_required()
+def complete_upload(sid):
+    s = _get_session(sid, lock=True)
+    if not s: return jsonify({"error": "Upload not found"}), 404
+    path = _partial_path(s.id)
+    if s.received != s.total_size or not os.path.exists(path) or os.path.getsize(path) != s.total_size:
+        return jsonify({"error": "Upload incomplete", "offset": s.received}), 409
+    if s.sha256:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        if digest.hexdigest() != s.sha256:
+            _remove(s)
+            db.session.commit()
+            return jsonify({"error": "Checksum mismatch, upload discarded"}), 400
+
+    fields = s.fields or {}
+    if s.purpose == "catalog":
+        from routes.catalog import catalog_filename, add_catalog_file
+        file_path = save_file(path, file_ext(s.filename))
+        db.session.delete(s)
+        cf = add_catalog_file(catalog_filename(s.filename), file_path, fields)
+        return jsonify({"message": "File uploaded", "id": cf.id}), 201
+
+    from routes.report import add_report_image
+    from photo_ingest import save_photo
+    report = db.session.get(Report, s.report_id)
+    if not report:
+        _remove(s)
+        db.session.commit()
+        return jsonify({"error": "Report not found"}), 404
+    photo = save_photo(path, s.filename)
+    add_report_image(report, photo, fields.get("caption", ""))
+    db.session.delete(s)
+    db.session.commit()
+    return jsonify({"message": "Images uploaded", "files": [photo.file_path]}), 201
+
+
+@upload_bp.route("/<sid>", methods=["DELETE"])
+@jwt_required()
+def abort_upload(sid):
+    s = _get_session(sid)
+    if not s: return jsonify({"error": "Upload not found"}), 404
+    _remove(s)
+    db.session.commit()
+    return jsonify({"message": "Upload cancelled"}), 200
@@ -0,0 +1,37 @@
+"""
+backend/serve.py
+Production server for hosts without gunicorn (e.g. Windows) — waitress.
+
+Usage: pip install waitress && cd backend && python serve.py
+Env: WAITRESS_HOST (0.0.0.0), WAITRESS_PORT (5000), WAITRESS_THREADS (8)
+
+waitress is a single process, so PDF rendering shares one GIL; prefer
+gunicorn (gunicorn.conf.py) where it is available.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    from waitress import serve
+except ImportError:
+    raise SystemExit("waitress belum terinstall: pip install waitress")
+
+# Warm the heavy libraries before the first request pays for them
+import reportlab.platypus  # noqa: F401
+import PIL.Image  # noqa: F401
+import openpyxl  # noqa: F401
+
+from wsgi import app
+
+if __name__ == "__main__":
+    serve(
+        app,
+        host=os.getenv("WAITRESS_HOST", "0.0.0.0"),
+        port=int(os.getenv("WAITRESS_PORT", 5000)),
+        threads=int(os.getenv("WAITRESS_THREADS", 8)),
+        connection_limit=int(os.getenv("WAITRESS_CONNECTION_LIMIT", 100)),
+        channel_timeout=int(os.getenv("WAITRESS_CHANNEL_TIMEOUT", 120)),
+    )
@@ -0,0 +1,447 @@
+"""
+backend/upload_store.py
+Content-addressed files under UPLOAD_FOLDER.
+
+Every uploaded file (report photo, catalog file, image pasted into a surat)
+is stored once as
+
+    blobs/<sha[0:2]>/<sha[2:4]>/<sha256>.<ext>
+
+so the same photo sent from two phones, or attached to several reports, is
+kept once. Two different files can no longer overwrite each other. A path is
+derived from its hash alone, so a lookup is one stat() and no directory
+listing. A stored file never changes, which makes it safe to cache by path.
+
+The blobs table counts references per file. ReportImage.file_path,
+CatalogFile.file_path and the /uploads/blobs/... links in surat HTML each
+acquire() a reference when saved and release() it when removed.
+collect_garbage() deletes only files whose count has been zero for a grace
+period and which it finds unreferenced when it checks the tables again; it
+can run while uploads continue (see its docstring).
+
+Older flat uploads (IMG_0001.jpg in uploads/, uploads/catalog/, uploads/surat/)
+are copied into blobs/ by migration 0016 and their rows repointed; the
+originals are then unreferenced and collect_garbage() removes them. Any
+path still outside blobs/ is not counted; discard() deletes it directly.
+"""
+import base64
+import glob
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from flask import current_app, has_request_context, request
+from sqlalchemy.exc import IntegrityError
+
+
+MIME_EXT = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/bmp": "bmp",
+}
+
+UPLOAD_URL_PREFIX = "/uploads/"
+
+_DATA_IMG_RE = re.compile(
+    r'(<img\b[^>]*?\bsrc=)(["\'])data:(image/[\w.+-]+);base64,([^"\']+)\2',
+    re.IGNORECASE)
+# Absolute /uploads/ URLs; only those on our own origin (_own_origins) are stored relative.
+_ABS_UPLOAD_RE = re.compile(r'(\bsrc=)(["\'])(https?://[^/"\']+)/uploads/', re.IGNORECASE)
+_REL_UPLOAD_RE = re.compile(r'(\bsrc=)(["\'])/uploads/', re.IGNORECASE)
+
+BLOB_DIR = "blobs"
+_BLOB_PATH_RE = re.compile(r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.\w+$")
+_UPLOAD_REF_RE = re.compile(r"/uploads/([^\"'\s?#)<>]+)")
+_BLOB_REF_RE = re.compile(r"/uploads/(blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+)")
+COPY_BLOCK = 1024 * 1024
+
+
+def upload_root():
+    return os.path.abspath(current_app.config["UPLOAD_FOLDER"])
+
+
+def resolve_upload(rel_path):
+    """Absolute path for a path relative to UPLOAD_FOLDER, or None if it escapes the folder."""
+    root = upload_root()
+    path = os.path.abspath(os.path.join(root, rel_path.lstrip("/")))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+
+def locate(file_path):
+    """
+    Absolute path of a stored file_path: relative to UPLOAD_FOLDER (blobs and
+    flat uploads), or an older absolute / cwd-relative path (catalog).
+    """
+    if os.path.isabs(file_path):
+        return file_path
+    path = resolve_upload(file_path)
+    if path is not None and os.path.exists(path):
+        return path
+    return os.path.abspath(file_path)
+
+
+def blob_path(digest, ext):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def blob_digest(rel_path):
+    """SHA-256 of a blobs/... path, or None for anything else."""
+    m = _BLOB_PATH_RE.match(rel_path or "")
+    return m.group(1) if m else None
+
+
+def file_ext(filename, default="bin"):
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    return ext if ext.isalnum() and len(ext) <= 10 else default
+
+
+def _commit_blob(tmp, digest, ext):
+    """Move a finished temp file into place (or drop it if the blob exists) and return its rel path."""
+    rel_path = blob_path(digest, ext)
+    path = os.path.join(upload_root(), rel_path)
+    # Same bytes under another extension (IMG.JPG vs photo.jpeg): keep the first copy
+    for found in glob.glob(os.path.join(os.path.dirname(path), f"{digest}.*")):
+        try:
+            # Restarts the grace period: collect_garbage() puts back a file touched
+            # after it picked it up, and fails this utime() if it got there first
+            os.utime(found)
+        except FileNotFoundError:
+            continue  # being collected: store our copy instead
+        os.remove(tmp)
+        return _rel(found)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp, path)
+    return rel_path
+
+
+def _temp_file():
+    folder = os.path.join(upload_root(), BLOB_DIR, "tmp")
+    os.makedirs(folder, exist_ok=True)
+    return tempfile.mkstemp(dir=folder, suffix=".part")
+
+
+def save_stream(stream, ext):
+    """Copy a file-like object into the store while hashing it; returns the blobs/... path."""
+    digest = hashlib.sha256()
+    fd, tmp = _temp_file()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in iter(lambda: stream.read(COPY_BLOCK), b""):
+                digest.update(block)
+                f.write(block)
+        return _commit_blob(tmp, digest.hexdigest(), ext)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_bytes(data, ext):
+    return save_stream(BytesIO(data), ext)
+
+
+def save_file(src, ext):
+    """Move a finished file (e.g. a chunked upload) into the store; src is consumed."""
+    digest = hashlib.sha256()
+    with open(src, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BLOCK), b""):
+            digest.update(block)
+    fd, tmp = _temp_file()
+    os.close(fd)
+    shutil.move(src, tmp)  # a rename unless the partial folder is on another disk
+    return _commit_blob(tmp, digest.hexdigest(), ext)
+
+
+# ── reference counting ────────────────────────────────────────────────────────
+def acquire(rel_path):
+    """Count one more reference to a blob (caller commits). Non-blob paths are ignored."""
+    from extensions import db
+    from models import Blob
+
+    digest = blob_digest(rel_path)
+    if digest is None:
+        return False
+    updated = Blob.query.filter_by(sha256=digest).update(
+        {Blob.ref_count: Blob.ref_count + 1, Blob.updated_at: datetime.utcnow()},
+        synchronize_session=False)
+    if not updated:
+        path = resolve_upload(rel_path)
+        size = os.path.getsize(path) if path and os.path.exists(path) else None
+        try:
+            with db.session.begin_nested():
+                db.session.add(Blob(sha256=digest, path=rel_path, size=size, ref_count=1))
+        except IntegrityError:  # another request stored the same file first
+            Blob.query.filter_by(sha256=digest).update(
+                {Blob.ref_count: Blob.ref_count + 1, Blob.updated_at: datetime.utcnow()},
+                synchronize_session=False)
+    return True
+
+
+def release(rel_path):
+    """Drop one reference (caller commits). The file itself is removed later by collect_garbage()."""
+    from models import Blob
+
+    digest = blob_digest(rel_path)
+    if digest is None:
+        return False
+    Blob.query.filter(Blob.sha256 == digest, Blob.ref_count > 0).update(
+        {Blob.ref_count: Blob.ref_count - 1, Blob.updated_at: datetime.utcnow()},
+        synchronize_session=False)
+    return True
+
+
+def discard(file_path):
+    """A record stops using file_path: release a blob, or delete an older non-blob file outright."""
+    if release(file_path):
+        return
+    try:
+        path = locate(file_path)
+        if os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def html_refs(html):
+    """Set of blobs/... paths linked from editor HTML."""
+    return set(_BLOB_REF_RE.findall(html or ""))
+
+
+def sync_html_refs(old_html, new_html):
+    """Acquire / release the difference between two versions of a document's HTML (caller commits)."""
+    old, new = html_refs(old_html), html_refs(new_html)
+    for rel_path in new - old:
+        acquire(rel_path)
+    for rel_path in old - new:
+        release(rel_path)
+
+
+# ── garbage collection ────────────────────────────────────────────────────────
+def _rel(path):
+    return os.path.relpath(path, upload_root()).replace(os.sep, "/")
+
+
+def referenced_paths(batch_size=500):
+    """Every file under UPLOAD_FOLDER that a row points at (relative paths), streamed table by table."""
+    from extensions import db
+    from models import ReportImage
+    from routes.catalog import CatalogFile
+    from routes.surat_resmi import SuratResmi
+
+    root = upload_root()
+    refs = set()
+    for column in (ReportImage.file_path, CatalogFile.file_path):
+        for (file_path,) in db.session.query(column).filter(column.isnot(None)).yield_per(batch_size):
+            path = os.path.abspath(locate(file_path))
+            if os.path.commonpath([root, path]) == root:
+                refs.add(_rel(path))
+    html_rows = (db.session.query(SuratResmi.content_html)
+                 .filter(SuratResmi.content_html.contains(UPLOAD_URL_PREFIX)).yield_per(batch_size))
+    for (html,) in html_rows:
+        refs.update(_UPLOAD_REF_RE.findall(html))
+    return refs
+
+
+def _collect_file(path, cutoff, dry_run):
+    """
+    Delete a stored file unless it was modified after `cutoff`; returns the
+    bytes freed. The file is first renamed into blobs/tmp/, so a concurrent
+    _commit_blob() either touched it before (the mtime is checked after the
+    rename and the file put back) or finds it gone and stores its own copy.
+    """
+    if dry_run:
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    trash = os.path.join(upload_root(), BLOB_DIR, "tmp", os.path.basename(path) + ".gc")
+    os.makedirs(os.path.dirname(trash), exist_ok=True)
+    try:
+        os.replace(path, trash)
+    except FileNotFoundError:
+        return 0
+    if datetime.utcfromtimestamp(os.path.getmtime(trash)) >= cutoff:
+        os.replace(trash, path)  # reused meanwhile
+        return None
+    size = os.path.getsize(trash)
+    os.remove(trash)
+    return size
+
+
+def collect_garbage(grace_hours=24, dry_run=False, batch_size=500, echo=print):
+    """
+    Delete stored files nothing references any more, batch_size at a time:
+
+      1. blobs whose reference count has been zero for grace_hours; one that
+         a row still points at gets its count repaired instead
+      2. any other file under UPLOAD_FOLDER older than grace_hours that no
+         ReportImage / CatalogFile / surat HTML references: older flat
+         uploads left by deleted reports, originals already relocated into
+         blobs/, and temp files from interrupted saves
+
+    Safe to run while uploads continue. A blob row is deleted with a
+    conditional DELETE (still unreferenced and past the grace period), so one
+    acquired since the batch was read is kept. A file is only unlinked if it
+    was not touched after the cutoff (see _collect_file), which covers an
+    upload of the same bytes that reused it and has not acquired it yet.
+
+    Returns (files removed, bytes freed).
+    """
+    from extensions import db
+    from models import Blob
+
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+    refs = referenced_paths(batch_size)
+    removed = freed = 0
+
+    def unlink(path):
+        nonlocal removed, freed
+        size = _collect_file(path, cutoff, dry_run)
+        if size is not None:
+            removed += 1
+            freed += size
+
+    last = ""
+    while True:
+        batch = (Blob.query.filter(Blob.ref_count <= 0, Blob.updated_at < cutoff, Blob.sha256 > last)
+                 .order_by(Blob.sha256).limit(batch_size).all())
+        if not batch:
+            break
+        last = batch[-1].sha256
+        for blob in batch:
+            if blob.path in refs:
+                echo(f"   {blob.path} masih dipakai — ref_count diperbaiki")
+                if not dry_run:
+                    blob.ref_count = 1
+                continue
+            if not dry_run:
+                # re-checked in the DELETE itself: an upload may have acquired it since the batch was read
+                deleted = Blob.query.filter(Blob.sha256 == blob.sha256, Blob.ref_count <= 0,
+                                            Blob.updated_at < cutoff).delete(synchronize_session=False)
+                if not deleted:
+                    continue
+            path = resolve_upload(blob.path)
+            if path:
+                unlink(path)
+        if not dry_run:
+            db.session.commit()
+        echo(f"   blobs: {removed} file dihapus sejauh ini")
+
+    root = upload_root()
+    tmp_dir = os.path.join(root, BLOB_DIR, "tmp")
+    pending = []
+
+    def flush():
+        for path in pending:
+            unlink(path)
+        echo(f"   {'[dry-run] ' if dry_run else ''}{removed} file, {freed / 1024 / 1024:.1f} MB")
+        pending.clear()
+
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if name.startswith(".") or datetime.utcfromtimestamp(os.path.getmtime(path)) >= cutoff:
+                continue
+            rel_path = _rel(path)
+            if dirpath != tmp_dir:
+                if rel_path in refs:
+                    continue
+                digest = blob_digest(rel_path)
+                # a blob with a row is phase 1's to delete, once its count has stayed zero
+                if digest and db.session.query(Blob.sha256).filter_by(sha256=digest).scalar():
+                    continue
+            pending.append(path)
+            if len(pending) >= batch_size:
+                flush()
+    if pending:
+        flush()
+    return removed, freed
+
+
+def import_file(file_path):
+    """
+    Copy an older, non-blob upload into the blob store and return its blobs/...
+    path (None if the file is missing). The original stays until
+    collect_garbage() finds it unreferenced.
+    """
+    path = locate(file_path)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return save_stream(f, file_ext(path))
+
+
+def relocate_html(html):
+    """Point /uploads/<older path> links in HTML at blob copies; returns (new html, files copied)."""
+    copied = 0
+
+    def repl(m):
+        nonlocal copied
+        rel_path = m.group(1)
+        if blob_digest(rel_path):
+            return m.group(0)
+        new_path = import_file(rel_path)
+        if new_path is None:
+            return m.group(0)
+        copied += 1
+        return UPLOAD_URL_PREFIX + new_path
+
+    return _UPLOAD_REF_RE.sub(repl, html or ""), copied
+
+
+def ingest_inline_images(html):
+    """
+    Move data: URI images in editor HTML into the upload store.
+    Each src becomes /uploads/blobs/.../<sha256>.<ext>; absolute links to our
+    own /uploads/ (this host or PUBLIC_URLS) are made relative again. Links to
+    other sites and undecodable images are left as-is.
+    """
+    if not html:
+        return html
+    from PIL import Image as PILImage
+
+    def store(m):
+        mime = m.group(3).lower()
+        ext = MIME_EXT.get(mime)
+        if not ext:
+            return m.group(0)
+        try:
+            raw = base64.b64decode(m.group(4))
+            PILImage.open(BytesIO(raw)).verify()
+        except Exception:
+            return m.group(0)
+        rel_path = save_bytes(raw, ext)
+        return f"{m.group(1)}{m.group(2)}{UPLOAD_URL_PREFIX}{rel_path}{m.group(2)}"
+
+    html = _DATA_IMG_RE.sub(store, html)
+    own = _own_origins()
+
+    def relative(m):
+        if m.group(3).lower() not in own:
+            return m.group(0)  # another site's /uploads/: not ours, keep the link
+        return f"{m.group(1)}{m.group(2)}{UPLOAD_URL_PREFIX}"
+
+    return _ABS_UPLOAD_RE.sub(relative, html)
+
+
+def _own_origins():
+    """scheme://host of this server: the current request's host plus PUBLIC_URLS."""
+    urls = [u.strip() for u in current_app.config.get("PUBLIC_URLS", "").split(",")]
+    if has_request_context():
+        urls.append(request.host_url)
+    return {u.rstrip("/").lower() for u in urls if u}
+
+
+def expand_upload_urls(html, base_url):
+    """Make stored /uploads/ references absolute for the frontend (served from another origin)."""
+    if not html:
+        return html
+    base = base_url.rstrip("/")
+    return _REL_UPLOAD_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{base}{UPLOAD_URL_PREFIX}", html)
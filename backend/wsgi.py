@@ -0,0 +1,13 @@
+"""
+backend/wsgi.py
+Production entry point.
+
+  gunicorn -c gunicorn.conf.py wsgi:app      (Linux)
+  python serve.py                            (Windows / no gunicorn — waitress)
+
+`python app.py` is the Werkzeug development server and should not be put
+behind the reverse proxy.
+"""
+from app import app
+
+application = app
@@ -1,5 +1,6 @@
 import { useState, useEffect } from "react";
 import API from "../services/api";
+import { chunkedUpload } from "../services/chunkedUpload";
 import toast from "react-hot-toast";
 
 const TYPE_CONFIG = {
@@ -94,15 +95,8 @@ export default function Catalog() {
     if (!form.title || !form.file) { toast.error("Judul dan file wajib dipilih"); return; }
     setUploading(true);
     try {
-      const fd = new FormData();
-      fd.append("file", form.file);
-      fd.append("title", form.title);
-      fd.append("brand", form.brand);
-      fd.append("model_series", form.model_series);
-      fd.append("document_type", form.document_type);
-      fd.append("description", form.description);
-      fd.append("tags", form.tags);
-      await API.post("/catalog/upload", fd, { headers: { "Content-Type": "multipart/form-data" } });
+      const { file, ...fields } = form;
+      await chunkedUpload(file, { purpose: "catalog", fields });
       toast.success("Dokumen berhasil diupload! 📚");
       setShowUpload(false);
       setForm({ title: "", brand: "", model_series: "", document_type: "catalog", description: "", tags: "", file: null });
@@ -56,40 +56,26 @@ export default function Dashboard() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    Promise.all([
-      API.get("/report/list").catch(() => ({ data: [] })),
-      API.get("/quotation/list").catch(() => ({ data: [] })),
-      API.get("/stock/list").catch(() => ({ data: [] })),
-      API.get("/catalog/list").catch(() => ({ data: [] })),
-      API.get("/onsite/list").catch(() => ({ data: [] })),
-      API.get("/surat/list").catch(() => ({ data: [] })),
-    ]).then(([r, q, s, c, o, su]) => {
-      const reports     = r.data  || [];
-      const quotations  = q.data  || [];
-      const stock       = s.data  || [];
-      const catalog     = c.data  || [];
-      const onsite      = o.data  || [];
-      const surat       = su.data || [];
-
+    // Satu request: angka dihitung di server (GROUP BY), bukan dari semua /list
+    API.get("/dashboard/summary").then(({ data }) => {
       setStats({
-        reports:       reports.length,
-        quotations:    quotations.length,
-        stock:         stock.length,
-        catalog:       catalog.length,
-        onsite:        onsite.length,
-        surat:         surat.length,
-        wonValue:      quotations.filter(q => q.status === "won").reduce((s, q) => s + (q.total_amount || 0), 0),
-        pipeline:      quotations.filter(q => ["draft","sent","followup"].includes(q.status)).reduce((s, q) => s + (q.total_amount || 0), 0),
-        onsiteDraft:   onsite.filter(o => o.status === "draft").length,
-        onsiteApproved:onsite.filter(o => o.status === "approved").length,
+        reports:       data.reports.total,
+        quotations:    data.quotations.total,
+        stock:         data.stock.total,
+        catalog:       data.catalog.total,
+        onsite:        data.onsite.total,
+        surat:         data.surat.total,
+        wonValue:      data.quotations.won_value,
+        pipeline:      data.quotations.pipeline_value,
+        onsiteDraft:   data.onsite.by_status.draft || 0,
+        onsiteApproved:data.onsite.by_status.approved || 0,
       });
 
-      setRecentReports(reports.slice(0, 4));
-      setRecentQuotations(quotations.slice(0, 4));
-      setRecentOnsite(onsite.slice(0, 4));
-      setRecentSurat(surat.slice(0, 4));
-      setLoading(false);
-    });
+      setRecentReports(data.recent.reports);
+      setRecentQuotations(data.recent.quotations);
+      setRecentOnsite(data.recent.onsite);
+      setRecentSurat(data.recent.surat);
+    }).catch(() => {}).finally(() => setLoading(false));
   }, []);
 
   const userName = localStorage.getItem("user_name") || "User";
@@ -1,11 +1,19 @@
 import { useState, useEffect, useCallback, useRef } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import API from "../services/api";
+import { chunkedUpload } from "../services/chunkedUpload";
 import toast from "react-hot-toast";
 
 const BASE_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:5000";
 //const BASE_URL = import.meta.env.VITE_API_URL || "http://192.168.18.8:5000";
 
+// Profil output PDF (backend: image_cache.OUTPUT_PROFILES)
+const PDF_PROFILES = [
+  { value: "print",  label: "🖨 Cetak" },
+  { value: "email",  label: "✉ Email" },
+  { value: "screen", label: "🖥 Layar" },
+];
+
 
 /* ─── Field definitions (reused for edit mode) ─────────────────── */
 const COMMISSIONING_FIELDS = [
@@ -194,10 +202,21 @@ function ImageCard({ img, onDelete, onCaptionSave }) {
   const [saving, setSaving] = useState(false);
   const [deleteDialog, setDeleteDialog] = useState(false);
   const [deleting, setDeleting] = useState(false);
+  const [loaded, setLoaded] = useState(false);
   const inputRef = useRef(null);
 
-  const filename = (img.file_path || "").split(/[\/\\]/).pop();
-  const imgUrl = `${BASE_URL}/uploads/${filename}`;
+  // Ukuran dari server (diisi saat upload) — placeholder tampil tanpa menunggu gambar.
+  // Foto tegak ditampilkan utuh (contain), bukan dipotong ke 4:3.
+  const portrait = img.width && img.height && img.height > img.width;
+  const info = [img.width && img.height ? `${img.width}×${img.height}` : null,
+                img.byte_size ? (img.byte_size < 1024 * 1024 ? `${(img.byte_size / 1024).toFixed(0)} KB`
+                                                              : `${(img.byte_size / 1024 / 1024).toFixed(1)} MB`) : null]
+    .filter(Boolean).join(" · ");
+
+  // file_path relatif terhadap uploads/ (blobs/ab/cd/<sha>.jpg); path absolut lama → nama file saja
+  const path = (img.file_path || "").replace(/\\/g, "/");
+  const filename = path.split("/").pop();
+  const imgUrl = `${BASE_URL}/uploads/${/^([a-zA-Z]:)?\//.test(path) ? filename : path}`;
 
   const handleSaveCaption = async () => {
     setSaving(true);
@@ -226,9 +245,11 @@ function ImageCard({ img, onDelete, onCaptionSave }) {
         />
       )}
       <div className="group relative rounded-xl overflow-hidden border border-gray-100 shadow-sm bg-white">
-        <div className="relative overflow-hidden bg-gray-50" style={{ aspectRatio: "4/3" }}>
+        <div className={`relative overflow-hidden bg-gray-50 ${loaded ? "" : "animate-pulse"}`} style={{ aspectRatio: "4/3" }}>
           <img src={imgUrl} alt={caption || filename}
-            className="w-full h-full object-cover transition-transform duration-200 group-hover:scale-105"
+            width={img.width || undefined} height={img.height || undefined}
+            loading="lazy" decoding="async" onLoad={() => setLoaded(true)}
+            className={`w-full h-full transition-transform duration-200 group-hover:scale-105 ${portrait ? "object-contain" : "object-cover"}`}
             onError={e => { e.target.onerror = null; e.target.src = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='80' height='80'%3E%3Crect width='80' height='80' fill='%23f3f4f6'/%3E%3Ctext x='40' y='44' text-anchor='middle' font-size='11' fill='%239ca3af'%3ENo image%3C/text%3E%3C/svg%3E"; }}
           />
           <div className="absolute inset-0 bg-gradient-to-t from-black/50 to-transparent opacity-0 group-hover:opacity-100 transition-all duration-200 flex items-end justify-between p-2">
@@ -265,6 +286,7 @@ function ImageCard({ img, onDelete, onCaptionSave }) {
               {caption || <span className="italic text-gray-300">Tambah keterangan…</span>}
             </p>
           )}
+          {info && <p className="text-[10px] text-gray-300 mt-0.5">{info}</p>}
         </div>
       </div>
     </>
@@ -280,6 +302,7 @@ export default function ReportDetail() {
   const [uploading, setUploading] = useState(false);
   const [dragActive, setDragActive] = useState(false);
   const [pdfLoading, setPdfLoading] = useState(false);
+  const [pdfProfile, setPdfProfile] = useState("print");
   const [previewLoading, setPreviewLoading] = useState(false);
   const [previewUrl, setPreviewUrl] = useState(null);
 
@@ -352,11 +375,9 @@ export default function ReportDetail() {
   };
 
   const handleFiles = async (files) => {
-    const fd = new FormData();
-    for (let f of files) fd.append("images", f);
     setUploading(true);
     try {
-      await API.post(`/report/upload/${id}`, fd, { headers: { "Content-Type": "multipart/form-data" } });
+      for (let f of files) await chunkedUpload(f, { purpose: "report_image", reportId: Number(id) });
       toast.success("Foto berhasil diupload!");
       fetchReport();
     } catch { toast.error("Upload gagal"); }
@@ -386,7 +407,7 @@ export default function ReportDetail() {
   const downloadPDF = async () => {
     setPdfLoading(true);
     try {
-      const res = await API.get(`/report/pdf/${id}`, { responseType: "blob" });
+      const res = await API.get(`/report/pdf/${id}?profile=${pdfProfile}`, { responseType: "blob" });
       const url = URL.createObjectURL(new Blob([res.data], { type: "application/pdf" }));
       Object.assign(document.createElement("a"), { href: url, download: `${report.report_number}_${report.report_type}.pdf` }).click();
       setTimeout(() => URL.revokeObjectURL(url), 5000);
@@ -459,6 +480,11 @@ export default function ReportDetail() {
               className="flex items-center gap-2 px-4 py-2 bg-blue-50 text-blue-700 border border-blue-200 rounded-xl text-sm font-semibold hover:bg-blue-100 transition-colors disabled:opacity-60">
               {previewLoading ? <><div className="w-3.5 h-3.5 border-2 border-blue-700/30 border-t-blue-700 rounded-full animate-spin" /> Loading…</> : "👁 Preview"}
             </button>
+            {/* Profil foto di PDF: print = resolusi penuh, email = ukuran kecil untuk lampiran */}
+            <select value={pdfProfile} onChange={e => setPdfProfile(e.target.value)} title="Kualitas foto di PDF"
+              className="px-3 py-2 border border-gray-200 rounded-xl text-sm font-semibold text-gray-600 bg-white focus:outline-none focus:ring-2 focus:ring-[#0B3D91]">
+              {PDF_PROFILES.map(p => <option key={p.value} value={p.value}>{p.label}</option>)}
+            </select>
             <button onClick={downloadPDF} disabled={pdfLoading}
               className="flex items-center gap-2 px-4 py-2 bg-[#0B3D91] text-white rounded-xl text-sm font-semibold hover:bg-[#1E5CC6] transition-colors disabled:opacity-60">
               {pdfLoading ? <><div className="w-3.5 h-3.5 border-2 border-white/30 border-t-white rounded-full animate-spin" /> Generating…</> : "⬇ Download PDF"}
@@ -124,6 +124,22 @@ function BulkActionBar({ selectedIds, allIds, onSelectAll, onClearAll, onBulkDel
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const isAllSelected = allIds.length > 0 && selectedIds.length === allIds.length;
 
+  const [merging, setMerging]                     = useState(false);
+
+  // Satu PDF berisi semua report terpilih, dengan daftar isi & bookmark
+  const handleMergedPdf = async () => {
+    setMerging(true);
+    try {
+      const res = await API.post("/export/merged", { report_ids: selectedIds }, { responseType: "blob" });
+      const url = URL.createObjectURL(new Blob([res.data], { type: "application/pdf" }));
+      const a = document.createElement("a");
+      a.href = url; a.download = `Laporan_gabungan_${selectedIds.length}.pdf`; a.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      toast.error(err.response?.status === 501 ? "Server belum mendukung PDF gabungan" : "Gagal membuat PDF gabungan");
+    } finally { setMerging(false); }
+  };
+
   const handleDelete = async () => {
     setDeleting(true);
     try {
@@ -159,6 +175,13 @@ function BulkActionBar({ selectedIds, allIds, onSelectAll, onClearAll, onBulkDel
           {selectedIds.length} dipilih
         </span>
         <div className="flex items-center gap-2 ml-auto">
+          <button onClick={handleMergedPdf} disabled={merging || selectedIds.length === 0}
+            className="flex items-center gap-1.5 px-3 py-1.5 bg-white text-[#0B3D91] border border-[#0B3D91]/30 rounded-lg text-xs font-bold hover:bg-[#0B3D91]/5 disabled:opacity-60 transition-all">
+            {merging
+              ? <div className="w-3.5 h-3.5 border-2 border-[#0B3D91]/30 border-t-[#0B3D91] rounded-full animate-spin"/>
+              : "📑"}
+            {merging ? "Membuat PDF..." : "Gabung PDF"}
+          </button>
           <button onClick={() => setShowDeleteConfirm(true)} disabled={deleting}
             className="flex items-center gap-1.5 px-3 py-1.5 bg-white text-red-500 border border-red-200 rounded-lg text-xs font-bold hover:bg-red-50 disabled:opacity-60 transition-all">
             {deleting
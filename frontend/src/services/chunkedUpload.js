@@ -0,0 +1,79 @@
+import API from "./api";
+
+// Upload bertahap ke /api/upload: file dikirim per potongan (chunk), dan kalau
+// koneksi putus, upload dilanjutkan dari offset terakhir — tidak mulai dari nol.
+// Session id disimpan di localStorage, jadi reload halaman pun bisa melanjutkan.
+
+const MAX_RETRIES = 5;
+const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+
+// crypto.subtle hanya ada di secure context (https / localhost); selain itu checksum dilewati
+const sha256 = async (blob) => {
+  if (!window.crypto?.subtle) return null;
+  const hash = await window.crypto.subtle.digest("SHA-256", await blob.arrayBuffer());
+  return [...new Uint8Array(hash)].map((b) => b.toString(16).padStart(2, "0")).join("");
+};
+
+const storageKey = (purpose, file, reportId) =>
+  `upload:${purpose}:${reportId || ""}:${file.name}:${file.size}:${file.lastModified}`;
+
+const resumeSession = async (key) => {
+  const id = localStorage.getItem(key);
+  if (!id) return null;
+  try {
+    const res = await API.get(`/upload/${id}`);
+    return res.data;
+  } catch {
+    localStorage.removeItem(key);
+    return null;
+  }
+};
+
+/**
+ * Upload satu file.
+ *   purpose:  "catalog" | "report_image"
+ *   fields:   catalog → { title, brand, ... }, foto → { caption }
+ *   onProgress(fraction 0..1)
+ * Hasil: response /complete (sama dengan /catalog/upload atau /report/upload/<id>).
+ */
+export async function chunkedUpload(file, { purpose, reportId, fields = {}, onProgress } = {}) {
+  const key = storageKey(purpose, file, reportId);
+  let session = await resumeSession(key);
+  if (!session) {
+    const res = await API.post("/upload/init", {
+      purpose, filename: file.name, size: file.size, type: file.type || undefined,
+      report_id: reportId, fields,
+    });
+    session = res.data;
+    localStorage.setItem(key, session.id);
+  }
+
+  let offset = session.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + session.chunk_size);
+    try {
+      const checksum = await sha256(chunk);
+      const res = await API.put(`/upload/${session.id}?offset=${offset}`, chunk, {
+        headers: {
+          "Content-Type": "application/octet-stream",
+          ...(checksum ? { "X-Chunk-Sha256": checksum } : {}),
+        },
+      });
+      offset = res.data.offset;
+      retries = 0;
+      onProgress?.(offset / file.size);
+    } catch (err) {
+      // 409/400: server memberi offset yang benar → lanjut dari sana
+      const serverOffset = err.response?.data?.offset;
+      if (err.response?.status === 404) localStorage.removeItem(key);
+      if (++retries > MAX_RETRIES || (err.response && serverOffset === undefined)) throw err;
+      if (serverOffset !== undefined) offset = serverOffset;
+      else await sleep(1000 * 2 ** (retries - 1));  // jaringan putus — tunggu lalu coba lagi
+    }
+  }
+
+  const res = await API.post(`/upload/${session.id}/complete`);
+  localStorage.removeItem(key);
+  return res.data;
+}